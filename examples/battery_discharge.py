@@ -2,6 +2,7 @@
 import argparse
 import time, datetime
 from ET54 import ET54
+from ET54.session import session
 
 
 def main():
@@ -11,6 +12,12 @@ def main():
         "--rate_A", nargs="+", type=float, default=[1.0], help="Discharge rate in Amps"
     )
     parser.add_argument("--cutoff", type=float, default=10.5, help="Cutoff Voltage")
+    parser.add_argument(
+        "--journal", default="discharge.journal", help="Checkpoint file of the session"
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="Continue the session in the journal"
+    )
 
     args = parser.parse_args()
 
@@ -19,35 +26,63 @@ def main():
     print("Battery discharge")
     print(f"Constant-Current: " + ", ".join(f"{_:.2f}" for _ in args.rate_A))
     print(f"Cutoff Voltage: {args.cutoff:.2f}")
-    # set ranges
-    el.ch1.off()
-    el.ch1.Vrange = "high" if args.cutoff > 15 else "low"
+    el.ch1.auto_range = True  # current range follows the discharge rate
 
-    try:
-        start = datetime.datetime.now()
-        last = start
-        logfile = f"discharge.{last.isoformat()}.csv"
-        print("timestamp, V, I, P, R, Ah, Wh")
+    # the load keeps discharging if this script dies. With --resume, carry
+    # on where the journal left off instead of starting over.
+    journal = session(args.journal, el.ch1)
+    if args.resume:
+        if not journal.resume():
+            raise SystemExit(f"No session to resume in '{args.journal}'")
+        state = journal.state
+        # add what the device counted while nobody was watching
+        state["Ah"] += journal.gap["BATT_capacity"]
+        state["Wh"] += journal.gap["BATT_energy"]
+        state["elapsed"] += journal.gap["t"]
+        print(f"Resuming stage {state['stage'] + 1} after {journal.gap['t']:.0f} s")
+        running = journal.device["input"].upper() == "ON"
+        if not running and not state.get("stopped"):
+            state["stage"] += 1  # stage ended at the cutoff meanwhile
+        state["stopped"] = False
+    else:
+        # set ranges
+        el.ch1.off()
+        el.ch1.Vrange = "high" if args.cutoff > 15 else "low"
+        logfile = f"discharge.{datetime.datetime.now().isoformat()}.csv"
         with open(logfile, "w") as _fh:
             _fh.write("# timestamp, V, I, P, R, Ah, Wh\n")
-        total_Wh = 0
-        total_Ah = 0
-        for set_A in args.rate_A:
-            el.ch1.off()
-            el.ch1.Crange = "high" if set_A > 3 else "low"
-            el.ch1.BATT_mode("CC", set_A, "V", args.cutoff)
-            el.ch1.on()
-            last = datetime.datetime.now()
+        state = dict(stage=0, Ah=0, Wh=0, elapsed=0, logfile=logfile)
+        running = False
+
+    try:
+        start = time.monotonic() - state["elapsed"]
+        logfile = state["logfile"]
+        print("timestamp, V, I, P, R, Ah, Wh")
+        total_Wh = state["Wh"]
+        total_Ah = state["Ah"]
+        for stage in range(state["stage"], len(args.rate_A)):
+            if not running:
+                el.ch1.off()
+                journal.apply(
+                    dict(
+                        BATT_submode="CC",
+                        BATT_cutoff="V",
+                        BATT_current=args.rate_A[stage],
+                        BATT_cutoff_value=args.cutoff,
+                        mode="BATT",
+                    )
+                )
+                el.ch1.on()
+                journal.checkpoint(force=True, stage=stage)
+            running = False
+            last = time.monotonic()
 
-            # monitor voltage, current, power etc.
+            # monitor voltage, current, power etc. Integrate over the time
+            # the device measured, not the time the answer came back.
             while True:
-                volt = el.ch1.read_voltage()
-                current = el.ch1.read_current()
-                power = el.ch1.read_power()
-                resistance = el.ch1.read_resistance()
-                now = datetime.datetime.now()
-                delta = (now - last).total_seconds()
-                elapsed = (now - start).total_seconds()
+                (volt, current, power, resistance), (_, now, _) = el.ch1.read_all(timed=True)
+                delta = now - last
+                elapsed = now - start
                 last = now
                 total_Wh += volt * current * delta / 3600
                 total_Ah += current * delta / 3600
@@ -58,15 +93,19 @@ def main():
                 print(line)
                 with open(logfile, "a") as _fh:
                     _fh.write(line + "\n")
+                journal.checkpoint(Ah=total_Ah, Wh=total_Wh, elapsed=elapsed)
                 if current < 0.01:
                     el.ch1.off()
                     break
                 time.sleep(1)
+        journal.finish()
     except Exception as _e:
         el.ch1.off()
+        journal.checkpoint(force=True, stopped=True)  # resume restarts the stage
         raise
     except KeyboardInterrupt:
         el.ch1.off()
+        journal.checkpoint(force=True, stopped=True)
 
 
 if __name__ == "__main__":
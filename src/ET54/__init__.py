@@ -7,5 +7,13 @@ ET5411A+ and maybe even ET5406A+, Et5407A+.
 Tested on ET5410A+
 """
 
-from .instrument import ET54
+
+def __getattr__(name):
+    # import lazily, so tools like the `et54` command line client start fast
+    if name == "ET54":
+        from .instrument import ET54
+
+        globals()["ET54"] = ET54
+        return ET54
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,200 @@
+"Background acquisition of channel measurements"
+
+import sys, time, threading
+from collections import namedtuple
+
+sample = namedtuple(
+    "sample", ("t", "channel", "V", "I", "P", "R", "t_send", "t_recv"), defaults=(None, None)
+)
+sample.__doc__ = """One measurement of a channel
+
+t       estimated time of the measurement [s] (`time.monotonic()` scale),
+        corrected for the transmission and pacing delays
+channel channel name ("1" or "2")
+V, I, P, R  voltage [V], current [A], power [W] and resistance [Ω]
+t_send  time the query was sent [s]
+t_recv  time the answer was received [s]
+
+Add `acquisition.wall_offset` to get wall-clock (`time.time()`) timestamps.
+"""
+
+
+class acquisition:
+    """Poll `read_all()` of one or more channels in a background thread
+
+    channels    list of channel objects, e.g. `el.Channels`
+    interval    time between the start of two cycles [s]. Use 0 to poll as
+                fast as the connection allows.
+    retries     number of failed cycles in a row that are tolerated (e.g.
+                read timeouts) before the acquisition stops
+
+    Every sample is passed to all registered sinks (`add_sink`). Sinks run on
+    the acquisition thread and must be fast; anything slow should be handed
+    over to another thread.
+
+    Tasks (`add_task`) are called after every n-th cycle. They allow other
+    components to interleave their own occasional queries with the
+    acquisition traffic instead of polling the device themselves.
+
+    `last` holds the latest sample per channel name and `state` a dict of
+    cached device state per channel name that tasks may fill in (see
+    `add_state`). `state` is changed by the acquisition thread: write it with
+    `set_state` and read it from other threads with `state_snapshot`.
+
+    When the acquisition stops because of an error, the error is stored in
+    `error` and passed to all error handlers (`add_error_handler`), so
+    components relying on the samples (e.g. the supervisor) can fail safe.
+
+    Samples are timestamped on the `time.monotonic()` scale. `wall_offset`
+    (recorded once, when the acquisition is created) converts them to
+    wall-clock time.
+    """
+
+    def __init__(self, channels, interval=1.0, retries=2):
+        self.channels = list(channels)
+        self.interval = interval
+        self.retries = retries
+        self.sinks = []
+        self.tasks = []
+        self.error_handlers = []
+        self.failures = 0
+        self.last = {}
+        self.state = {ch.name: {} for ch in self.channels}
+        self._state_lock = threading.Lock()
+        self.cycles = 0
+        self.error = None
+        self.wall_offset = time.time() - time.monotonic()
+        self._fields = []
+        self._own = set()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add_sink(self, sink):
+        "register a callable that receives every sample"
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+
+    def add_error_handler(self, handler):
+        "register a callable that receives the error that stopped the acquisition"
+        self.error_handlers.append(handler)
+
+    def remove_error_handler(self, handler):
+        self.error_handlers.remove(handler)
+
+    def add_task(self, task, every=1):
+        "register a callable that is called after every `every` cycles"
+        self.tasks.append((task, every))
+
+    def remove_task(self, task):
+        self.tasks = [(t, n) for t, n in self.tasks if t != task]
+
+    def add_state(self, fields=("input", "mode", "protection"), every=10):
+        """cache channel attributes in `state`
+
+        One attribute of one channel is refreshed every `every` cycles, in
+        turn. Fields that another component keeps up to date (e.g. the
+        supervisor for `protection`) are skipped.
+        """
+
+        if not self._fields:
+            self.add_task(self._refresh_state, every)
+        for ch in self.channels:
+            for field in fields:
+                if (ch, field) not in self._fields:
+                    self._fields.append((ch, field))
+
+    def remove_state(self, fields=("input", "mode", "protection")):
+        "stop caching channel attributes (see `add_state`)"
+
+        self._fields = [(ch, field) for ch, field in self._fields if field not in fields]
+        if not self._fields:
+            self.remove_task(self._refresh_state)
+
+    def _refresh_state(self):
+        ch, field = self._fields[0]
+        self._fields.append(self._fields.pop(0))
+        state = self.state[ch.name]
+        if field in state and (ch.name, field) not in self._own:
+            return
+        self._own.add((ch.name, field))
+        self.set_state(ch.name, field, getattr(ch, field))
+
+    def set_state(self, channel, field, value):
+        "set a field of the cached state of a channel"
+        with self._state_lock:
+            self.state[channel][field] = value
+
+    def state_snapshot(self):
+        "copy of the cached state, safe to iterate while the acquisition runs"
+        with self._state_lock:
+            return {name: dict(state) for name, state in self.state.items()}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        "start the acquisition thread"
+
+        if self.running:
+            return
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(
+            target=self._run, name="ET54-acquisition", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        "stop the acquisition thread after the current cycle"
+
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def cycle(self):
+        "run a single acquisition cycle in the calling thread"
+
+        for ch in self.channels:
+            (V, I, P, R), (t_send, t, t_recv) = ch.read_all(timed=True)
+            s = sample(t, ch.name, V, I, P, R, t_send, t_recv)
+            self.last[ch.name] = s
+            for sink in self.sinks:
+                try:
+                    sink(s)
+                except Exception as e:
+                    print(f"Acquisition sink {sink!r} failed: {e}", file=sys.stderr)
+        self.cycles += 1
+        for task, every in self.tasks:
+            if self.cycles % every == 0:
+                task()
+
+    def _run(self):
+        next_cycle = time.monotonic()
+        failed = 0
+        while not self._stop.is_set():
+            try:
+                self.cycle()
+                failed = 0
+            except Exception as e:
+                self.failures += 1
+                failed += 1
+                if failed <= self.retries:
+                    print(f"Acquisition cycle failed, retrying: {e}", file=sys.stderr)
+                else:
+                    self.error = e
+                    print(f"Acquisition stopped: {e}", file=sys.stderr)
+                    for handler in self.error_handlers:
+                        try:
+                            handler(e)
+                        except Exception as e2:
+                            print(f"Acquisition error handler {handler!r} failed: {e2}", file=sys.stderr)
+                    return
+            next_cycle += self.interval
+            delay = next_cycle - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_cycle = time.monotonic()
@@ -1,14 +1,42 @@
 "Electronic load input channel"
 
-from ._support_functions import _toint, _tofloat, _tofloats, _value_extend 
+import time
+import numpy as np
+from ._support_functions import _tofloat, _tofloats, _value_extend 
+from .commands import COMMANDS, MEASUREMENTS, PARSERS, BY_NAME, commands
+from .limits import limits, UNITS, MODE_QUANTITY
+from .sweep import IV_sweep
+from .loadeffect import load_effect
 
 class channel:
-    "input channel"
+    """input channel
 
-    def __init__(self, name, write, query):
+    The simple settings (mode, ranges, protection, set values, ...) are
+    generated from the command table in `commands.py`. Their command strings
+    are formatted for this channel once, in the constructor.
+
+    Values are checked against the limits of `model` (see `limits.py`)
+    before they are sent, so invalid values raise a ValueError without a
+    round trip to the device.
+
+    With `auto_range` set, voltage and current ranges follow the set values
+    and measurements (see `autorange`).
+    """
+
+    def __init__(self, name, write, query, model=None, burst=None):
         self.name = name
         self.write = write
         self.query = query
+        self.burst = burst
+        self.limits = limits(model)
+        self.auto_range = False
+        self.range_up = 0.95
+        self.range_down = 0.8
+        self._written = {}
+        self._setpoints = {}
+        self._get = {c.name: c.stem.format(name) + "?" for c in COMMANDS}
+        self._get.update({k: v.format(name) for k, v in MEASUREMENTS.items()})
+        self._set = {c.name: c.stem.format(name) + " " for c in COMMANDS if not c.readonly}
 
     def __str__(self):
         mode = self.mode
@@ -133,105 +161,150 @@ Mode:           {mode}
     def off(self):
         self.input = "OFF"
 
-
     ############################################################
-    # mode and ranges
+    # table driven settings
 
-    @property
-    def mode(self):
-        "channel mode (CC|CV|CP|CR|CCCV|CRCV|TRAN|LIST|SCAN|SHOR|BATT|LED)"
-        return self.query(f"Ch{self.name}:MODE?")
-    
-    @mode.setter
-    def mode(self, mode):
-        mode = mode.upper()
-        if mode in (
-            "CC",
-            "CV",
-            "CP",
-            "CR",
-            "CCCV",
-            "CRCV",
-            "TRAN",
-            "LIST",
-            "SCAN",
-            "SHOR",
-            "BATT",
-            "LED",
-        ):
-            self.write(f"Ch{self.name}:MODE {mode}")
-        else:
-            raise ValueError(
-                f"Mode must be in ['CC', 'CV', 'CP', 'CR', 'CCCV', 'CRCV', 'TRAN', 'LIST', 'SCAN', 'SHOR', 'BATT', 'LED']"
-            )
-    
-    @property
-    def Vrange(self):
-        "voltage range (high|low)"
-        return self.query(f"LOAD{self.name}:VRANGE?")
-
-    @Vrange.setter
-    def Vrange(self, Vrange):
-        if Vrange.lower() in ("high", "low"):
-            self.write(f"LOAD{self.name}:VRANge {Vrange}")
-        else:
-            raise ValueError(f"Voltage range must be 'high' or 'low'")
+    def settings(self, mode=None):
+        """read all settings of the command table that apply to `mode`
+
+        returns a dict {name: value}. Read-only values are included.
+        """
+        return {c.name: getattr(self, c.name) for c in commands(mode)}
+
+    def validate(self, config):
+        """check a configuration without sending anything
+
+        config  dict {attribute: value} as it would be set, e.g.
+                {"Crange": "low", "CC_current": 2.5, "mode": "CC"}
+
+        Ranges, sub-modes and cutoff types are taken from `config` where
+        given, else from the last values set through this object. With
+        `auto_range`, values are checked against the HIGH ranges.
+
+        Raises a ValueError listing all invalid values.
+        """
+
+        Vrange, Crange = (None, None) if self.auto_range else self._ranges()
+        ranges = (config.get("Vrange", Vrange), config.get("Crange", Crange))
+        errors = []
+        for name, value in config.items():
+            try:
+                self._validate(name, value, config, ranges)
+            except ValueError as e:
+                errors.append(str(e))
+        if errors:
+            raise ValueError("Invalid configuration:\n    " + "\n    ".join(errors))
+
+    def configure(self, config):
+        "validate `config` and set all attributes in the given order"
+
+        self.validate(config)
+        for name, value in config.items():
+            setattr(self, name, value)
+
+    def _validate(self, name, value, config, ranges):
+        if name in BY_NAME:
+            getattr(type(self), name).format(self, value, ranges)
+        elif name in _QUANTITY:
+            self._check(name, _QUANTITY[name], value, ranges)
+        elif name in ("SCAN_limits", "SCAN_start_end", "SCAN_step"):
+            quantity = MODE_QUANTITY.get(str(config.get("SCAN_submode")).upper())
+            if quantity is not None:
+                self._check(name, quantity, value, ranges)
+        elif name == "BATT_cutoff_value":
+            quantity = _CUTOFF.get(str(config.get("BATT_cutoff"))[:1].upper())
+            if quantity is not None:
+                self._check(name, quantity, value, ranges)
+        elif name == "LIST_rows":
+            for row in value:
+                if isinstance(row, dict):
+                    self._LIST_check(**row, ranges=ranges)
+                else:
+                    self._LIST_check(*row, ranges=ranges)
+        elif not isinstance(getattr(type(self), name, None), property):
+            raise ValueError(f"Unknown setting '{name}'")
+
+    def _ranges(self):
+        "voltage and current range as last set through this object"
+        return self._written.get("Vrange"), self._written.get("Crange")
+
+    def _check(self, name, quantity, value, ranges=None):
+        "check a value or a list of values against the limits of `quantity`"
+
+        Vrange, Crange = ranges or self._ranges()
+        for x in value if isinstance(value, (list, tuple)) else [value]:
+            self.limits.check(name, quantity, x, Vrange, Crange)
 
-    @property
-    def Crange(self):
-        "current range (high|low)"
-        return self.query(f"LOAD{self.name}:CRANGE?")
-
-    @Crange.setter
-    def Crange(self, Crange):
-        if Crange.lower() in ("high", "low"):
-            self.write(f"LOAD{self.name}:CRANge {Crange}")
-        else:
-            raise ValueError(f"current range must be 'high' or 'low'")
-    
     ############################################################
-    # protection
+    # auto-ranging
 
-    @property
-    def OVP(self):
-        "OVP voltage [V]"
-        return _tofloat(self.query(f"VOLT{self.name}:VMAX?"))
+    def autorange(self, V=None, I=None):
+        """select the ranges for a voltage `V` [V] and current `I` [A]
 
-    @OVP.setter
-    def OVP(self, value):
-        self.write(f"VOLT{self.name}:VMAX {value}")
+        Without arguments, the ranges are chosen from a measurement and the
+        last set values.
 
-    @property
-    def OCP(self):
-        "OCP current [A]"
-        return _tofloat(self.query(f"CURR{self.name}:IMAX?"))
+        A LOW range is left for HIGH above `range_up` of its full scale and
+        HIGH is left for LOW below `range_down` of the LOW full scale. In
+        between, the range stays as it is. The range is tracked locally, so a
+        command is only sent if the range actually changes.
 
-    @OCP.setter
-    def OCP(self, value):
-        self.write(f"CURR{self.name}:IMAX {value}")
+        returns (Vrange, Crange) as last set through this object
+        """
 
-    @property
-    def OPP(self):
-        "OPP power [W]"
-        return _tofloat(self.query(f"POWE{self.name}:PMAX?"))
+        if V is None and I is None:
+            V, I = _tofloats(self.query(self._get["read_all"]))[:2]
+            V = max(V, self._setpoints.get("V", 0))
+            I = max(I, self._setpoints.get("I", 0))
+        if V is not None:
+            self._autorange("V", V)
+        if I is not None:
+            self._autorange("I", I)
+        return self._ranges()
+
+    def _autorange(self, quantity, value):
+        "switch the range of `quantity` (V or I) if `value` requires it"
+
+        low = self.limits.bounds(quantity, "LOW", "LOW")
+        if low is None:
+            return
+        name = "Vrange" if quantity == "V" else "Crange"
+        current = self._written.get(name)
+        if current == "LOW":
+            new = "HIGH" if value > low[1] * self.range_up else "LOW"
+        else:
+            new = "LOW" if value < low[1] * self.range_down else "HIGH"
+        if new != current:
+            setattr(self, name, new)
 
-    @OPP.setter
-    def OPP(self, value):
-        self.write(f"POWE{self.name}:PMAX {value}")
+    def _setpoint_ranges(self):
+        """ranges to check set values against before `_setpoint`
 
-    @property
-    def protection(self):
-        """protection state
-
-        NONE    No protection has been triggered
-        OV      OCP triggered
-        OC      OCP triggered
-        OP      OPP triggered
-        OT      Overtemp protection triggered
-        LRV     reverse voltage protection triggered
-        FAN     Fan failure
+        With `auto_range`, the range follows the value, so only the limits of
+        the HIGH range apply (None: ranges as last set).
         """
-        return self.query(f"LOAD{self.name}:ABNO?")
+        return (None, None) if self.auto_range else None
+
+    def _setpoint(self, quantity, value):
+        "auto-range for a new set value of `quantity` (V or I), after it was checked"
+
+        if not self.auto_range:
+            return
+        try:
+            if isinstance(value, (list, tuple)):
+                value = max(float(x) for x in value)
+            else:
+                value = float(value)
+        except (TypeError, ValueError):
+            return  # reported by the check of the setting
+        self._setpoints[quantity] = value
+        self._autorange(quantity, value)
+
+    def _observe(self, quantity, value):
+        "auto-range for a measured value of `quantity` (V or I)"
+
+        if self.auto_range:
+            self._autorange(quantity, max(value, self._setpoints.get(quantity, 0)))
 
     ############################################################
     # CC mode
@@ -242,15 +315,6 @@ Mode:           {mode}
         self.CC_current = current
         self.mode = "CC"
     
-    @property
-    def CC_current(self):
-        "current value for CC mode [A]"
-        return _tofloat(self.query(f"CURR{self.name}:CC?"))
-    
-    @CC_current.setter
-    def CC_current(self, current):
-        self.write(f"CURR{self.name}:CC {current}")
-
     ############################################################
     # CV mode
 
@@ -261,15 +325,6 @@ Mode:           {mode}
         self.CV_voltage = voltage
         self.mode = "CV"
 
-    @property
-    def CV_voltage(self):
-        "voltage value for CV mode [V]"
-        return _tofloat(self.query(f"VOLT{self.name}:CV?"))
-
-    @CV_voltage.setter
-    def CV_voltage(self, voltage):
-        self.write(f"VOLT{self.name}:CV {voltage}")
-
     ############################################################
     # CP mode
 
@@ -281,15 +336,6 @@ Mode:           {mode}
             self.CP_power = power
         self.mode = "CP"
 
-    @property
-    def CP_power(self):
-        "power value for CP mode [W]"
-        return _tofloat(self.query(f"POWE{self.name}:CP?"))
-
-    @CP_power.setter
-    def CP_power(self, power):
-        self.write(f"POWE{self.name}:CP {power}")
-
     ############################################################
     # CR mode
 
@@ -298,15 +344,6 @@ Mode:           {mode}
         self.CR_resistance =resistance
         self.mode = "CR"
 
-    @property
-    def CR_resistance(self):
-        "resistance value for CR mode [Ω]"
-        return _tofloat(self.query(f"RESI{self.name}:CR?"))
-
-    @CR_resistance.setter
-    def CR_resistance(self, resistance):
-        self.write(f"RESI{self.name}:CR {resistance}")
-
     ############################################################
     # CC+CV mode
 
@@ -314,28 +351,11 @@ Mode:           {mode}
         """Put instrument into constant current and constant voltage (CC+CV) mode
         and set current, voltage"""
 
+        self.validate(dict(CCCV_current=current, CCCV_voltage=voltage))
         self.CCCV_current = current
         self.CCCV_voltage = voltage 
         self.mode = "CCCV"
 
-    @property
-    def CCCV_current(self):
-        "current value for CC+CV mode"
-        return _tofloat(self.query(f"CURR{self.name}:CCCV?"))
-
-    @CCCV_current.setter
-    def CCCV_current(self, current):
-        self.write(f"CURR{self.name}:CCCV {current}")
-
-    @property
-    def CCCV_voltage(self):
-        "voltage value for CC+CV mode [V]"
-        return _tofloat(self.query(f"VOLT{self.name}:CCCV?"))
-
-    @CCCV_voltage.setter
-    def CCCV_voltage(self, voltage):
-        self.write(f"VOLT{self.name}:CCCV {voltage}")
-
     ############################################################
     # CR+CV mode
 
@@ -343,28 +363,11 @@ Mode:           {mode}
         """Put instrument into constant resistance and constant voltage (CR+CV) mode
         and set voltage, resistance"""
 
+        self.validate(dict(CRCV_voltage=voltage, CRCV_resistance=resistance))
         self.CRCV_voltage = voltage
         self.CRCV_resistance = resistance
         self.mode = "CRCV"
 
-    @property
-    def CRCV_resistance(self):
-        "resistance value for CR+CV mode [Ohm]"
-        return _tofloat(self.query(f"RESI{self.name}:CRCV?"))
-
-    @CRCV_resistance.setter
-    def CRCV_resistance(self, resistance):
-        self.write(f"RESI{self.name}:CRCV {resistance}")
-
-    @property
-    def CRCV_voltage(self):
-        "voltage value for CR+CV mode [V]"
-        return _tofloat(self.query(f"VOLT{self.name}:CRCV?"))
-
-    @CRCV_voltage.setter
-    def CRCV_voltage(self, voltage):
-        self.write(f"VOLT{self.name}:CRCV {voltage}")
-
     ############################################################
     # short mode
     def SHORT_mode(self):
@@ -377,43 +380,12 @@ Mode:           {mode}
     def LED_mode(self, V, I, coef):
         "Configure LED mode"
 
-        self.LED.voltage = V
-        self.LED.current = I
+        self.validate(dict(LED_voltage=V, LED_current=I, LED_coefficient=coef))
+        self.LED_voltage = V
+        self.LED_current = I
         self.LED_coefficient = coef
         self.mode = "LED"
 
-    @property
-    def LED_voltage(self):
-        "V0 voltage value for LED mode"
-        return _tofloat(self.query(f"VOLT{self.name}:LED?"))
-
-    @LED_voltage.setter
-    def LED_voltage(self, value):
-        self.write(f"VOLT{self.name}:LED {value}")
-
-    @property
-    def LED_current(self):
-        "I_0 current value for LED mode"
-        return _tofloat(self.query(f"CURR{self.name}:LED?"))
-
-    @LED_current.setter
-    def LED_current(self, value):
-        self.write(f"CURR{self.name}:LED {value}")
-
-    @property
-    def LED_coefficient(self):
-        """coefficient for LED mode
-
-        Used in determining the behaviour of the led simulation:
-        Rd = (Vo / Io) * Coeff
-        Vf = Vo * (1 - Coeff)
-        """
-        return _tofloat(self.query(f"LED{self.name}:COEF?"))
-
-    @LED_coefficient.setter
-    def LED_coefficient(self):
-        self.write(f"LED{self.name}:COEF {value}")
-
     ############################################################
     # battery mode
 
@@ -467,6 +439,13 @@ Mode:           {mode}
                         1      1.0         10.0,       1.0A if V > 10.0V then off
         """
 
+        config = dict(BATT_cutoff=cutoff, BATT_cutoff_value=cutoff_value)
+        if mode.upper() == "CC":
+            config["BATT_current"] = value
+        elif mode.upper() == "CR":
+            config["BATT_resistance"] = value
+        self.validate(config)
+
         self.BATT_submode = mode
         self.BATT_cutoff = cutoff
         match mode.upper():
@@ -506,6 +485,8 @@ Mode:           {mode}
 
     @BATT_current.setter
     def BATT_current(self, current):
+        self._check("BATT_current", "I", current, self._setpoint_ranges())
+        self._setpoint("I", current)
         if self.BATT_cutoff== "Voltage":
             current = _value_extend(current, 3)
             self.write(f"CURR{self.name}:BCC1 {current[0]}")
@@ -514,35 +495,6 @@ Mode:           {mode}
         else:
             self.write(f"CURR{self.name}:BCC {current}")
 
-    @property
-    def BATT_resistance(self):
-        "BATTERY mode CR resistance"
-        return _tofloat(self.query(f"RESI{self.name}:BCR?"))
-
-    @BATT_resistance.setter
-    def BATT_resistance(self, resistance):
-        self.write(f"RESI{self.name}:BCR {resistance}")
-
-    @property
-    def BATT_cutoff(self):
-        """BATTERY mode cutoff type
-
-        Uses single letters for setting but will return
-        words:
-
-        set get
-        ---------------
-        V   Voltage [V]
-        T   Time [s]
-        E   Energy [Wh]
-        C   Capacity [Ah]
-        """
-        return self.query(f"BATT{self.name}:BCUT?")
-
-    @BATT_cutoff.setter
-    def BATT_cutoff(self, cutoff):
-        self.write(f"BATT{self.name}:BCUT {cutoff}")
-
     @property
     def BATT_cutoff_value(self):
         "BATTERY mode cutoff value"
@@ -568,7 +520,10 @@ Mode:           {mode}
 
     @BATT_cutoff_value.setter
     def BATT_cutoff_value(self, value):
-        match self.BATT_cutoff:
+        cutoff = self.BATT_cutoff
+        if cutoff in ("Voltage", "Time", "Capacity", "Energy"):
+            self._check("BATT_cutoff_value", _CUTOFF[cutoff[0]], value)
+        match cutoff:
             case "Voltage":
                 value = _value_extend(value, 3)
                 self.write(f"VOLT{self.name}:BCC1 {value[0]}")
@@ -581,31 +536,6 @@ Mode:           {mode}
             case "Energy":
                 self.write(f"BATT{self.name}:BTE {value}")
 
-    @property
-    def BATT_capacity(self):
-        "battery discharge capacity value [Ah]"
-        return _tofloat(self.query(f"BATT{self.name}:CAPA?"))
-
-    @property
-    def BATT_energy(self):
-        "battery discharge energy value [Wh]"
-        return _tofloat(self.query(f"BATT{self.name}:ENER?"))
-
-    @property
-    def BATT_cutoff_level(self):
-        """Battery cutoff level (1|2|3)
-
-        only works in CC mode with voltage cutoff.
-        Will force the 1st/2nd/3rd cutoff level without requiring
-        the voltage to drop to the respective cutoff value.
-        Level 3 is the default state!
-        """
-        return _toint(self.query(f"BATT{self.name}:BAEN?"))
-
-    @BATT_cutoff_level.setter
-    def BATT_cutoff_level(self, level):
-        self.write(f"BATT{self.name}:BAEN {level}")
-
     ############################################################
     # transient mode
 
@@ -622,6 +552,13 @@ Mode:           {mode}
         width:      Pulse width for the two states [s]
         """
 
+        config = dict(TRANSIENT_submode=mode, TRANSIENT_width=width)
+        if mode.upper() == "CC":
+            config["TRANSIENT_current"] = value
+        elif mode.upper() == "CV":
+            config["TRANSIENT_voltage"] = value
+        self.validate(config)
+
         self.TRANSIENT_submode = mode.upper()
         self.TRANSIENT_trigmode = trigmode
         match mode.upper():
@@ -634,19 +571,6 @@ Mode:           {mode}
         self.TRANSIENT_width = width
         self.mode = "TRAN"
 
-    @property
-    def TRANSIENT_submode(self):
-        "TRANSIENT sub-mode (CC|CV)"
-        return self.query(f"TRAN{self.name}:STATE?")
-
-    @TRANSIENT_submode.setter
-    def TRANSIENT_submode(self, mode):
-        mode = mode.upper()
-        if mode in ["CC", "CV"]:
-            self.write(f"TRAN{self.name}:STATE {mode}")
-        else:
-            raise ValueError(f"Invalid TRANSIENT sub-mode '{mode}'.")
-
     @property
     def TRANSIENT_trigmode(self):
         "TRANSIENT sub-mode (COUT||CONT|PULS|TRIG)"
@@ -675,6 +599,8 @@ Mode:           {mode}
     @TRANSIENT_current.setter
     def TRANSIENT_current(self, current):
         if isinstance(current, (list, tuple)) and (len(current) == 2):
+            self._check("TRANSIENT_current", "I", current, self._setpoint_ranges())
+            self._setpoint("I", current)
             self.write(f"CURR{self.name}:TA {current[0]}")
             self.write(f"CURR{self.name}:TB {current[1]}")
         else:
@@ -693,6 +619,8 @@ Mode:           {mode}
     @TRANSIENT_voltage.setter
     def TRANSIENT_voltage(self, voltage):
         if isinstance(voltage, (list, tuple)) and len(voltage) == 2:
+            self._check("TRANSIENT_voltage", "V", voltage, self._setpoint_ranges())
+            self._setpoint("V", voltage)
             self.write(f"VOLT{self.name}:TA {voltage[0]}")
             self.write(f"VOLT{self.name}:TB {voltage[1]}")
         else:
@@ -711,6 +639,7 @@ Mode:           {mode}
     @TRANSIENT_width.setter
     def TRANSIENT_width(self, width):
         if isinstance(width, (list, tuple)) and len(width) == 2:
+            self._check("TRANSIENT_width", "TRANSIENT_width", width)
             self.write(f"TIME{self.name}:WA {width[0]}")
             self.write(f"TIME{self.name}:WB {width[1]}")
         else:
@@ -735,20 +664,11 @@ Mode:           {mode}
             minval  lower limit for value
         """
 
+        self.validate(dict(LIST_stepmode=stepmode, LIST_rows=params))
         self.LIST_stepmode = stepmode
         self.LIST_rows = params
         self.mode = "LIST"
 
-    @property
-    def LIST_stepmode(self):
-        "LIST step mode {AUTO|TRIGGER}"
-        return self.query(f"LIST{self.name}:MODE?")
-
-    @LIST_stepmode.setter
-    def LIST_stepmode(self, stepmode):
-        "LIST step mode {AUTO|TRIGGER}"
-        self.write(f"LIST{self.name}:MODE {stepmode.upper()}")
-
     @property
     def LIST_rows(self):
         """LIST mode parameters
@@ -799,6 +719,7 @@ Mode:           {mode}
     @LIST_rows.setter
     def LIST_rows(self, params):
         if params is not None:
+            self.validate(dict(LIST_rows=params))
             for row in params:
                 if isinstance(row, (list, tuple)):
                     self._LIST_row(*row)
@@ -812,6 +733,7 @@ Mode:           {mode}
     def _LIST_row(self, num, mode, value, delay, comp, maxval, minval):
         "set a single paramter row in the LIST"
 
+        self._LIST_check(num, mode, value, delay, comp, maxval, minval)
         mode = {"CC": 0, "CV": 1, "CP": 2, "CR": 3, "OPEN": 4, "SHORT": 5}[mode.upper()]
         comp = {"OFF": 0, "CURRENT": 1, "VOLTAGE": 2, "POWER": 3, "RESISTANCE": 4}[
             comp.upper()
@@ -821,23 +743,20 @@ Mode:           {mode}
         )
         self.write(f"LIST{self.name}:PARA {params}")
 
-    @property
-    def LIST_loop(self):
-        "loop state {ON|OFF}"
-        return self.query(f"LIST{self.name}:LOOP?")
-
-    @LIST_loop.setter
-    def LIST_loop(self, state):
-        self.write(f"LIST{self.name}:LOOP {state.upper()}")
-
-    @property
-    def LIST_steps(self):
-        "number of steps to execute"
-        return _toint(self.query(f"LIST{self.name}:NUM?"))
-
-    @LIST_steps.setter
-    def LIST_steps(self, steps):
-        self.write(f"LIST{self.name}:NUM {steps}")
+    def _LIST_check(self, num, mode, value, delay, comp, maxval, minval, ranges=None):
+        "check a single parameter row of the LIST"
+
+        if mode.upper() not in ("CC", "CV", "CP", "CR", "OPEN", "SHORT"):
+            raise ValueError(f"Invalid LIST mode '{mode}'")
+        if comp.upper() not in ("OFF", "CURRENT", "VOLTAGE", "POWER", "RESISTANCE"):
+            raise ValueError(f"Invalid LIST comparison '{comp}'")
+        self._check("LIST row num", "LIST_num", num, ranges)
+        self._check(f"LIST row {num} delay", "LIST_delay", delay, ranges)
+        if mode.upper() in ("CC", "CV", "CP", "CR"):
+            self._check(f"LIST row {num} value", MODE_QUANTITY[mode.upper()], value, ranges)
+        if comp.upper() != "OFF":
+            quantity = {"CURRENT": "I", "VOLTAGE": "V", "POWER": "P", "RESISTANCE": "R"}[comp.upper()]
+            self._check(f"LIST row {num} limits", quantity, (minval, maxval), ranges)
 
     def LIST_result(self):
         "return the final result after the list has finisehd {pass|fail}"
@@ -892,6 +811,16 @@ Mode:           {mode}
         shown on the display, 
         """
 
+        self.validate(
+            dict(
+                SCAN_submode=mode,
+                SCAN_threshold_value=threshold_value,
+                SCAN_limits=limits,
+                SCAN_start_end=start_end,
+                SCAN_step=step,
+                SCAN_stepdelay=step_time,
+            )
+        )
         self.SCAN_submode = mode
         self.SCAN_threshold = threshold
         self.SCAN_threshold_value = threshold_value
@@ -902,24 +831,6 @@ Mode:           {mode}
         self.SCAN_stepdelay = step_time
         self.mode = "SCAN"
 
-    @property
-    def SCAN_submode(self):
-        "scan mode {CC|CV|CP}"
-        return self.query(f"SCAN{self.name}:TYPE?")
-
-    @SCAN_submode.setter
-    def SCAN_submode(self, mode):
-        self.write(f"SCAN{self.name}:TYPE {mode}")
-
-    @property
-    def SCAN_threshold(self):
-        "Scan threshold type {VTH|DROP|VMIN}"
-        return self.query(f"SCAN{self.name}:THTYPE?")
-
-    @SCAN_threshold.setter
-    def SCAN_threshold(self, threshold):
-        self.write(f"SCAN{self.name}:THTYPE {threshold.upper()}")
-
     @property
     def SCAN_threshold_value(self):
         """scan votage threshold value}
@@ -934,6 +845,7 @@ Mode:           {mode}
 
     @SCAN_threshold_value.setter
     def SCAN_threshold_value(self, value):
+        self._check("SCAN_threshold_value", "V", value)
         match self.SCAN_threshold:
             case "VTH":
                 self.write(f"VOLT{self.name}:VTH {value}")
@@ -942,15 +854,6 @@ Mode:           {mode}
             case "DROP":
                 pass
 
-    @property
-    def SCAN_compare(self):
-        "comparison type {INCURR|INVOLT|INPOW|OFF}"
-        return self.query(f"SCAN{self.name}:COMPARE?")
-
-    @SCAN_compare.setter
-    def SCAN_compare(self, compare):
-        self.write(f"SCAN{self.name}:COMPARE {compare.upper()}")
-
     @property
     def SCAN_limits(self):
         """upper and lower limit for SCAN mode
@@ -976,7 +879,10 @@ Mode:           {mode}
     @SCAN_limits.setter
     def SCAN_limits(self, value):
         low, high = value
-        match self.SCAN_submode:
+        submode = self.SCAN_submode
+        if submode in MODE_QUANTITY:
+            self._check("SCAN_limits", MODE_QUANTITY[submode], value)
+        match submode:
             case "CC":
                 self.write(f"CURR{self.name}:LOW {low}")
                 self.write(f"CURR{self.name}:HIGH {high}")
@@ -1013,8 +919,10 @@ Mode:           {mode}
     @SCAN_start_end.setter
     def SCAN_start_end(self, value):
         start, end = value
-        
-        match self.SCAN_submode:
+        submode = self.SCAN_submode
+        if submode in MODE_QUANTITY:
+            self._check("SCAN_start_end", MODE_QUANTITY[submode], value)
+        match submode:
             case "CC":
                 self.write(f"CURR{self.name}:START {start}")
                 self.write(f"CURR{self.name}:END {end}")
@@ -1041,7 +949,10 @@ Mode:           {mode}
 
     @SCAN_step.setter
     def SCAN_step(self, value):
-        match self.SCAN_submode:
+        submode = self.SCAN_submode
+        if submode in MODE_QUANTITY:
+            self._check("SCAN_step", MODE_QUANTITY[submode], value)
+        match submode:
             case "CC":
                 self.write(f"CURR{self.name}:STEP {value}")
             case "CV":
@@ -1049,14 +960,14 @@ Mode:           {mode}
             case "CP":
                 self.write(f"POWE{self.name}:STEP {value}")
 
-    @property
-    def SCAN_stepdelay(self):
-        "step delay [s] for SCAN mode"
-        return _toint(self.query(f"TIME{self.name}:STEP?"))
+    def IV_sweep(self, start, end, mode="CC", **kwargs):
+        """Host-side I-V sweep with adaptive step size
 
-    @SCAN_stepdelay.setter
-    def SCAN_stepdelay(self, time):
-        self.write(f"TIME{self.name}:STEP {time}")
+        Unlike SCAN mode, this returns the measured curve as a dict of NumPy
+        arrays (`set`, `V`, `I`, `P`, `R`). See `ET54.sweep.IV_sweep` for all
+        options.
+        """
+        return IV_sweep(self, start, end, mode, **kwargs)
 
     ############################################################
     # Qualifiction test mode
@@ -1071,6 +982,7 @@ Mode:           {mode}
         This mode can be used in conjunction with the basic modes 
         CC, CV, CR and CP.
         """
+        self.validate(dict(QUALI_Vrange=Vrange, QUALI_Crange=Crange, QUALI_Prange=Prange))
         self.QUALI_Vrange = Vrange
         self.QUALI_Crange = Crange
         self.QUALI_Prange = Prange
@@ -1083,13 +995,8 @@ Mode:           {mode}
 
     @QUALI_state.setter
     def QUALI_state(self, state):
-        self.query(f"QUAL{self.name}:TEST {state}")
+        self.write(f"QUAL{self.name}:TEST {state}")
     
-    @property
-    def QUALI_result(self):
-        "Result qualification test {NONE|PASS|FAIL}"
-        return self.query(f"QUAL{self.name}:OUT?")
-
     @property
     def QUALI_Vrange(self):
         "Voltage range for qualification test (Vlow, Vhigh) [V]"
@@ -1100,6 +1007,7 @@ Mode:           {mode}
 
     @QUALI_Vrange.setter    
     def QUALI_Vrange(self, value):
+            self._check("QUALI_Vrange", "V", value)
             self.write(f"QUAL{self.name}:VLOW {value[0]}")
             self.write(f"QUAL{self.name}:VHIGH {value[1]}")
 
@@ -1113,6 +1021,7 @@ Mode:           {mode}
 
     @QUALI_Crange.setter    
     def QUALI_Crange(self, value):
+            self._check("QUALI_Crange", "I", value)
             self.write(f"QUAL{self.name}:CLOW {value[0]}")
             self.write(f"QUAL{self.name}:CHIGH {value[1]}")
 
@@ -1126,37 +1035,26 @@ Mode:           {mode}
 
     @QUALI_Prange.setter    
     def QUALI_Prange(self, value):
+            self._check("QUALI_Prange", "P", value)
             self.write(f"QUAL{self.name}:PLOW {value[0]}")
             self.write(f"QUAL{self.name}:PHIGH {value[1]}")
 
-
-
     ############################################################
     # Load effect test
 
-    # XXX: to be implemented
+    def load_effect(self, currents, **kwargs):
+        """Load effect (load regulation) test of the source
 
+        Steps the CC current through `currents`, waits for the voltage to
+        settle at every point and returns the voltage statistics and
+        regulation figures as a dict. See `ET54.loadeffect.load_effect` for
+        all options.
+        """
+        return load_effect(self, currents, **kwargs)
 
     ############################################################
     # Trigger support
 
-    @property
-    def trigger_mode(self):
-        """trigger mode (MAN|EXT|TRG)
-
-        MAN:    manual trigger (TRIG button)
-        EXT:    external trigger (connector on back)
-        TRG:    remote trigger (trigger() method)
-        """
-        return self.query(f"LOAD{self.name}:TRIG?")
-
-    @trigger_mode.setter
-    def trigger_mode(self, trigmode):
-        if trigmode.upper() in ("MAN", "EXT", "TRG"):
-            self.write(f"LOAD{self.name}:TRIG {trigmode}")
-        else:
-            raise ValueError(f"invalid trigger mode '{trigmode}'.")
-
     def trigger(self):
         "send trigger event"
         self.write(f"*TRG")
@@ -1166,22 +1064,225 @@ Mode:           {mode}
 
     def read_voltage(self):
         "read (measure) input voltage [V]"
-        return _tofloat(self.query(f"MEAS{self.name}:VOLTAGE?"))
+        V = _tofloat(self.query(self._get["read_voltage"]))
+        self._observe("V", V)
+        return V
 
     def read_current(self):
         "read (measure) input current [A]"
-        return _tofloat(self.query(f"MEAS{self.name}:CURRENT?"))
+        I = _tofloat(self.query(self._get["read_current"]))
+        self._observe("I", I)
+        return I
 
     def read_power(self):
         "read (measure) input power [W]"
-        return _tofloat(self.query(f"MEAS{self.name}:POWER?"))
+        return _tofloat(self.query(self._get["read_power"]))
 
     def read_resistance(self):
         "read (measure) resistance [W]"
-        return _tofloat(self.query(f"MEAS{self.name}:RESISTANCE?"))
+        return _tofloat(self.query(self._get["read_resistance"]))
+
+    def read_all(self, timed=False):
+        """read (measure) output values: Volts [V], current [A], Power[W] Resistance[Ω]
+
+        With `timed`, returns (values, (t_send, t_mid, t_recv)), see
+        `ET54.query`.
+        """
+        if timed:
+            ret, timing = self.query(self._get["read_all"], timed=True)
+        else:
+            ret = self.query(self._get["read_all"])
+        values = _tofloats(ret)
+        if self.auto_range:
+            self._observe("V", values[0])
+            self._observe("I", values[1])
+        return (values, timing) if timed else values
+
+    def acquire(self, n, quantities=("V", "I"), gap=None):
+        """burst acquisition of `n` samples
+
+        quantities  measured quantities, any of V, I, P, R
+        gap         pause between two samples [s] (default: pacing delay of
+                    the connection)
+
+        Runs a tight loop of one query per sample (`MEAS:ALL?` for several
+        quantities) and parses all answers after the last one. Other
+        commands have to wait until the burst is done.
+
+        returns a dict with NumPy arrays `t` (`time.monotonic()` scale) and
+        one per quantity, the achieved `rate` [samples/s] and the `jitter`
+        (standard deviation of the sample interval) [s]
+        """
+
+        quantities = [q.upper() for q in quantities]
+        for q in quantities:
+            if q not in ("V", "I", "P", "R"):
+                raise ValueError(f"Unknown quantity '{q}'")
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        if len(quantities) == 1:
+            command = self._get[_READ[quantities[0]]]
+            columns = [0]
+            width = 1
+        else:
+            command = self._get["read_all"]
+            columns = ["VIPR".index(q) for q in quantities]
+            width = 4
+
+        if self.burst is not None:
+            answers, t = self.burst(command, n, gap)
+        else:
+            answers, t = [], np.empty(n)
+            for i in range(n):
+                t0 = time.monotonic()
+                answers.append(self.query(command).encode())
+                t[i] = (t0 + time.monotonic()) / 2
+                if gap:
+                    time.sleep(gap)
+
+        data = b" ".join(answers)
+        if any(not a.startswith(b"R") or a.startswith((b"Rexecu", b"Rcmd")) for a in answers):
+            raise RuntimeError(f"Unexpected response in burst of '{command}'")
+        values = np.array(data.replace(b"R", b"").split(), dtype=float)
+        if len(values) != n * width:
+            raise RuntimeError(f"Unexpected number of values in burst of '{command}'")
+        values = values.reshape(n, width)
+
+        ret = {"t": t}
+        for q, k in zip(quantities, columns):
+            ret[q] = values[:, k]
+        dt = np.diff(t)
+        ret["rate"] = (n - 1) / (t[-1] - t[0]) if n > 1 and t[-1] > t[0] else float("nan")
+        ret["jitter"] = dt.std() if n > 2 else float("nan")
+        return ret
+
+    def wait_settled(self, quantity="I", tolerance=0.01, window=5, timeout=10, interval=0):
+        """wait until a measured quantity is stable
 
-    def read_all(self):
-        "read (measure) output values: Volts [V], current [A], Power[W] Resistance[Ω]"
-        return _tofloats(self.query(f"MEAS{self.name}:ALL?"))
+        quantity    V, I, P or R
+        tolerance   allowed spread of the last `window` samples [V|A|W|Ω]
+        window      number of samples that must be stable
+        timeout     give up after this time [s]
+        interval    minimum time between two samples [s]
 
+        Samples `read_all()` until the last `window` values lie within
+        `tolerance` and their trend (least squares slope) accounts for less
+        than half of it over the window.
+
+        returns (settle time [s], mean of the stable window). The settle
+        time is measured from the call to the first sample of the window.
+        Raises RuntimeError if the value does not settle within `timeout`.
+        """
 
+        k = "VIPR".index(quantity.upper())
+        t0 = time.monotonic()
+        ts, xs = [], []
+        while True:
+            t = time.monotonic()
+            x = self.read_all()[k]
+            ts.append((t + time.monotonic()) / 2 - t0)
+            xs.append(x)
+            if len(xs) >= window:
+                ts, xs = ts[-window:], xs[-window:]
+                if _stable(ts, xs, tolerance):
+                    return ts[0], sum(xs) / window
+            if time.monotonic() - t0 > timeout:
+                raise RuntimeError(
+                    f"{quantity} did not settle within {timeout} s (last values: {xs})"
+                )
+            if interval:
+                time.sleep(max(0, interval - (time.monotonic() - t)))
+
+
+class _setting:
+    "channel property generated from a command table entry"
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.name = cmd.name
+        self.parse = PARSERS[cmd.type]
+        self.__doc__ = cmd.doc
+
+    def __get__(self, ch, owner=None):
+        if ch is None:
+            return self
+        return self.parse(ch.query(ch._get[self.name]))
+
+    def __set__(self, ch, value):
+        if self.cmd.readonly:
+            raise AttributeError(f"'{self.name}' is read-only")
+        if self.name in _SETPOINTS:
+            # check first, so an invalid value does not switch the range
+            value = self.format(ch, value, ch._setpoint_ranges())
+            ch._setpoint(_SETPOINTS[self.name], value)
+        else:
+            value = self.format(ch, value)
+        ch.write(ch._set[self.name] + value)
+        ch._written[self.name] = value
+
+    def format(self, ch, value, ranges=None):
+        "check `value` and format it for the command"
+
+        cmd = self.cmd
+        if cmd.type is str:
+            value = str(value).upper()
+            if cmd.range is not None and value not in cmd.range:
+                raise ValueError(f"{cmd.name} must be in {list(cmd.range)}, not '{value}'")
+            return value
+        try:
+            value = cmd.type(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for {cmd.name}: '{value}'")
+        if cmd.range is not None and not cmd.range[0] <= value <= cmd.range[1]:
+            raise ValueError(
+                f"{cmd.name} must be between {cmd.range[0]} and {cmd.range[1]}, not {value}"
+            )
+        quantity = cmd.name if cmd.name in ("OVP", "OCP", "OPP") else UNITS.get(cmd.unit)
+        if cmd.range is None and quantity is not None:
+            ch._check(cmd.name, quantity, value, ranges)
+        return str(value)
+
+
+def _stable(ts, xs, tolerance):
+    "spread of xs within tolerance and least squares trend below half of it"
+
+    if max(xs) - min(xs) > tolerance:
+        return False
+    n = len(ts)
+    tm, xm = sum(ts) / n, sum(xs) / n
+    var = sum((t - tm) ** 2 for t in ts)
+    if var == 0:
+        return True
+    slope = sum((t - tm) * (x - xm) for t, x in zip(ts, xs)) / var
+    return abs(slope * (ts[-1] - ts[0])) < tolerance / 2
+
+
+# measurement of a single quantity
+_READ = {"V": "read_voltage", "I": "read_current", "P": "read_power", "R": "read_resistance"}
+
+# limits of the hand-written settings
+_QUANTITY = {
+    "BATT_current": "I",
+    "TRANSIENT_current": "I",
+    "TRANSIENT_voltage": "V",
+    "TRANSIENT_width": "TRANSIENT_width",
+    "SCAN_threshold_value": "V",
+    "QUALI_Vrange": "V",
+    "QUALI_Crange": "I",
+    "QUALI_Prange": "P",
+}
+
+# set values that select a range when auto-ranging
+_SETPOINTS = {
+    c.name: UNITS[c.unit]
+    for c in COMMANDS
+    if c.unit in ("V", "A") and c.name not in ("OVP", "OCP") and not c.readonly
+}
+
+# limits of BATT_cutoff_value by (first letter of) the cutoff type
+_CUTOFF = {"V": "V", "T": "BATT_time", "E": "BATT_energy", "C": "BATT_capacity"}
+
+
+for _cmd in COMMANDS:
+    setattr(channel, _cmd.name, _setting(_cmd))
+del _cmd
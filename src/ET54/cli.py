@@ -0,0 +1,237 @@
+"""Command line interface for ET54 electronic loads
+
+    et54 status
+    et54 set CC_current 1.5
+    et54 measure
+    et54 log --interval 1
+    et54 off
+
+If a proxy daemon (`et54 serve` or `python -m ET54.server`) is running for
+the device, the commands are sent to it instead of opening the serial port.
+This skips connection setup and identification, which makes the tool cheap
+to call from shell loops.
+"""
+
+import os, sys, json, time, socket, argparse
+
+from .server import session_file
+
+
+class _remote:
+    "talk to a running proxy daemon"
+
+    def __init__(self, host, port, timeout=10):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.fh = self.sock.makefile("rw")
+
+    def request(self, line):
+        self.fh.write(line + "\n")
+        self.fh.flush()
+        reply = self.fh.readline().rstrip("\n")
+        if reply == "OK":
+            return None
+        if reply.startswith("OK "):
+            return json.loads(reply[3:])
+        raise RuntimeError(reply[4:] if reply.startswith("ERR ") else reply)
+
+    def status(self):
+        idn = self.request("IDN")
+        state = self.request("STATE")
+        samples = self.request("SAMPLE")
+        return idn, state, samples
+
+    def measure(self, ch):
+        "latest sample of the daemon's acquisition (no extra serial traffic)"
+        s = self.request(f"SAMPLE {ch}")
+        if s is None:  # no sample yet
+            return self.request(f"GET {ch} read_all")
+        return s["V"], s["I"], s["P"], s["R"]
+
+    def set(self, ch, attribute, value):
+        self.request(f"SET {ch} {attribute} {value}")
+
+    def get(self, ch, attribute):
+        return self.request(f"GET {ch} {attribute}")
+
+    def on(self, ch):
+        self.request(f"ON {ch or ''}".strip())
+
+    def off(self, ch):
+        self.request(f"OFF {ch or ''}".strip())
+
+    def samples(self, ch, interval):
+        """stream samples from the daemon's acquisition
+
+        The stream is decimated to one sample per channel and `interval`. It
+        cannot be faster than the daemon's acquisition interval.
+        """
+        self.request("SUBSCRIBE")
+        due = {}
+        for line in self.fh:
+            s = json.loads(line)
+            if ch is not None and s["channel"] != ch:
+                continue
+            t = s["t"]
+            # small tolerance for the jitter of the acquisition
+            if t < due.get(s["channel"], t) - interval / 10:
+                continue
+            next_due = due.get(s["channel"], t) + interval
+            due[s["channel"]] = next_due if next_due > t else t + interval
+            yield s
+
+
+class _local:
+    "open the serial port directly"
+
+    def __init__(self, RID, model):
+        from .instrument import ET54
+
+        self.el = ET54(RID, model=model)
+
+    def channel(self, ch):
+        for c in self.el.Channels:
+            if c.name == ch:
+                return c
+        raise ValueError(f"No channel '{ch}'")
+
+    def status(self):
+        state = {}
+        samples = {}
+        for c in self.el.Channels:
+            state[c.name] = dict(input=c.input, mode=c.mode, protection=c.protection)
+            V, I, P, R = c.read_all()
+            samples[c.name] = dict(channel=c.name, V=V, I=I, P=P, R=R)
+        return self.el.idn, state, samples
+
+    def measure(self, ch):
+        return self.channel(ch).read_all()
+
+    def set(self, ch, attribute, value):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        setattr(self.channel(ch), attribute, value)
+
+    def get(self, ch, attribute):
+        return getattr(self.channel(ch), attribute)
+
+    def on(self, ch):
+        self.channel(ch).on() if ch else self.el.on()
+
+    def off(self, ch):
+        self.channel(ch).off() if ch else self.el.off()
+
+    def samples(self, ch, interval):
+        channels = self.el.Channels if ch is None else [self.channel(ch)]
+        t_next = time.monotonic()
+        while True:
+            for c in channels:
+                V, I, P, R = c.read_all()
+                yield dict(t=time.monotonic(), channel=c.name, V=V, I=I, P=P, R=R)
+            t_next += interval
+            time.sleep(max(0, t_next - time.monotonic()))
+
+
+def _RID(device):
+    "turn a device path into a pyvisa resource ID"
+    return device if "::" in device else f"ASRL{device}::INSTR"
+
+
+def connect(RID, model=None, reuse=True):
+    "connect to a running daemon for `RID` if there is one, else open the port"
+
+    if reuse:
+        try:
+            with open(session_file(RID)) as fh:
+                session = json.load(fh)
+            return _remote(session["host"], session["port"])
+        except (OSError, ValueError, KeyError):
+            pass
+    return _local(RID, model)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="et54", description="Remote control ET54 series electronic loads."
+    )
+    parser.add_argument(
+        "-d", "--device",
+        default=os.environ.get("ET54_DEVICE", "/dev/ttyUSB0"),
+        help="serial device or pyvisa resource ID (default: $ET54_DEVICE or /dev/ttyUSB0)",
+    )
+    parser.add_argument("-c", "--channel", default=None, help="channel (1|2)")
+    parser.add_argument("--model", default=None, help="model ID if *IDN? is not valid")
+    parser.add_argument(
+        "--no-session", action="store_true", help="do not reuse a running daemon"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="show device and channel status")
+    p = sub.add_parser("set", help="set a channel attribute, e.g. CC_current 1.5")
+    p.add_argument("attribute")
+    p.add_argument("value")
+    p = sub.add_parser("get", help="read a channel attribute, e.g. CC_current")
+    p.add_argument("attribute")
+    sub.add_parser("measure", help="measure V, I, P, R")
+    p = sub.add_parser("log", help="log measurements as CSV until interrupted")
+    p.add_argument("-i", "--interval", type=float, default=1.0, help="interval [s]")
+    p.add_argument("-n", "--count", type=int, default=None, help="number of samples")
+    sub.add_parser("on", help="turn input(s) on")
+    sub.add_parser("off", help="turn input(s) off")
+    p = sub.add_parser("serve", help="run a proxy daemon for the device")
+    p.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    p.add_argument("--port", type=int, default=5054, help="TCP port")
+    p.add_argument("-i", "--interval", type=float, default=1.0, help="acquisition interval [s]")
+    args = parser.parse_args(argv)
+
+    RID = _RID(args.device)
+    if args.command == "serve":
+        from .server import serve
+
+        serve(RID, args.host, args.port, args.interval, model=args.model)
+        return
+
+    try:
+        load = connect(RID, args.model, reuse=not args.no_session)
+        ch = args.channel
+        match args.command:
+            case "status":
+                idn, state, samples = load.status()
+                print(f"Model:     {idn['model']}")
+                print(f"Serial:    {idn['SN']}")
+                print(f"Firmware:  {idn['firmware']}")
+                print(f"Hardware:  {idn['hardware']}")
+                for name in sorted(set(state) | set(samples)):
+                    print(f"\nChannel {name}")
+                    for field, value in state.get(name, {}).items():
+                        print(f"{field + ':':<11}{value}")
+                    s = samples.get(name)
+                    if s:
+                        print(f"V, I, P, R: {s['V']}, {s['I']}, {s['P']}, {s['R']}")
+            case "set":
+                load.set(ch or "1", args.attribute, args.value)
+            case "get":
+                print(load.get(ch or "1", args.attribute))
+            case "measure":
+                print(", ".join(str(x) for x in load.measure(ch or "1")))
+            case "log":
+                print("t, channel, V, I, P, R")
+                t0 = None
+                for n, s in enumerate(load.samples(ch, args.interval)):
+                    if args.count is not None and n >= args.count:
+                        break
+                    t0 = s["t"] if t0 is None else t0
+                    print(f"{s['t'] - t0:.3f}, {s['channel']}, {s['V']}, {s['I']}, {s['P']}, {s['R']}",
+                          flush=True)
+            case "on":
+                load.on(ch)
+            case "off":
+                load.off(ch)
+    except KeyboardInterrupt:
+        pass
+    except (RuntimeError, ValueError, OSError) as e:
+        sys.exit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Declarative table of channel commands
+
+Every simple channel setting (one SCPI command, one value) is described by
+one `command` entry. `channel` turns the entries into properties and
+formats the command strings for its channel number once, when the channel
+is created.
+
+Settings that span several commands (e.g. `TRANSIENT_current`) or depend on
+other settings (e.g. `BATT_cutoff_value`) are written by hand in
+`channel.py`.
+"""
+
+from collections import namedtuple
+
+from ._support_functions import _toint, _tofloat
+
+command = namedtuple(
+    "command",
+    ("name", "stem", "type", "unit", "range", "mode", "readonly", "doc"),
+)
+command.__doc__ = """One channel setting
+
+name        attribute name of the setting in `channel`
+stem        SCPI command without `?` or value; `{}` is the channel number
+type        float, int or str
+unit        unit of the value or None
+range       (min, max) for numbers, tuple of valid values for strings or
+            None if not checked
+mode        channel mode the setting belongs to or None if it applies to
+            all modes
+readonly    True for settings that can only be queried
+doc         docstring of the property
+"""
+
+
+def _tostr(value):
+    return value
+
+
+PARSERS = {float: _tofloat, int: _toint, str: _tostr}
+
+MODES = ("CC", "CV", "CP", "CR", "CCCV", "CRCV", "TRAN", "LIST", "SCAN", "SHOR", "BATT", "LED")
+
+# fmt: off
+COMMANDS = (
+    # mode and ranges
+    command("mode", "Ch{}:MODE", str, None, MODES, None, False,
+            "channel mode (CC|CV|CP|CR|CCCV|CRCV|TRAN|LIST|SCAN|SHOR|BATT|LED)"),
+    command("Vrange", "LOAD{}:VRANGE", str, None, ("HIGH", "LOW"), None, False,
+            "voltage range (high|low)"),
+    command("Crange", "LOAD{}:CRANGE", str, None, ("HIGH", "LOW"), None, False,
+            "current range (high|low)"),
+    command("trigger_mode", "LOAD{}:TRIG", str, None, ("MAN", "EXT", "TRG"), None, False,
+            """trigger mode (MAN|EXT|TRG)
+
+        MAN:    manual trigger (TRIG button)
+        EXT:    external trigger (connector on back)
+        TRG:    remote trigger (trigger() method)
+        """),
+
+    # protection
+    command("OVP", "VOLT{}:VMAX", float, "V", None, None, False, "OVP voltage [V]"),
+    command("OCP", "CURR{}:IMAX", float, "A", None, None, False, "OCP current [A]"),
+    command("OPP", "POWE{}:PMAX", float, "W", None, None, False, "OPP power [W]"),
+    command("protection", "LOAD{}:ABNO", str, None, None, None, True,
+            """protection state
+
+        NONE    No protection has been triggered
+        OV      OCP triggered
+        OC      OCP triggered
+        OP      OPP triggered
+        OT      Overtemp protection triggered
+        LRV     reverse voltage protection triggered
+        FAN     Fan failure
+        """),
+
+    # basic modes
+    command("CC_current", "CURR{}:CC", float, "A", None, "CC", False,
+            "current value for CC mode [A]"),
+    command("CV_voltage", "VOLT{}:CV", float, "V", None, "CV", False,
+            "voltage value for CV mode [V]"),
+    command("CP_power", "POWE{}:CP", float, "W", None, "CP", False,
+            "power value for CP mode [W]"),
+    command("CR_resistance", "RESI{}:CR", float, "Ω", (0.01, 5000), "CR", False,
+            "resistance value for CR mode [Ω]"),
+    command("CCCV_current", "CURR{}:CCCV", float, "A", None, "CCCV", False,
+            "current value for CC+CV mode [A]"),
+    command("CCCV_voltage", "VOLT{}:CCCV", float, "V", None, "CCCV", False,
+            "voltage value for CC+CV mode [V]"),
+    command("CRCV_resistance", "RESI{}:CRCV", float, "Ω", (0.01, 5000), "CRCV", False,
+            "resistance value for CR+CV mode [Ω]"),
+    command("CRCV_voltage", "VOLT{}:CRCV", float, "V", None, "CRCV", False,
+            "voltage value for CR+CV mode [V]"),
+
+    # LED mode
+    command("LED_voltage", "VOLT{}:LED", float, "V", None, "LED", False,
+            "V0 voltage value for LED mode [V]"),
+    command("LED_current", "CURR{}:LED", float, "A", None, "LED", False,
+            "I_0 current value for LED mode [A]"),
+    command("LED_coefficient", "LED{}:COEF", float, None, (0.01, 1.0), "LED", False,
+            """coefficient for LED mode
+
+        Used in determining the behaviour of the led simulation:
+        Rd = (Vo / Io) * Coeff
+        Vf = Vo * (1 - Coeff)
+        """),
+
+    # battery mode
+    command("BATT_resistance", "RESI{}:BCR", float, "Ω", (0.03, 4500), "BATT", False,
+            "BATTERY mode CR resistance [Ω]"),
+    command("BATT_cutoff", "BATT{}:BCUT", str, None, None, "BATT", False,
+            """BATTERY mode cutoff type
+
+        Uses single letters for setting but will return
+        words:
+
+        set get
+        ---------------
+        V   Voltage [V]
+        T   Time [s]
+        E   Energy [Wh]
+        C   Capacity [Ah]
+        """),
+    command("BATT_capacity", "BATT{}:CAPA", float, "Ah", None, "BATT", True,
+            "battery discharge capacity value [Ah]"),
+    command("BATT_energy", "BATT{}:ENER", float, "Wh", None, "BATT", True,
+            "battery discharge energy value [Wh]"),
+    command("BATT_cutoff_level", "BATT{}:BAEN", int, None, (1, 3), "BATT", False,
+            """Battery cutoff level (1|2|3)
+
+        only works in CC mode with voltage cutoff.
+        Will force the 1st/2nd/3rd cutoff level without requiring
+        the voltage to drop to the respective cutoff value.
+        Level 3 is the default state!
+        """),
+
+    # transient mode
+    command("TRANSIENT_submode", "TRAN{}:STATE", str, None, ("CC", "CV"), "TRAN", False,
+            "TRANSIENT sub-mode (CC|CV)"),
+
+    # list mode
+    command("LIST_stepmode", "LIST{}:MODE", str, None, None, "LIST", False,
+            "LIST step mode {AUTO|TRIGGER}"),
+    command("LIST_loop", "LIST{}:LOOP", str, None, None, "LIST", False,
+            "loop state {ON|OFF}"),
+    command("LIST_steps", "LIST{}:NUM", int, None, (1, 10), "LIST", False,
+            "number of steps to execute"),
+
+    # scan mode
+    command("SCAN_submode", "SCAN{}:TYPE", str, None, ("CC", "CV", "CP"), "SCAN", False,
+            "scan mode {CC|CV|CP}"),
+    command("SCAN_threshold", "SCAN{}:THTYPE", str, None, None, "SCAN", False,
+            "Scan threshold type {VTH|DROP|VMIN}"),
+    command("SCAN_compare", "SCAN{}:COMPARE", str, None, None, "SCAN", False,
+            "comparison type {INCURR|INVOLT|INPOW|OFF}"),
+    command("SCAN_stepdelay", "TIME{}:STEP", int, "s", (1, 999), "SCAN", False,
+            "step delay [s] for SCAN mode"),
+
+    # qualification test
+    command("QUALI_result", "QUAL{}:OUT", str, None, None, None, True,
+            "Result qualification test {NONE|PASS|FAIL}"),
+)
+# fmt: on
+
+# measurement queries used by the `read_*` methods of `channel`
+MEASUREMENTS = {
+    "read_voltage": "MEAS{}:VOLTAGE?",
+    "read_current": "MEAS{}:CURRENT?",
+    "read_power": "MEAS{}:POWER?",
+    "read_resistance": "MEAS{}:RESISTANCE?",
+    "read_all": "MEAS{}:ALL?",
+}
+
+BY_NAME = {c.name: c for c in COMMANDS}
+
+
+def commands(mode=None):
+    "commands that apply to `mode` (all commands if `mode` is None)"
+
+    if mode is None:
+        return COMMANDS
+    return tuple(c for c in COMMANDS if c.mode in (None, mode.upper()))
@@ -0,0 +1,87 @@
+"Deadband compression of measurement streams"
+
+_QUANTITIES = ("V", "I", "P", "R")
+
+
+class deadband:
+    """Drop samples that do not change beyond a deadband
+
+    Sits between an acquisition and any sink (log file, database, ...):
+
+        acq.add_sink(deadband(writer, V=0.01, I=0.001, max_interval=60))
+
+    sink            callable receiving the samples that are kept
+    V, I, P, R      deadband per quantity [V|A|W|Ω]. None: ignore quantity
+    max_interval    keep at least one sample every `max_interval` seconds
+
+    A sample is kept when any quantity differs from the last kept sample of
+    the same channel by more than its deadband, or when `max_interval` has
+    elapsed since then. In the first case, the last dropped sample before
+    the change is kept as well, so the time of every change is preserved.
+
+    Reconstruction bounds: holding the value of the last kept sample until
+    the next one (zero order hold), every reconstructed quantity is within
+    ± its deadband of the original sample, at every original time stamp.
+    Changes are located exactly: the samples directly before and after each
+    change are both kept. Nothing is dropped for longer than `max_interval`.
+    Call `flush()` at the end of a run to keep the last sample.
+
+    `seen` and `kept` count the samples per stream, `ratio` is the
+    compression ratio.
+    """
+
+    def __init__(self, sink, V=0.01, I=0.001, P=0.01, R=0.01, max_interval=600):
+        self.sink = sink
+        self.bands = [
+            (i, band)
+            for i, band in zip(range(2, 6), (V, I, P, R))
+            if band is not None
+        ]
+        self.max_interval = max_interval
+        self.seen = 0
+        self.kept = 0
+        self._ref = {}
+        self._held = {}
+
+    @property
+    def ratio(self):
+        return self.seen / self.kept if self.kept else 0.0
+
+    def _keep(self, s):
+        self.kept += 1
+        self.sink(s)
+
+    def __call__(self, s):
+        self.seen += 1
+        name = s.channel
+        ref = self._ref.get(name)
+        if ref is None:
+            self._ref[name] = s
+            self._keep(s)
+            return
+
+        changed = False
+        for i, band in self.bands:
+            if abs(s[i] - ref[i]) > band:
+                changed = True
+                break
+        if changed:
+            held = self._held.pop(name, None)
+            if held is not None:
+                self._keep(held)
+            self._ref[name] = s
+            self._keep(s)
+        elif s.t - ref.t >= self.max_interval:
+            self._held.pop(name, None)
+            self._ref[name] = s
+            self._keep(s)
+        else:
+            self._held[name] = s
+
+    def flush(self):
+        "keep the last dropped sample of every channel"
+
+        for name in list(self._held):
+            s = self._held.pop(name)
+            self._ref[name] = s
+            self._keep(s)
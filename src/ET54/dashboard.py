@@ -0,0 +1,275 @@
+"Local live dashboard served over HTTP"
+
+import json, math, threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from .store import sample_store
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ET54</title>
+<style>
+body { font-family: sans-serif; margin: 1em; }
+table { border-collapse: collapse; margin-bottom: 1em; }
+td, th { padding: 0.2em 0.8em; text-align: right; }
+canvas { border: 1px solid #ccc; }
+</style></head>
+<body>
+<h2>ET54</h2>
+<table id="status"><tr><th>Channel</th><th>Input</th><th>Mode</th><th>Protection</th>
+<th>V</th><th>I</th><th>P</th><th>R</th></tr></table>
+<canvas id="plot" width="900" height="300"></canvas>
+<script>
+const Q = ["V", "I", "P", "R"];
+const series = {};
+const state = {};
+function row(ch) {
+  let r = document.getElementById("ch" + ch);
+  if (!r) {
+    r = document.getElementById("status").insertRow();
+    r.id = "ch" + ch;
+    for (let i = 0; i < 8; i++) r.insertCell();
+    r.cells[0].textContent = ch;
+  }
+  return r;
+}
+function show(ch) {
+  const r = row(ch), st = state[ch] || {}, s = series[ch];
+  r.cells[1].textContent = st.input || "";
+  r.cells[2].textContent = st.mode || "";
+  r.cells[3].textContent = st.protection || "";
+  if (s && s.t.length) Q.forEach((q, i) => r.cells[4 + i].textContent = s[q][s.t.length - 1]);
+}
+function draw() {
+  const c = document.getElementById("plot"), g = c.getContext("2d");
+  g.clearRect(0, 0, c.width, c.height);
+  const colors = ["#c00", "#00c"];
+  ["V", "I"].forEach((q, k) => {
+    let t = [], y = [];
+    Object.values(series).forEach(s => { t = t.concat(s.t); y = y.concat(s[q].filter(v => v !== null)); });
+    if (t.length < 2 || !y.length) return;
+    const t0 = Math.min(...t), t1 = Math.max(...t), y0 = Math.min(...y), y1 = Math.max(...y) || 1;
+    g.strokeStyle = colors[k];
+    Object.values(series).forEach(s => {
+      g.beginPath();
+      let pen = false;
+      s.t.forEach((tt, i) => {
+        if (s[q][i] === null) { pen = false; return; }
+        const px = (tt - t0) / (t1 - t0 || 1) * c.width;
+        const py = c.height - (s[q][i] - y0) / (y1 - y0 || 1) * c.height;
+        pen ? g.lineTo(px, py) : g.moveTo(px, py);
+        pen = true;
+      });
+      g.stroke();
+    });
+  });
+}
+function add(ch, t, v) {
+  const s = series[ch] = series[ch] || {t: [], V: [], I: [], P: [], R: []};
+  s.t.push(t); Q.forEach((q, i) => s[q].push(v[i]));
+}
+fetch("history").then(r => r.json()).then(h => {
+  Object.entries(h).forEach(([ch, d]) => d.t.forEach((t, i) => add(ch, t, Q.map(q => d[q][i]))));
+  Object.keys(h).forEach(show); draw();
+  const es = new EventSource("events");
+  es.onmessage = m => {
+    const d = JSON.parse(m.data);
+    (d.samples || []).forEach(s => add(s[0], s[1], s.slice(2)));
+    Object.entries(d.state || {}).forEach(([ch, st]) => state[ch] = Object.assign(state[ch] || {}, st));
+    Object.keys(series).concat(Object.keys(state)).forEach(show);
+    draw();
+  };
+});
+</script></body></html>
+"""
+
+
+class dashboard:
+    """Live dashboard for a running acquisition
+
+        acq = acquisition(el.Channels)
+        dash = dashboard(acq)
+        dash.start()
+        acq.start()
+
+    Then point a browser to http://localhost:8054/
+
+    acq             acquisition to show
+    store           sample_store for the history (default: a new one is
+                    attached to the acquisition)
+    host, port      address to listen on
+    state_every     refresh one field of the channel state (input, mode,
+                    protection) every n acquisition cycles
+    points          number of points of the history sent to new viewers
+
+    Browsers receive new samples and changed state fields as server-sent
+    events. History is served from the aggregate tiers of the store. All
+    data comes from the acquisition, so any number of viewers cause no
+    extra serial traffic. Missing values (NaN) are sent as null.
+    """
+
+    def __init__(self, acq, store=None, host="127.0.0.1", port=8054, state_every=10, points=2000):
+        self.acq = acq
+        self.store = store
+        self._own_store = store is None
+        self.address = (host, port)
+        self.state_every = state_every
+        self.points = points
+        self.offset = acq.wall_offset
+        self.seq = 0
+        self.recent = deque(maxlen=1000)
+        self._cond = threading.Condition()
+        self._closing = False
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        "attach to the acquisition and start serving"
+
+        if self._own_store:
+            if self.store is None:
+                self.store = sample_store()
+            self.acq.add_sink(self.store)
+        self.acq.add_sink(self.feed)
+        if self.state_every:
+            self.acq.add_state(every=self.state_every)
+
+        dash = self
+
+        class handler(_handler):
+            dashboard = dash
+
+        self._server = ThreadingHTTPServer(self.address, handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="ET54-dashboard", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        "stop serving and detach from the acquisition"
+
+        self.acq.remove_sink(self.feed)
+        if self._own_store:
+            self.acq.remove_sink(self.store)
+        if self.state_every:
+            self.acq.remove_state()
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2] if self._server else self.address
+        return f"http://{host}:{port}/"
+
+    def feed(self, s):
+        "acquisition sink"
+
+        with self._cond:
+            self.seq += 1
+            values = _finite((s.V, s.I, s.P, s.R))
+            self.recent.append((self.seq, [s.channel, round(s.t + self.offset, 3)] + values))
+            self._cond.notify_all()
+
+    def history(self, points=None):
+        "downsampled history of all channels (wall clock time stamps)"
+
+        ret = {}
+        for name in self.store.channels:
+            data = self.store.query(name, points=points or self.points)
+            ret[name] = {k: _finite((v + self.offset if k == "t" else v).round(4).tolist())
+                         for k, v in data.items() if k in ("t", "V", "I", "P", "R")}
+        return ret
+
+    def updates(self, seq, known):
+        """wait for news since `seq`
+
+        known   dict of state fields the client has already seen (updated)
+
+        returns (new seq, message dict) or None when the server stops
+        """
+
+        with self._cond:
+            while self.seq == seq and not self._closing:
+                self._cond.wait()
+            if self._closing:
+                return None
+            samples = [s for n, s in self.recent if n > seq]
+            return self.seq, {"samples": samples, "state": self._changed(known)}
+
+    def snapshot(self, known):
+        "current sequence number and full state (fills `known`)"
+
+        with self._cond:
+            return self.seq, {"samples": [], "state": self._changed(known)}
+
+    def _changed(self, known):
+        changed = {}
+        for name, state in self.acq.state_snapshot().items():
+            for field, value in state.items():
+                if known.get((name, field)) != value:
+                    known[(name, field)] = value
+                    changed.setdefault(name, {})[field] = value
+        return changed
+
+
+def _finite(values):
+    "list of `values` with NaN and infinity (invalid in JSON) replaced by None"
+    return [x if math.isfinite(x) else None for x in values]
+
+
+class _handler(BaseHTTPRequestHandler):
+    dashboard = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, ctype):
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/":
+            self._send(_PAGE, "text/html; charset=utf-8")
+        elif url.path == "/history":
+            points = parse_qs(url.query).get("points")
+            try:
+                points = int(points[0]) if points else None
+            except ValueError:
+                points = 0
+            if points is not None and points < 1:
+                self.send_error(400, "points must be a positive integer")
+                return
+            self._send(json.dumps(self.dashboard.history(points)), "application/json")
+        elif url.path == "/events":
+            self.events()
+        else:
+            self.send_error(404)
+
+    def events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        dash = self.dashboard
+        known = {}
+        news = dash.snapshot(known)
+        try:
+            while news is not None:
+                seq, msg = news
+                self.wfile.write(f"data: {json.dumps(msg)}\n\n".encode())
+                self.wfile.flush()
+                news = dash.updates(seq, known)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
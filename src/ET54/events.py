@@ -0,0 +1,268 @@
+"Threshold and event callbacks over measurement streams"
+
+import sys, queue, threading
+from collections import namedtuple
+import numpy as np
+
+event = namedtuple("event", ("t", "channel", "quantity", "value", "condition"))
+
+_QUANTITIES = ("V", "I", "P", "R")
+
+
+class condition:
+    """Declarative condition on one measured quantity
+
+    quantity    V|I|P|R
+    above       fire when the value rises above this level
+    below       fire when the value falls below this level
+    hysteresis  the value must move back by this amount before the
+                condition can fire again
+    dwell       the condition must hold for this long [s] before it fires
+    rate        check the rate of change [unit/s] instead of the value
+    channel     channel name to watch (default: all channels)
+
+    Exactly one of `above` and `below` must be given. A condition fires once
+    each time it becomes true (and stays true for `dwell` seconds).
+    """
+
+    def __init__(
+        self,
+        quantity,
+        above=None,
+        below=None,
+        hysteresis=0.0,
+        dwell=0.0,
+        rate=False,
+        channel=None,
+    ):
+        if quantity not in _QUANTITIES:
+            raise ValueError(f"quantity must be one of {_QUANTITIES}, not '{quantity}'")
+        if (above is None) == (below is None):
+            raise ValueError("Exactly one of 'above' and 'below' must be given")
+        self.quantity = quantity
+        self.above = above
+        self.below = below
+        self.hysteresis = abs(hysteresis)
+        self.dwell = dwell
+        self.rate = rate
+        self.channel = channel
+        # per channel carry-over between blocks:
+        # (state, run start, ready, last t, last x)
+        self._carry = {}
+
+    def __repr__(self):
+        what = f"d{self.quantity}/dt" if self.rate else self.quantity
+        if self.above is not None:
+            ret = f"{what} > {self.above}"
+        else:
+            ret = f"{what} < {self.below}"
+        if self.dwell:
+            ret += f" for {self.dwell} s"
+        return f"condition({ret})"
+
+    def evaluate(self, channel, t, x):
+        """evaluate a block of samples of one channel
+
+        t, x    NumPy arrays of time stamps and values
+
+        returns the indices of the samples at which the condition fires
+        """
+
+        state0, start0, ready0, t_last, x_last = self._carry.get(
+            channel, (False, np.nan, False, None, None)
+        )
+        self._carry[channel] = None
+        offset = 0
+        if self.rate:
+            if t_last is not None:
+                t_ext = np.concatenate(([t_last], t))
+                x_ext = np.concatenate(([x_last], x))
+            else:
+                # the first sample has no rate
+                t_ext, x_ext, offset = t, x, 1
+            with np.errstate(divide="ignore", invalid="ignore"):
+                y = np.diff(x_ext) / np.diff(t_ext)
+            y = np.nan_to_num(y, nan=0.0, posinf=0.0, neginf=0.0)
+            ty = t_ext[1:]
+        else:
+            y, ty = x, t
+
+        n = len(y)
+        if n == 0:
+            self._carry[channel] = (state0, start0, ready0, t[-1], x[-1])
+            return np.empty(0, dtype=int)
+
+        if self.above is not None:
+            on = y > self.above
+            off = y <= self.above - self.hysteresis
+        else:
+            on = y < self.below
+            off = y >= self.below + self.hysteresis
+        # -1 = inside hysteresis band: keep previous state
+        code = np.where(on, 1, np.where(off, 0, -1))
+        last = np.maximum.accumulate(np.where(code >= 0, np.arange(n), -1))
+        state = np.where(last >= 0, code[np.maximum(last, 0)] == 1, state0)
+
+        prev = np.concatenate(([state0], state[:-1]))
+        starts = state & ~prev
+        last_start = np.maximum.accumulate(np.where(starts, np.arange(n), -1))
+        run_start = np.where(last_start >= 0, ty[np.maximum(last_start, 0)], start0)
+        ready = state & (ty - run_start >= self.dwell)
+        prev_ready = np.concatenate(([ready0], ready[:-1]))
+        fire = np.flatnonzero(ready & ~prev_ready)
+
+        self._carry[channel] = (
+            bool(state[-1]),
+            run_start[-1] if state[-1] else np.nan,
+            bool(ready[-1]),
+            t[-1],
+            x[-1],
+        )
+        return fire + offset
+
+
+def threshold(quantity, above=None, below=None, hysteresis=0.0, dwell=0.0, channel=None):
+    "condition on the value of a quantity"
+    return condition(quantity, above, below, hysteresis, dwell, False, channel)
+
+
+def rate(quantity, above=None, below=None, hysteresis=0.0, dwell=0.0, channel=None):
+    "condition on the rate of change of a quantity [unit/s]"
+    return condition(quantity, above, below, hysteresis, dwell, True, channel)
+
+
+class event_engine:
+    """Check conditions on acquisition samples and run callbacks
+
+    acq             acquisition to attach to (optional, see `attach`)
+    block           number of samples collected before a block is checked
+    max_latency     maximum time [s] a sample may wait for its block
+
+    Samples are only buffered on the acquisition thread. Conditions are
+    checked block-wise with NumPy and the callbacks run on a separate
+    worker thread, so complex stop and branch logic does not slow down the
+    sampling loop.
+
+    Callbacks that talk to the device run concurrently with the acquisition
+    thread, so the command scheduler must be running
+    (`el.start_scheduler()`), otherwise their commands interleave with the
+    acquisition's on the serial line.
+
+    Example: stop a battery discharge when the current has dropped below
+    10 mA for at least 5 s:
+
+        el.start_scheduler()
+        engine = event_engine(acq)
+        engine.add(threshold("I", below=0.01, dwell=5), lambda e: el.off(), once=True)
+        engine.start()
+    """
+
+    def __init__(self, acq=None, block=16, max_latency=1.0):
+        self.block = block
+        self.max_latency = max_latency
+        self.rules = []
+        self.acq = None
+        self._pending = []
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        if acq is not None:
+            self.attach(acq)
+
+    def add(self, cond, callback, once=False):
+        """run `callback(event)` whenever `cond` fires
+
+        once    remove the rule after it has fired for the first time
+
+        returns the condition
+        """
+
+        with self._lock:
+            self.rules.append([cond, callback, once])
+        return cond
+
+    def remove(self, cond):
+        with self._lock:
+            self.rules = [r for r in self.rules if r[0] is not cond]
+
+    def attach(self, acq):
+        self.acq = acq
+        acq.add_sink(self.feed)
+
+    def detach(self):
+        self.acq.remove_sink(self.feed)
+        self.acq = None
+
+    def start(self):
+        "start the worker thread"
+
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._worker, name="ET54-events", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        "check the remaining samples and stop the worker thread"
+
+        self.flush()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def feed(self, s):
+        "acquisition sink: buffer a sample"
+
+        self._pending.append(s)
+        if (
+            len(self._pending) >= self.block
+            or s.t - self._pending[0].t >= self.max_latency
+        ):
+            self.flush()
+
+    def flush(self):
+        "hand the buffered samples to the worker thread"
+
+        if self._pending:
+            self._queue.put(self._pending)
+            self._pending = []
+
+    def _worker(self):
+        while True:
+            samples = self._queue.get()
+            if samples is None:
+                return
+            try:
+                self.process(samples)
+            except Exception as e:
+                print(f"Event engine failed: {e}", file=sys.stderr)
+
+    def process(self, samples):
+        "check a list of samples against all rules and run callbacks"
+
+        data = np.array(
+            [(s.t, s.V, s.I, s.P, s.R) for s in samples], dtype=float
+        ).reshape(-1, 5)
+        channels = np.array([s.channel for s in samples])
+        events = []
+        with self._lock:
+            rules = list(self.rules)
+        for name in np.unique(channels):
+            block = data[channels == name]
+            t = block[:, 0]
+            for rule in rules:
+                cond = rule[0]
+                if cond.channel is not None and cond.channel != name:
+                    continue
+                col = 1 + _QUANTITIES.index(cond.quantity)
+                for i in cond.evaluate(name, t, block[:, col]):
+                    events.append((t[i], str(name), cond.quantity, block[i, col], rule))
+        events.sort(key=lambda e: e[0])
+        for t, name, quantity, value, rule in events:
+            cond, callback, once = rule
+            if once:
+                if rule not in self.rules:
+                    continue
+                self.remove(cond)
+            callback(event(float(t), name, quantity, float(value), cond))
@@ -0,0 +1,76 @@
+"Synchronized operation of several input channels"
+
+from ._support_functions import _tofloats
+
+
+class channel_group:
+    """Group of channels that are configured and measured together
+
+    Useful on two-channel models (ET5420, ET5420A+). Instead of running the
+    full write/read cycle for one channel after the other, the commands for
+    all channels are interleaved: they are sent back to back and the
+    responses are collected afterwards. This minimizes the time skew between
+    the channels.
+
+    instrument  ET54 instance
+    channels    list of channel objects (default: all channels)
+    gap         time between two commands [s] (default: pacing delay of
+                the connection). Lower values reduce the skew further but
+                the device may drop commands if they arrive too fast.
+
+    After each call, `skew` holds the estimated time between the first and
+    the last command arriving at the device [s].
+    """
+
+    def __init__(self, instrument, channels=None, gap=None):
+        self.instrument = instrument
+        self.channels = instrument.Channels if channels is None else list(channels)
+        self.gap = gap
+        self.skew = None
+
+    def _write(self, commands):
+        arrival = self.instrument.write_many(commands, self.gap)
+        self.skew = arrival[-1] - arrival[0]
+
+    def _query(self, commands):
+        ret, arrival = self.instrument.query_many(commands, self.gap)
+        self.skew = arrival[-1] - arrival[0]
+        return ret, arrival
+
+    def on(self):
+        "turn on all inputs of the group"
+        self._write([f"Ch{ch.name}:SW ON" for ch in self.channels])
+
+    def off(self):
+        "turn off all inputs of the group"
+        self._write([f"Ch{ch.name}:SW OFF" for ch in self.channels])
+
+    def set(self, attribute, values):
+        """set the same attribute on all channels of the group
+
+        attribute   name of a channel attribute, e.g. "CC_current"
+        values      one value per channel or a single value for all
+
+        Channel attributes are set one after the other. Use `on`, `off`
+        and `read_all` for time critical operations.
+        """
+
+        if not isinstance(values, (list, tuple)):
+            values = [values] * len(self.channels)
+        if len(values) != len(self.channels):
+            raise ValueError(
+                f"Expected {len(self.channels)} values, got {len(values)}"
+            )
+        for ch, value in zip(self.channels, values):
+            setattr(ch, attribute, value)
+
+    def read_all(self):
+        """measure all channels in one interleaved cycle
+
+        returns (values, skew) where `values` is a list of (V, I, P, R)
+        tuples, one per channel, and `skew` the estimated time between the
+        first and the last measurement [s]
+        """
+
+        ret, _ = self._query([f"MEAS{ch.name}:ALL?" for ch in self.channels])
+        return [tuple(_tofloats(x)) for x in ret], self.skew
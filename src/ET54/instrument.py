@@ -1,7 +1,46 @@
 "Electronic load base instrument"
 
 import sys, time, pyvisa
+import numpy as np
 from .channel import channel
+from .group import channel_group
+from .scheduler import scheduler, _priority, _channel
+
+# acknowledgements of write commands
+_ACKS = ("Rexecu success", "Rexecu err", "Rcmd err")
+
+# commands that must not be repeated after a failed attempt
+_NOT_IDEMPOTENT = ("TRG", "*TRG", "RST", "*RST")
+
+
+# a read returning faster than this found its answer already buffered [s]
+_BUFFERED = 0.002
+
+
+class desync_error(RuntimeError):
+    "a response does not belong to the command that was sent"
+
+
+def _timeout(e):
+    return (
+        isinstance(e, pyvisa.errors.VisaIOError)
+        and e.error_code == pyvisa.constants.StatusCode.error_timeout
+    )
+
+
+def _check_answer(command, value):
+    "check the single-line answer to a query"
+
+    if value == "Rcmd err":
+        raise RuntimeError(f"Command '{command}' failed ({value})")
+    if value in _ACKS or not value:
+        raise desync_error(f"Unexpected response to '{command}' ('{value}')")
+
+
+def _idempotent(command):
+    "True if sending `command` twice has the same effect as sending it once"
+    return command.strip().upper() not in _NOT_IDEMPOTENT
+
 
 class ET54:
     """ET54 series electronic load
@@ -20,6 +59,7 @@ class ET54:
         delay=0.2,
         timeout=2000,
         model=None,
+        retries=1,
     ):
         """
         RID         pyvisa ressource ID
@@ -31,7 +71,15 @@ class ET54:
         model       model ID [ET5410|ET5420|ET5410A+|...]
                     only required if `*IDN?` does not return a valid ID
                     e.g. for Mustool branded ET5410A+
+        retries     number of times a command is repeated after a timeout or
+                    a garbled response (see `resync`)
         """
+        self.scheduler = None
+        self.retries = retries
+        self.retried = 0
+        self.resyncs = []
+        self.bus_time = 0.0
+        self.commands = 0
         rm = pyvisa.ResourceManager()
         self.connection = rm.open_resource(RID)
         self.connection.baud_rate = baudrate
@@ -40,7 +88,8 @@ class ET54:
         self.connection.read_termination = eol_r
         self.connection.write_termination = eol_w
 
-        tmp = self.connection.query("*IDN?").split()
+        self._idn = self.connection.query("*IDN?")
+        tmp = self._idn.split()
         self.idn = dict()
         if len(tmp) == 4:
             (
@@ -62,17 +111,18 @@ class ET54:
 
         if self.idn["model"].upper() in ("ET5406A+", "ET5407A+",
                                          "ET5410", "ET5410A+", "ET5411", "ET5411A+"):
-            self.ch1 = channel("1", self.write, self.query)
+            self.ch1 = channel("1", self.write, self.query, self.idn["model"], self.burst)
             self.Channels = [self.ch1]
         elif self.idn["model"].upper() in ("ET5420A+", "ET5420"):
-            self.ch1 = channel("1", self.write, self.query)
-            self.ch2 = channel("2", self.write, self.query)
+            self.ch1 = channel("1", self.write, self.query, self.idn["model"], self.burst)
+            self.ch2 = channel("2", self.write, self.query, self.idn["model"], self.burst)
             self.Channels = [self.ch1, self.ch2]
         else:
             raise RuntimeError(f"Instrument ID '{self.idn['model']}' not supported.")
 
     def __del__(self):
-        self.connection.close()
+        if hasattr(self, "connection"):
+            self.close()
 
     def __str__(self):
         ret = f"""Model:          {self.idn['model']}
@@ -87,48 +137,372 @@ Hardware:       {self.idn['hardware']}
 
     def write(self, command):
         "Write command to connection and check status"
+        return self._dispatch(command, self._write, command)
 
+    def _write(self, command):
+        return self._retry(command, self._write_once, command)
+
+    def _write_once(self, command):
         ret = self.connection.query(command)
         time.sleep(self.connection.query_delay)
+        return self._check(command, ret)
+
+    def _check(self, command, ret):
+        "check the response to a write command"
+
         if ret == "Rexecu success":
             return 0
         elif ret == "Rcmd err":
             raise RuntimeError(f"Unknown SCPI command '{command}' ('{ret}')")
         elif ret == "Rexecu err":
             raise RuntimeError(f"SCPI command '{command}' failed ('{ret}')")
+        elif ret.startswith("R") or not ret:
+            # most likely the late response to an earlier query
+            raise desync_error(f"Unexpected response to '{command}' ('{ret}')")
         else:
             raise RuntimeError(
                 f"SCPI command '{command}' returned unknown response ('{ret}')"
             )
 
-    def query(self, command, nrows=1, timeout=None):
+    def query(self, command, nrows=1, timeout=None, timed=False):
         """Write command to connection and return answer value
         By default, reads 1 line of response.
         If you expect more, you need to set `nrows` to the respective value
         If you expect the respinse to be slow, you can set a ne timout just for
         this request
+
+        With `timed`, returns (answer, (t_send, t_mid, t_recv)): the time the
+        command was sent, the estimated time the device answered it (see
+        `_midpoint`) and the time the first line was received
+        (`time.monotonic()` scale).
         """
+        return self._dispatch(command, self._query, command, nrows, timeout, timed)
+
+    def _query(self, command, nrows=1, timeout=None, timed=False):
+        return self._retry(command, self._query_once, command, nrows, timeout, timed)
 
+    def _query_once(self, command, nrows, timeout, timed=False):
+        _timeout = self.connection.timeout
         if timeout is not None:
-            _timeout = self.connection.timeout
             self.connection.timeout = timeout
+        try:
+            t_send = time.monotonic()
+            self.connection.write(command)
+            time.sleep(self.connection.query_delay)
+            ret = []
+            for i in range(nrows):
+                t_read = time.monotonic()
+                value = self.connection.read()
+                if i == 0:
+                    t_recv = time.monotonic()
+                    timing = (t_send, self._midpoint(command, value, t_send, t_read, t_recv), t_recv)
+                time.sleep(self.connection.query_delay)
+                if value == "Rcmd err":
+                    print(f"Command '{command}' failed ({value})", file=sys.stderr)
+                    ret = [None]
+                    break
+                if value in _ACKS or not value:
+                    # late acknowledgement of an earlier write
+                    raise desync_error(f"Unexpected response to '{command}' ('{value}')")
+                ret.append(value)
+        finally:
+            self.connection.timeout = _timeout
+        ret = ret if len(ret) > 1 else ret[0]
+        return (ret, timing) if timed else ret
+
+    def _midpoint(self, command, response, t_send, t_read, t_recv):
+        """estimate when the device handled a query
 
-        self.connection.write(command)
+        The command arrives at the device one wire time after `t_send`; the
+        answer leaves it one wire time before it is completely received. The
+        estimate is the middle between the two. If the answer was already
+        waiting when reading started (because of the pacing delay),
+        `t_recv` says nothing about when it arrived and the device is
+        assumed to have answered right away.
+        """
+
+        bittime = 10 / self.connection.baud_rate
+        arrival = t_send + (len(command) + len(self.connection.write_termination)) * bittime
+        wire = (len(response) + len(self.connection.read_termination)) * bittime
+        if t_recv - t_read > _BUFFERED:
+            end = t_recv
+        else:
+            end = min(t_read, arrival + wire)
+        return min(t_recv, max(arrival, (arrival + end - wire) / 2))
+
+    def _retry(self, command, func, *args):
+        """run func, resync and repeat it after timeouts and garbled responses
+
+        Commands that are rejected by the device are not repeated, neither
+        are commands that must not be sent twice (e.g. triggers).
+        """
+
+        for attempt in range(self.retries + 1):
+            try:
+                return func(*args)
+            except Exception as e:
+                if not (isinstance(e, desync_error) or _timeout(e)):
+                    raise
+                self._resync(f"{command}: {e}")
+                if attempt == self.retries or not _idempotent(command):
+                    raise RuntimeError(f"Command '{command}' failed: {e}") from e
+                self.retried += 1
+
+    def write_many(self, commands, gap=None):
+        """Write several commands with a minimal gap between them
+
+        All commands are sent `gap` seconds apart before any response is
+        read. Responses are checked afterwards, in order. Compared to
+        calling `write` in a loop, the commands reach the device much closer
+        together. `gap` defaults to the pacing delay of the connection.
+
+        returns the estimated arrival times of the commands at the device
+        (`time.monotonic()` scale)
+        """
+        return self._dispatch(commands[0], self._write_many, commands, gap)
+
+    def _write_many(self, commands, gap):
+        arrival = self._send_many(commands, gap)
+        replies = self._read_many(commands)
+        self._first_error(commands, replies, self._check)
         time.sleep(self.connection.query_delay)
-        ret = []
-        for i in range(nrows):
-            value = self.connection.read()
-            time.sleep(self.connection.query_delay)
-            ret.append(value)
-            if value == "Rcmd err":
-                print(f"Command '{command}' failed ({value})", file=sys.stderr)
-                return None
-        if timeout is not None:
+        return arrival
+
+    def query_many(self, commands, gap=None):
+        """Send several single-line queries with a minimal gap between them
+
+        Works like `write_many` but returns the responses.
+
+        returns (responses, arrival times)
+        """
+        return self._dispatch(commands[0], self._query_many, commands, gap)
+
+    def _query_many(self, commands, gap):
+        arrival = self._send_many(commands, gap)
+        replies = self._read_many(commands)
+        self._first_error(commands, replies, _check_answer)
+        time.sleep(self.connection.query_delay)
+        return replies, arrival
+
+    def _read_many(self, commands):
+        "read one reply per command, resync if one does not arrive"
+
+        replies = []
+        try:
+            for command in commands:
+                replies.append(self.connection.read())
+        except pyvisa.errors.VisaIOError as e:
+            self._resync(f"{commands[len(replies)]}: {e}")
+            raise
+        return replies
+
+    def _first_error(self, commands, replies, check):
+        """check all replies, raise for the first bad one
+
+        All replies have been read at this point, so a rejected command does
+        not leave the acks of the following ones in the buffer.
+        """
+
+        errors = []
+        for command, reply in zip(commands, replies):
+            try:
+                check(command, reply)
+            except RuntimeError as e:
+                errors.append(e)
+        desync = [e for e in errors if isinstance(e, desync_error)]
+        if desync:
+            self._resync(f"{commands[0]}, ...: {desync[0]}")
+        if errors:
+            raise errors[0]
+
+    def _send_many(self, commands, gap):
+        "send commands back to back and estimate when they arrived"
+
+        if gap is None:
+            gap = self.connection.query_delay
+        # 10 bits per character on the wire
+        bittime = 10 / self.connection.baud_rate
+        eol = len(self.connection.write_termination)
+        arrival = []
+        for i, command in enumerate(commands):
+            if i and gap:
+                time.sleep(gap)
+            t = time.monotonic()
+            self.connection.write(command)
+            arrival.append(t + (len(command) + eol) * bittime)
+        time.sleep(self.connection.query_delay)
+        return arrival
+
+    def burst(self, command, n, gap=None):
+        """Send the same query `n` times in a tight loop
+
+        The command is encoded once. Each answer is read right after its
+        query, then the loop pauses for `gap` seconds (default: pacing delay
+        of the connection) before the next one. Answers are returned as raw
+        bytes and not checked; the connection is blocked for the whole
+        burst.
+
+        returns (answers, t): a list of bytes and a NumPy array with the
+        middle between sending each query and receiving its answer
+        (`time.monotonic()` scale)
+        """
+        return self._dispatch(command, self._burst, command, n, gap)
+
+    def _burst(self, command, n, gap):
+        if gap is None:
+            gap = self.connection.query_delay
+        cmd = (command + self.connection.write_termination).encode()
+        write = self.connection.write_raw
+        read = self.connection.read_raw
+        clock = time.monotonic
+        sleep = time.sleep
+        answers = [None] * n
+        t = np.empty(n)
+        try:
+            for i in range(n):
+                t0 = clock()
+                write(cmd)
+                answers[i] = read()
+                t[i] = (t0 + clock()) / 2
+                if gap:
+                    sleep(gap)
+        except pyvisa.errors.VisaIOError as e:
+            self._resync(f"{command} (burst): {e}")
+            raise RuntimeError(f"Burst of '{command}' failed after {i} samples: {e}") from e
+        return answers, t
+
+    def resync(self, reason="manual"):
+        """Realign responses with commands
+
+        Discards everything the device has sent but nobody has read (e.g.
+        the rest of a multi-line response after a timeout), then sends
+        `*IDN?` and skips lines until its answer arrives. After that, the
+        next response belongs to the next command again.
+
+        This runs automatically after timeouts and garbled responses. Each
+        run is recorded in `resyncs` as (time, reason, duration [s]).
+
+        returns the time it took [s]
+        """
+        return self._dispatch("*IDN?", self._resync, reason)
+
+    def _resync(self, reason):
+        t0 = time.monotonic()
+        self._realign()
+        duration = time.monotonic() - t0
+        self.resyncs.append((t0, reason, duration))
+        print(f"Resynchronized in {duration:.2f} s ({reason})", file=sys.stderr)
+        return duration
+
+    def _realign(self):
+        "drain input, send *IDN? and skip lines until its answer arrives"
+
+        _timeout = self.connection.timeout
+        try:
+            # drain pending input
+            self.connection.timeout = max(50, int(self.connection.query_delay * 1000))
+            for i in range(100):
+                try:
+                    self.connection.read()
+                except pyvisa.errors.VisaIOError:
+                    break
+            # sentinel
             self.connection.timeout = _timeout
-        return ret if len(ret) > 1 else ret[0]
+            self.connection.write("*IDN?")
+            model = self._idn.split()[0]
+            for i in range(20):
+                if self.connection.read().split()[:1] == [model]:
+                    break
+            else:
+                raise RuntimeError("Unable to resynchronize: no answer to '*IDN?'")
+        except pyvisa.errors.VisaIOError as e:
+            raise RuntimeError(f"Unable to resynchronize: {e}") from e
+        finally:
+            self.connection.timeout = _timeout
+        time.sleep(self.connection.query_delay)
+
+    def wait_ready(self, timeout=10, interval=0.2):
+        """Wait until the device answers again, e.g. after `reset`
+
+        Polls `*IDN?` instead of sleeping for a fixed time.
+
+        returns the time it took [s]
+        """
+        return self._dispatch("*IDN?", self._wait_ready, timeout, interval)
+
+    def _wait_ready(self, timeout, interval):
+        t0 = time.monotonic()
+        while True:
+            try:
+                self._realign()
+                return time.monotonic() - t0
+            except RuntimeError as e:
+                if time.monotonic() - t0 > timeout:
+                    raise RuntimeError(f"Device not ready after {timeout} s: {e}")
+            time.sleep(interval)
+
+    def recovery_stats(self):
+        """statistics of automatic recovery
+
+        returns a dict with the number of resyncs, the number of repeated
+        commands and the total, mean and maximum recovery time [s]
+        """
+
+        durations = [d for t, reason, d in self.resyncs]
+        return dict(
+            resyncs=len(durations),
+            retried=self.retried,
+            total=sum(durations),
+            mean=sum(durations) / len(durations) if durations else 0.0,
+            max=max(durations, default=0.0),
+        )
+
+    def _dispatch(self, command, func, *args):
+        "run func directly or through the scheduler, if it is running"
+
+        if self.scheduler is None or self.scheduler.owns_thread():
+            return self._timed(func, *args)
+        return self.scheduler.submit(
+            self._timed, func, *args, priority=_priority(command), channel=_channel(command)
+        ).result()
+
+    def _timed(self, func, *args):
+        "run func and add the time it took to `bus_time`"
+
+        t0 = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            self.bus_time += time.monotonic() - t0
+            self.commands += 1
+
+    def start_scheduler(self):
+        """Start the command scheduler
+
+        From now on, all commands are executed by a single worker thread
+        that owns the connection. This makes it safe to use the instrument
+        from several threads: responses can no longer be mixed up and
+        safety commands like `off()` are served before routine measurements.
+        See `ET54.scheduler` for details.
+
+        returns the scheduler
+        """
+
+        if self.scheduler is None:
+            self.scheduler = scheduler()
+            self.scheduler.start()
+        return self.scheduler
+
+    def stop_scheduler(self):
+        "Finish pending commands and stop the command scheduler"
+
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
 
     def close(self):
         "close connection to instument"
+        self.stop_scheduler()
         self.connection.close()
 
     def beep(self):
@@ -136,12 +510,17 @@ Hardware:       {self.idn['hardware']}
         self.write("SYST:BEEP")
     
     def reset(self):
-        "Reset device to default"
-        self.connection.write("RST")
+        """Reset device to default
+
+        Use `wait_ready()` to wait until the device answers again.
+        """
+        self._dispatch("RST", self.connection.write, "RST")
+        for ch in self.Channels:
+            ch._written.clear()
 
     def trigger(self):
         "send trigger event"
-        self.connection.write("TRG")
+        self._dispatch("TRG", self.connection.write, "TRG")
 
     def unlock(self):
         """unlock the local interface
@@ -157,10 +536,14 @@ Hardware:       {self.idn['hardware']}
 
     def on(self):
         "turn on all inputs"
-        for ch in self.Channels:
-            ch.on()
+        if len(self.Channels) > 1:
+            channel_group(self, self.Channels).on()
+        else:
+            self.ch1.on()
     
     def off(self):
         "turn of all inputs"
-        for ch in self.Channels:
-            ch.off()
+        if len(self.Channels) > 1:
+            channel_group(self, self.Channels).off()
+        else:
+            self.ch1.off()
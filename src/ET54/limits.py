@@ -0,0 +1,85 @@
+"""Model limits for client-side validation
+
+Values from the SCPI manual and the data sheets. Voltage and current limits
+depend on the range, they are given as (HIGH, LOW). Power limits are per
+channel.
+"""
+
+# fmt: off
+MODELS = {
+    "ET5406":   dict(V=(150, 20), I=(40, 3), P=200, OVP=(155, 21), OCP=(45, 3.3), OPP=210),
+    "ET5407":   dict(V=(500, 20), I=(15, 3), P=200, OVP=(520, 21), OCP=(16, 3.3), OPP=210),
+    "ET5410":   dict(V=(150, 20), I=(40, 3), P=400, OVP=(155, 21), OCP=(45, 3.3), OPP=420),
+    "ET5411":   dict(V=(500, 20), I=(15, 3), P=400, OVP=(520, 21), OCP=(16, 3.3), OPP=420),
+    "ET5420":   dict(V=(150, 20), I=(20, 3), P=200, OVP=(155, 21), OCP=(22, 3.3), OPP=220),
+}
+# fmt: on
+
+# model independent bounds
+BOUNDS = {
+    "R": (0.01, 5000),
+    "TRANSIENT_width": (50, 60000),     # [ms]
+    "LIST_num": (1, 10),
+    "LIST_delay": (1, 60000),           # [s]
+    "BATT_time": (1, 60000),            # [s]
+    "BATT_energy": (0, 9999),           # [Wh]
+    "BATT_capacity": (0, 9999),         # [Ah]
+}
+
+# quantity checked for a value of the given unit
+UNITS = {"V": "V", "A": "I", "W": "P", "Ω": "R"}
+
+# quantity of the value of a LIST row or SCAN setting per (sub)mode
+MODE_QUANTITY = {"CC": "I", "SHORT": "I", "CV": "V", "OPEN": "V", "CP": "P", "CR": "R"}
+
+
+def model_limits(model):
+    "limits of `model` (e.g. 'ET5410A+') or None if the model is unknown"
+
+    if model is None:
+        return None
+    return MODELS.get(model.upper().removesuffix("A+"))
+
+
+class limits:
+    """check values against the limits of one model
+
+    model       model ID, e.g. 'ET5420A+'. For unknown models only the model
+                independent bounds are checked.
+
+    Voltage and current limits depend on the range. `check` uses the ranges
+    passed to it and falls back to HIGH, the wider one, so no valid value is
+    ever rejected. The device still checks against its actual range.
+    """
+
+    def __init__(self, model=None):
+        self.model = model
+        self.table = model_limits(model)
+
+    def bounds(self, quantity, Vrange="HIGH", Crange="HIGH"):
+        "(min, max) for `quantity` (V, I, P, R, OVP, OCP, OPP or a BOUNDS key)"
+
+        if quantity in BOUNDS:
+            return BOUNDS[quantity]
+        if self.table is None or quantity not in self.table:
+            return None
+        high = self.table[quantity]
+        if isinstance(high, tuple):
+            rng = Crange if quantity in ("I", "OCP") else Vrange
+            high = high[0] if (rng or "HIGH").upper() == "HIGH" else high[1]
+        return (0, high)
+
+    def check(self, name, quantity, value, Vrange="HIGH", Crange="HIGH"):
+        "raise ValueError if `value` of the setting `name` is out of bounds"
+
+        bounds = self.bounds(quantity, Vrange, Crange)
+        if bounds is None:
+            return
+        low, high = bounds
+        try:
+            ok = low <= float(value) <= high
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for {name}: '{value}'")
+        if not ok:
+            where = f" ({self.model})" if quantity not in BOUNDS else ""
+            raise ValueError(f"{name} must be between {low} and {high}{where}, not {value}")
@@ -0,0 +1,111 @@
+"Host-driven load effect (load regulation) test"
+
+import math, time
+import numpy as np
+
+
+def load_effect(channels, currents, tolerance=0.005, samples=5, timeout=10, interval=0):
+    """Step the load current and measure how the source voltage responds
+
+    channels    channel object or list of channels (one DUT per channel).
+                All channels are stepped together, so on two-channel models
+                both DUTs settle at the same time.
+    currents    CC current points [A], in the order they are applied
+    tolerance   voltage tolerance for settle detection [V]
+    samples     number of `read_all()` samples per point for the statistics
+    timeout     give up waiting for a point to settle after this time [s].
+                The point is measured anyway and flagged in `settled`.
+    interval    minimum time between samples [s]
+
+    The channels are put into CC mode and switched on for the test and
+    switched off afterwards.
+
+    Returns a report dict per channel (or just the report for a single
+    channel) with NumPy arrays per current point
+
+        set         current setpoint [A]
+        I           mean measured current [A]
+        V           mean voltage [V]
+        V_std, V_min, V_max   voltage statistics over the samples [V]
+        settle      settle time [s] (NaN if not settled)
+        settled     True if the point settled within `timeout`
+        dV          V - V_nl [V]
+        dV_rel      dV relative to V_nl [%]
+
+    and the figures
+
+        V_nl        voltage at the lowest current [V]
+        V_fl        voltage at the highest current [V]
+        regulation  load regulation (V_nl - V_fl) / V_fl [%]
+        R_out       source resistance from a linear fit of V over I [Ω]
+    """
+
+    single = not isinstance(channels, (list, tuple))
+    channels = [channels] if single else list(channels)
+    currents = [float(x) for x in currents]
+    if len(currents) < 2:
+        raise ValueError("load effect test needs at least two current points")
+    for ch in channels:
+        ch.validate({"CC_current": max(currents), "mode": "CC"})
+
+    raw = {ch.name: [] for ch in channels}
+    try:
+        for ch in channels:
+            ch.CC_current = currents[0]
+            ch.mode = "CC"
+            ch.on()
+        for i, current in enumerate(currents):
+            if i:
+                for ch in channels:
+                    ch.CC_current = current
+            # the channels settle in parallel: waiting for one gives the
+            # others time, so their wait is short
+            settle = {}
+            for ch in channels:
+                try:
+                    settle[ch.name] = ch.wait_settled("V", tolerance, timeout=timeout)[0]
+                except RuntimeError:
+                    settle[ch.name] = math.nan
+            values = {ch.name: [] for ch in channels}
+            for n in range(samples):
+                t = time.monotonic()
+                for ch in channels:
+                    values[ch.name].append(ch.read_all())
+                if interval and n < samples - 1:
+                    time.sleep(max(0, interval - (time.monotonic() - t)))
+            for ch in channels:
+                raw[ch.name].append((current, settle[ch.name], values[ch.name]))
+    finally:
+        for ch in channels:
+            ch.off()
+
+    reports = {name: _report(points) for name, points in raw.items()}
+    return reports[channels[0].name] if single else reports
+
+
+def _report(points):
+    "regulation figures from [(setpoint, settle time, [(V, I, P, R), ...]), ...]"
+
+    data = np.array([values for _, _, values in points])  # point, sample, VIPR
+    V = data[:, :, 0]
+    I = data[:, :, 1].mean(axis=1)
+    settle = np.array([s for _, s, _ in points])
+    report = dict(
+        set=np.array([x for x, _, _ in points]),
+        I=I,
+        V=V.mean(axis=1),
+        V_std=V.std(axis=1),
+        V_min=V.min(axis=1),
+        V_max=V.max(axis=1),
+        settle=settle,
+        settled=~np.isnan(settle),
+    )
+    V_nl = report["V"][np.argmin(I)]
+    V_fl = report["V"][np.argmax(I)]
+    report["dV"] = report["V"] - V_nl
+    report["dV_rel"] = report["dV"] / V_nl * 100
+    report["V_nl"] = V_nl
+    report["V_fl"] = V_fl
+    report["regulation"] = (V_nl - V_fl) / V_fl * 100
+    report["R_out"] = -np.polyfit(I, report["V"], 1)[0] if np.ptp(I) > 0 else math.nan
+    return report
@@ -0,0 +1,181 @@
+"Closed-loop maximum power point tracking"
+
+import time
+import numpy as np
+
+
+class mppt:
+    """Maximum power point tracker for solar panels and energy harvesters
+
+    The tracker perturbs the setpoint of a channel in CV (`CV_voltage`) or
+    CP (`CP_power`) mode and observes the power measured by `read_all()`.
+    Each update costs exactly one write and one `read_all()` query.
+
+    ch          channel object
+    algorithm   PO   perturb and observe
+                INC  incremental conductance (CV mode only)
+    mode        {CV|CP}
+    start       initial setpoint [V|W] (default: current setpoint)
+    step        perturbation step [V|W] at a round trip time of `rtt_ref`
+    step_min    smallest perturbation step (default: step / 10)
+    step_max    largest perturbation step (default: step * 10)
+    rtt_ref     reference round trip time [s]
+    band        relative power band around the best power point that counts
+                as "at MPP" for the dwell time statistics
+
+    The perturbation step is scaled with the measured round trip time: the
+    slower the loop, the further the source drifts between updates and the
+    larger the step has to be to keep up. A fast loop takes finer steps and
+    settles closer to the MPP.
+
+    Every update is appended to `log` as a tuple
+    (t, setpoint, V, I, P, rtt) with `t` in seconds since the first update.
+    """
+
+    def __init__(
+        self,
+        ch,
+        algorithm="PO",
+        mode="CV",
+        start=None,
+        step=0.1,
+        step_min=None,
+        step_max=None,
+        rtt_ref=0.6,
+        band=0.01,
+    ):
+        self.ch = ch
+        self.algorithm = algorithm.upper()
+        self.mode = mode.upper()
+        if self.mode not in ("CV", "CP"):
+            raise ValueError(f"MPPT mode must be 'CV' or 'CP', not '{mode}'")
+        if self.algorithm not in ("PO", "INC"):
+            raise ValueError(f"Unknown MPPT algorithm '{algorithm}'")
+        if self.algorithm == "INC" and self.mode != "CV":
+            raise ValueError("Incremental conductance requires CV mode")
+        self._attr = "CV_voltage" if self.mode == "CV" else "CP_power"
+
+        self.step_ref = step
+        self.step_min = step / 10 if step_min is None else step_min
+        self.step_max = step * 10 if step_max is None else step_max
+        self.rtt_ref = rtt_ref
+        self.band = band
+        self.setpoint = getattr(ch, self._attr) if start is None else start
+        self.direction = 1
+        self.log = []
+        self._t0 = None
+        self._last = None
+
+    def _step(self, rtt):
+        "perturbation step scaled by the round trip time"
+        step = self.step_ref * rtt / self.rtt_ref
+        return min(max(step, self.step_min), self.step_max)
+
+    def update(self):
+        """apply the current setpoint, measure and compute the next one
+
+        returns the log entry of this update"""
+
+        t_start = time.monotonic()
+        if self._t0 is None:
+            self._t0 = t_start
+        setattr(self.ch, self._attr, round(self.setpoint, 3))
+        V, I, P, R = self.ch.read_all()
+        rtt = time.monotonic() - t_start
+        entry = (t_start - self._t0, self.setpoint, V, I, P, rtt)
+        self.log.append(entry)
+
+        step = self._step(rtt)
+        if self._last is not None:
+            _, _, V0, I0, P0, _ = self._last
+            if self.algorithm == "PO":
+                if P < P0:
+                    self.direction = -self.direction
+            else:
+                dV, dI = V - V0, I - I0
+                if dV == 0:
+                    if dI != 0:
+                        # source current changed at constant voltage
+                        self.direction = 1 if dI > 0 else -1
+                    else:
+                        step = 0
+                elif V != 0:
+                    # dP/dV = I + V * dI/dV; positive left of the MPP
+                    g = dI / dV + I / V
+                    if abs(g) * V < 1e-3 * max(abs(I), 1e-6):
+                        step = 0
+                    else:
+                        self.direction = 1 if g > 0 else -1
+        self._last = (entry[0], self.setpoint, V, I, P, rtt)
+        self.setpoint = max(self.setpoint + self.direction * step, 0)
+        return entry
+
+    def run(self, duration=None, iterations=None, callback=None):
+        """run the tracking loop
+
+        duration    stop after this many seconds
+        iterations  stop after this many updates
+        callback    called with every log entry; return True to stop
+
+        The loop runs as fast as the connection allows. Without
+        `duration` or `iterations` it runs until `callback` stops it or
+        the process is interrupted. If the loop is interrupted (Ctrl-C) or
+        fails, the input is switched off and the exception is raised
+        again; `summary()` still has the statistics up to that point.
+
+        returns `summary()`
+        """
+
+        if self.ch.mode != self.mode:
+            self.ch.mode = self.mode
+        t_end = None if duration is None else time.monotonic() + duration
+        n = 0
+        try:
+            while True:
+                entry = self.update()
+                n += 1
+                if callback is not None and callback(entry):
+                    break
+                if iterations is not None and n >= iterations:
+                    break
+                if t_end is not None and time.monotonic() >= t_end:
+                    break
+        except BaseException:
+            # do not leave the source loaded at an unknown setpoint
+            self.ch.off()
+            raise
+        return self.summary()
+
+    def summary(self):
+        """tracking statistics
+
+        P_max           best power seen [W]
+        P_mean          mean power over the run [W]
+        efficiency      P_mean / P_max
+        dwell           time spent within `band` of P_max [s]
+        dwell_fraction  dwell / total time
+        rate            updates per second
+        rtt_mean        mean round trip time [s]
+        setpoint        last setpoint [V|W]
+
+        returns None before the first update
+        """
+
+        if not self.log:
+            return None
+        t, _, _, _, P, rtt = np.array(self.log, dtype=float).T
+        dt = np.diff(t, append=t[-1] + rtt[-1])
+        P_max = P.max()
+        total = dt.sum()
+        P_mean = (P * dt).sum() / total
+        dwell = dt[P >= P_max * (1 - self.band)].sum()
+        return dict(
+            P_max=float(P_max),
+            P_mean=float(P_mean),
+            efficiency=float(P_mean / P_max) if P_max > 0 else 0.0,
+            dwell=float(dwell),
+            dwell_fraction=float(dwell / total),
+            rate=float(len(t) / total),
+            rtt_mean=float(rtt.mean()),
+            setpoint=self.setpoint,
+        )
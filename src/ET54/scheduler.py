@@ -0,0 +1,140 @@
+"Thread-safe priority command scheduler for a shared connection"
+
+import re, threading
+from collections import deque
+from concurrent.futures import Future
+
+CRITICAL = 0
+HIGH = 1
+NORMAL = 2
+LOW = 3
+
+_channel_re = re.compile(r"^[A-Za-z*]+(\d)")
+
+
+def _priority(command):
+    "default priority of a SCPI command"
+
+    command = command.upper()
+    if command.endswith("SW OFF"):
+        return CRITICAL
+    if command.startswith("MEAS"):
+        return LOW
+    return NORMAL
+
+
+def _channel(command):
+    "channel a SCPI command refers to (or None)"
+
+    m = _channel_re.match(command)
+    return m.group(1) if m else None
+
+
+class scheduler:
+    """Single owner of the instrument connection
+
+    All requests are executed one at a time on a worker thread, so
+    acquisition, control and UI threads can share one load without mixing
+    up responses. Requests are served by priority:
+
+    CRITICAL    safety commands like switching inputs off
+    HIGH        explicitly prioritized requests
+    NORMAL      configuration and other commands
+    LOW         routine `MEAS` polling
+
+    Within a priority level, channels are served round-robin so polling one
+    channel cannot starve the other.
+
+    The scheduler is usually managed by the instrument:
+
+        el.start_scheduler()
+        ...
+        el.stop_scheduler()
+
+    While it is running, `write`/`query` of the instrument and all channels
+    transparently go through the scheduler.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queues = [dict() for _ in range(LOW + 1)]
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        "start the worker thread"
+
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._worker, name="ET54-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        "finish pending requests and stop the worker thread"
+
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None and not self.owns_thread():
+            self._thread.join()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def owns_thread(self):
+        "True if called from the worker thread"
+        return threading.current_thread() is self._thread
+
+    def submit(self, func, *args, priority=NORMAL, channel=None, **kwargs):
+        """queue `func(*args, **kwargs)` for execution on the worker thread
+
+        priority    CRITICAL|HIGH|NORMAL|LOW
+        channel     channel name for fair scheduling (or None)
+
+        returns a `concurrent.futures.Future`
+        """
+
+        future = Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Scheduler is not running")
+            queues = self._queues[priority]
+            queues.setdefault(channel, deque()).append((future, func, args, kwargs))
+            self._cond.notify()
+        return future
+
+    def _next(self):
+        "pop the next request – highest priority first, channels round-robin"
+
+        for queues in self._queues:
+            for channel in list(queues):
+                queue = queues.pop(channel)
+                request = queue.popleft()
+                if queue:
+                    # move the channel to the end of the rotation
+                    queues[channel] = queue
+                return request
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                request = self._next()
+                while request is None:
+                    if not self._running:
+                        return
+                    self._cond.wait()
+                    request = self._next()
+            future, func, args, kwargs = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
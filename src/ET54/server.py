@@ -0,0 +1,291 @@
+"""Network proxy daemon sharing one load between several clients
+
+Run as
+
+    python -m ET54.server ASRL/dev/ttyUSB0::INSTR --port 5054
+"""
+
+import os, re, sys, json, argparse, tempfile, threading, socketserver
+from collections import deque
+
+
+class proxy_server(socketserver.ThreadingTCPServer):
+    """TCP server that owns an ET54 connection
+
+    instrument  ET54 instance
+    acq         acquisition that provides samples and cached state
+    address     (host, port) to listen on
+
+    All clients share the samples and state of one acquisition, so the
+    serial traffic does not depend on the number of clients. Commands that
+    reach the device go through the command scheduler of the instrument.
+
+    The protocol is line based. Every request is one line, every reply is
+    one line starting with `OK` (followed by a JSON value) or `ERR`
+    (followed by a message):
+
+        QUERY <scpi>            raw SCPI query
+        WRITE <scpi>            raw SCPI command
+        GET <ch> <attribute>    read a channel attribute or measurement,
+                                e.g. GET 1 CC_current, GET 1 read_all
+        SET <ch> <attribute> <value>
+                                set a channel setting; value is JSON or a
+                                plain string, e.g. SET 1 CC_current 1.5.
+                                Only settings of the command table and
+                                properties with a setter can be set.
+        ON [<ch>]               turn input(s) on
+        OFF [<ch>]              turn input(s) off (never blocked by a lock)
+        SAMPLE [<ch>]           latest sample(s) from the acquisition
+        STATE                   cached channel state
+        IDN                     device identification
+        SUBSCRIBE               stream all samples as JSON lines until the
+                                client disconnects
+        LOCK / UNLOCK           take/release exclusive control. While a
+                                client holds the lock, control commands of
+                                other clients are rejected.
+        QUIT                    close the connection
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, instrument, acq, address=("127.0.0.1", 5054)):
+        self.instrument = instrument
+        self.acq = acq
+        self.owner = None
+        self.clients = 0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._recent = deque(maxlen=1000)
+        super().__init__(address, _handler)
+        acq.add_sink(self._feed)
+
+    def _feed(self, s):
+        "acquisition sink: fan out samples to subscribers"
+
+        with self._cond:
+            self._seq += 1
+            self._recent.append((self._seq, s))
+            self._cond.notify_all()
+
+    def samples_since(self, seq, timeout=None):
+        "wait for samples newer than `seq`; returns (seq, samples)"
+
+        with self._cond:
+            if self._seq == seq:
+                self._cond.wait(timeout)
+            return self._seq, [s for n, s in self._recent if n > seq]
+
+    def acquire(self, client):
+        with self._lock:
+            if self.owner not in (None, client):
+                return False
+            self.owner = client
+            return True
+
+    def release(self, client):
+        with self._lock:
+            if self.owner is client:
+                self.owner = None
+
+    def may_control(self, client):
+        with self._lock:
+            return self.owner in (None, client)
+
+
+def _settable(ch, attribute):
+    "True if `attribute` is a device setting clients may change"
+
+    # imported here: `et54` imports this module and must start without numpy
+    from .channel import _setting
+
+    setting = getattr(type(ch), attribute, None)
+    if isinstance(setting, _setting):
+        return not setting.cmd.readonly
+    return isinstance(setting, property) and setting.fset is not None
+
+
+def _sample(s):
+    return dict(s._asdict())
+
+
+class _handler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.clients += 1
+
+    def finish(self):
+        self.server.release(self)
+        with self.server._lock:
+            self.server.clients -= 1
+        super().finish()
+
+    def reply(self, ok, value=None):
+        if ok:
+            line = "OK" if value is None else "OK " + json.dumps(value)
+        else:
+            line = f"ERR {value}"
+        self.wfile.write((line + "\n").encode())
+        self.wfile.flush()
+
+    def channel(self, name):
+        for ch in self.server.instrument.Channels:
+            if ch.name == name:
+                return ch
+        raise ValueError(f"No channel '{name}'")
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.decode(errors="replace").strip()
+            if not line:
+                continue
+            cmd, _, args = line.partition(" ")
+            cmd = cmd.upper()
+            if cmd == "QUIT":
+                return
+            if cmd == "SUBSCRIBE":
+                self.subscribe()
+                return
+            try:
+                self.reply(True, self.dispatch(cmd, args.strip()))
+            except Exception as e:
+                self.reply(False, str(e).replace("\n", " "))
+
+    def dispatch(self, cmd, args):
+        server = self.server
+        el = server.instrument
+        control = cmd in ("WRITE", "SET", "ON", "QUERY")
+        if control and not server.may_control(self):
+            raise RuntimeError("Load is locked by another client")
+
+        match cmd:
+            case "QUERY":
+                return el.query(args)
+            case "WRITE":
+                el.write(args)
+            case "GET":
+                name, attribute = args.split()
+                if attribute.startswith("_"):
+                    raise ValueError(f"Invalid attribute '{attribute}'")
+                value = getattr(self.channel(name), attribute)
+                if callable(value):
+                    if not attribute.startswith("read_"):
+                        raise ValueError(f"Invalid attribute '{attribute}'")
+                    return value()
+                return value
+            case "SET":
+                name, attribute, value = args.split(maxsplit=2)
+                if not _settable(self.channel(name), attribute):
+                    raise ValueError(f"Invalid attribute '{attribute}'")
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+                setattr(self.channel(name), attribute, value)
+            case "ON":
+                if args:
+                    self.channel(args).on()
+                else:
+                    el.on()
+            case "OFF":
+                if args:
+                    self.channel(args).off()
+                else:
+                    el.off()
+            case "SAMPLE":
+                last = server.acq.last
+                if args:
+                    return _sample(last[args]) if args in last else None
+                return {name: _sample(s) for name, s in last.items()}
+            case "STATE":
+                return server.acq.state_snapshot()
+            case "IDN":
+                return el.idn
+            case "LOCK":
+                if not server.acquire(self):
+                    raise RuntimeError("Load is locked by another client")
+            case "UNLOCK":
+                server.release(self)
+            case _:
+                raise ValueError(f"Unknown command '{cmd}'")
+
+    def subscribe(self):
+        self.reply(True)
+        seq = self.server._seq
+        try:
+            while True:
+                seq, samples = self.server.samples_since(seq, timeout=5)
+                for s in samples:
+                    self.wfile.write((json.dumps(_sample(s)) + "\n").encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def session_file(RID):
+    """path of the session file announcing a running daemon for `RID`
+
+    The file contains the host, port and process ID of the daemon as JSON.
+    """
+
+    name = re.sub(r"[^A-Za-z0-9]+", "_", RID).strip("_")
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"et54-{name}.json")
+
+
+def serve(RID, host="127.0.0.1", port=5054, interval=1.0, state_every=10, model=None):
+    """open the load, start acquisition and serve clients until interrupted
+
+    While serving, a session file (see `session_file`) announces the
+    daemon, so the `et54` command line tool can reuse it.
+    """
+
+    from .instrument import ET54
+    from .acquisition import acquisition
+
+    el = ET54(RID, model=model)
+    el.start_scheduler()
+    acq = acquisition(el.Channels, interval=interval)
+    acq.add_state(every=state_every)
+    server = proxy_server(el, acq, (host, port))
+    path = session_file(RID)
+    with open(path, "w") as fh:
+        json.dump(
+            {"host": host, "port": server.server_address[1], "pid": os.getpid()}, fh
+        )
+    acq.start()
+    print(f"Serving {el.idn['model']} on {host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        server.server_close()
+        acq.stop()
+        el.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Share an ET54 electronic load with several clients over TCP."
+    )
+    parser.add_argument("RID", help="pyvisa resource ID, e.g. ASRL/dev/ttyUSB0::INSTR")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=5054, help="TCP port")
+    parser.add_argument("--interval", type=float, default=1.0, help="acquisition interval [s]")
+    parser.add_argument("--state-every", type=int, default=10,
+                        help="refresh one cached state field every n cycles")
+    parser.add_argument("--model", default=None, help="model ID if *IDN? is not valid")
+    args = parser.parse_args()
+    serve(args.RID, args.host, args.port, args.interval, args.state_every, args.model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"Checkpoint journal for long-running tests that survives a crash of the host"
+
+import os, json, time
+
+FIELDS = ("mode", "input", "BATT_capacity", "BATT_energy")
+
+
+class session:
+    """Keep the run state of a long test in a journal file
+
+    path        journal file (JSON)
+    ch          channel object
+    every       minimum time between two checkpoints [s]
+    fields      channel attributes recorded with every checkpoint and
+                compared on `resume()`
+
+    The journal holds
+
+        state       run state of the test script (`checkpoint(**state)`),
+                    e.g. stage index, host integrated Ah/Wh, log file name
+        config      the channel configuration last applied with `apply()`
+        device      values of `fields` at the last checkpoint
+        t           time of the last checkpoint (`time.time()`)
+
+    It is replaced atomically, so a crash leaves either the previous or the
+    new checkpoint behind, never a partial one.
+
+    The load keeps running when the host goes away (e.g. a battery
+    discharge stops at the cutoff set on the device). After a restart,
+    `resume()` reads the journal and checks that the device is still in the
+    recorded state, so the test can carry on without reprogramming the
+    channel. Numeric fields (the BATT capacity and energy counters) must not
+    have gone down; their increase since the last checkpoint is available
+    in `gap`, so what the device measured while the host was down is not
+    lost.
+    """
+
+    def __init__(self, path, ch, every=30, fields=FIELDS):
+        self.path = path
+        self.ch = ch
+        self.every = every
+        self.fields = tuple(fields)
+        self.state = {}
+        self.config = {}
+        self.device = {}
+        self.gap = {}
+        self.t = None
+        self.resumed = False
+
+    def resume(self):
+        """continue the session recorded in the journal
+
+        Nothing is sent to the device. `state`, `config` and `device` are
+        restored, `device` is updated to the current values and `gap` holds
+        the increase of the numeric fields and the time (`t`) since the last
+        checkpoint.
+
+        returns True if there was a session to resume, False if there is no
+        journal. Raises RuntimeError if the device does not match the
+        journal.
+        """
+
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as fh:
+            journal = json.load(fh)
+        now = self._snapshot()
+        saved = journal["device"]
+        for name, value in saved.items():
+            if name not in now:
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if now[name] < value:
+                    raise RuntimeError(
+                        f"Cannot resume: {name} went down from {value} to {now[name]}"
+                    )
+            elif name != "input" and now[name] != value:
+                raise RuntimeError(f"Cannot resume: {name} is '{now[name]}', expected '{value}'")
+        mode = journal["config"].get("mode")
+        if mode is not None and "mode" in now and now["mode"].upper() != str(mode).upper():
+            raise RuntimeError(f"Cannot resume: mode is '{now['mode']}', expected '{mode}'")
+
+        self.state = journal["state"]
+        self.config = journal["config"]
+        self.gap = {
+            name: now[name] - value
+            for name, value in saved.items()
+            if name in now and isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        self.gap["t"] = time.time() - journal["t"]
+        self.device = now
+        self.t = journal["t"]
+        self.resumed = True
+        return True
+
+    def apply(self, config):
+        """apply channel settings and record them in the journal
+
+        config      {setting: value}, applied in the given order. Settings
+                    that already have the recorded value are not sent again.
+        """
+
+        self.ch.validate(config)
+        for name, value in config.items():
+            if self.config.get(name) != value:
+                setattr(self.ch, name, value)
+                self.config[name] = value
+
+    def checkpoint(self, force=False, **state):
+        """update the run state and write the journal
+
+        The journal is written if `force` is set or the last checkpoint is
+        at least `every` seconds old. Writing it queries `fields` from the
+        device. If that fails, the journal is written with the previous
+        device values and the error is raised afterwards.
+
+        returns True if the journal was written
+        """
+
+        self.state.update(state)
+        now = time.time()
+        if not force and self.t is not None and now - self.t < self.every:
+            return False
+        error = None
+        try:
+            self.device = self._snapshot()
+        except Exception as e:
+            error = e
+        self.t = now
+        journal = dict(state=self.state, config=self.config, device=self.device, t=self.t)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(journal, fh, indent=1)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        if error is not None:
+            raise error
+        return True
+
+    def finish(self):
+        "end the session and remove the journal"
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.t = None
+
+    def _snapshot(self):
+        "current values of `fields`"
+        return {name: getattr(self.ch, name) for name in self.fields}
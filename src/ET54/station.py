@@ -0,0 +1,223 @@
+"Pipelined production station for qualification (pass/fail) testing"
+
+import sys, csv, time, queue, threading, os.path
+
+PHASES = ("identify", "wait", "configure", "settle", "measure", "persist")
+
+
+class station:
+    """Test many DUTs with the qualification mode of one channel
+
+    ch          channel object
+    config      settings applied before every DUT, e.g.
+                {"mode": "CC", "CC_current": 1.0, "QUALI_Vrange": (4.75, 5.25),
+                 "QUALI_Crange": (0.9, 1.1), "QUALI_Prange": (4, 6)}
+    identify    callable returning the ID (barcode) of the next DUT, or
+                None/"" when there are no more. Default: read from stdin.
+    settle      time to wait after switching the input on [s]
+    stable      arguments for `wait_settled` after the `settle` time, e.g.
+                {"quantity": "V", "tolerance": 0.01}. None: do not wait.
+    logfile     CSV file to append the results to (optional)
+
+    Every DUT goes through the phases
+
+        identify    get the DUT ID (host)
+        configure   apply `config` (only changed values are sent) and switch
+                    the input on
+        settle      let the DUT settle (fixed time, then `wait_settled`)
+        measure     read `QUALI_result` and `read_all()`, switch input off
+        persist     hand the result to the sinks (host)
+
+    The host phases run on their own threads, so scanning the next barcode
+    and writing results happen while the current DUT is on the load. The
+    device is idle only while waiting for the next ID (phase `wait`).
+
+    Results are dicts with the keys `dut`, `result`, `V`, `I`, `P`, `R`,
+    `t` (start, `time.time()`) and `phases` (duration of every phase [s]).
+    They are collected in `results` and passed to all sinks (`add_sink`),
+    which run on the persist thread.
+    """
+
+    def __init__(self, ch, config, identify=None, settle=0.5, stable=None, logfile=None):
+        self.ch = ch
+        self.config = dict(config)
+        self.config.setdefault("QUALI_state", "ON")
+        self.identify = identify or _barcode
+        self.settle = settle
+        self.stable = stable
+        self.logfile = logfile
+        self.sinks = []
+        self.results = []
+        self.elapsed = 0
+        self._applied = {}
+        self.ch.validate(self.config)
+
+    def add_sink(self, sink):
+        "register a callable that receives every result"
+        self.sinks.append(sink)
+
+    def run(self, count=None):
+        """test DUTs until `identify` returns nothing or `count` DUTs are done
+
+        returns the list of results
+        """
+
+        ids = queue.Queue(maxsize=1)
+        done = queue.Queue()
+        errors = []
+        stop = threading.Event()
+
+        def identify():
+            n = 0
+            while not stop.is_set() and (count is None or n < count):
+                t0 = time.perf_counter()
+                try:
+                    dut = self.identify()
+                except Exception as e:
+                    errors.append(e)
+                    dut = None
+                if not dut:
+                    break
+                ids.put((dut, time.perf_counter() - t0))
+                n += 1
+            ids.put(None)
+
+        def persist():
+            while (result := done.get()) is not None:
+                t0 = time.perf_counter()
+                try:
+                    self._persist(result)
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+                result["phases"]["persist"] = time.perf_counter() - t0
+                self.results.append(result)
+
+        threads = [
+            threading.Thread(target=identify, name="ET54-station-identify", daemon=True),
+            threading.Thread(target=persist, name="ET54-station-persist", daemon=True),
+        ]
+        for t in threads:
+            t.start()
+        t_start = time.perf_counter()
+        try:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                item = ids.get()
+                if item is None:
+                    break
+                dut, t_identify = item
+                t_wait = time.perf_counter() - t0
+                result = self._test(dut)
+                result["phases"]["identify"] = t_identify
+                result["phases"]["wait"] = t_wait
+                done.put(result)
+        finally:
+            stop.set()
+            done.put(None)
+            threads[1].join()
+            self.elapsed = time.perf_counter() - t_start
+        if errors:
+            raise errors[0]
+        return self.results
+
+    def _test(self, dut):
+        "run the device phases for one DUT"
+
+        ch = self.ch
+        phases = {}
+        result = dict(dut=dut, result=None, V=None, I=None, P=None, R=None)
+        result["t"] = time.time()
+        t = time.perf_counter()
+        try:
+            self._configure()
+            ch.on()
+            phases["configure"], t = _lap(t)
+            time.sleep(self.settle)
+            if self.stable is not None:
+                ch.wait_settled(**self.stable)
+            phases["settle"], t = _lap(t)
+            result["result"] = ch.QUALI_result
+            result["V"], result["I"], result["P"], result["R"] = ch.read_all()
+        except Exception as e:
+            result["result"] = f"ERROR: {e}"
+            self._applied.clear()  # state unknown, configure from scratch
+        finally:
+            try:
+                ch.off()
+            except Exception as e:
+                print(f"Station: cannot switch input off: {e}", file=sys.stderr)
+            phases["measure"], t = _lap(t)
+        for phase in ("configure", "settle"):
+            phases.setdefault(phase, 0)
+        result["phases"] = phases
+        return result
+
+    def _configure(self):
+        "apply the settings that differ from what was set for the last DUT"
+
+        for name, value in self.config.items():
+            if self._applied.get(name) != value:
+                setattr(self.ch, name, value)
+                self._applied[name] = value
+
+    def _persist(self, result):
+        if self.logfile is not None:
+            new = not os.path.exists(self.logfile)
+            with open(self.logfile, "a", newline="") as fh:
+                writer = csv.writer(fh)
+                if new:
+                    writer.writerow(("t", "dut", "result", "V", "I", "P", "R"))
+                writer.writerow(
+                    [result[k] for k in ("t", "dut", "result", "V", "I", "P", "R")]
+                )
+        for sink in self.sinks:
+            sink(result)
+
+    def stats(self):
+        """throughput and time breakdown of the last run
+
+        returns a dict with `units`, `passed`, `elapsed` [s], `uph` (units per
+        hour) and `phases` {phase: (total, mean)} [s]
+        """
+
+        n = len(self.results)
+        phases = {}
+        for phase in PHASES:
+            total = sum(r["phases"].get(phase, 0) for r in self.results)
+            phases[phase] = (total, total / n if n else 0)
+        return dict(
+            units=n,
+            passed=sum(str(r["result"]).upper() == "PASS" for r in self.results),
+            elapsed=self.elapsed,
+            uph=n / self.elapsed * 3600 if self.elapsed else 0,
+            phases=phases,
+        )
+
+    def report(self):
+        "human readable summary of the last run"
+
+        s = self.stats()
+        ret = [
+            f"{s['units']} units, {s['passed']} passed, {s['elapsed']:.1f} s, "
+            f"{s['uph']:.0f} units/h",
+            f"{'phase':10} {'total':>9} {'mean':>9}",
+        ]
+        for phase, (total, mean) in s["phases"].items():
+            host = "  (host, overlapped)" if phase in ("identify", "persist") else ""
+            ret.append(f"{phase:10} {total:8.2f}s {mean:8.3f}s{host}")
+        return "\n".join(ret)
+
+
+def _lap(t):
+    "time since `t` and the current time"
+    now = time.perf_counter()
+    return now - t, now
+
+
+def _barcode():
+    "read a DUT ID from stdin (empty line: stop)"
+    try:
+        return input("Scan DUT barcode (empty to stop): ").strip()
+    except EOFError:
+        return None
@@ -0,0 +1,246 @@
+"In-memory sample store with multi-resolution aggregate tiers"
+
+import math, threading
+import numpy as np
+
+_QUANTITIES = ("V", "I", "P", "R")
+
+
+class _table:
+    """append-only table of float rows backed by a growing NumPy array
+
+    At most `maxlen` rows are kept (None: no limit). When the table is full,
+    the oldest quarter of the rows is dropped.
+    """
+
+    def __init__(self, ncols, capacity=1024, maxlen=None):
+        if maxlen is not None:
+            capacity = min(capacity, maxlen)
+        self.data = np.empty((capacity, ncols))
+        self.n = 0
+        self.maxlen = maxlen
+        self.trimmed = False
+
+    def append(self, row):
+        if self.n == len(self.data):
+            if self.maxlen is not None and self.n >= self.maxlen:
+                keep = self.n - max(self.n // 4, 1)
+                self.data[:keep] = self.data[self.n - keep : self.n]
+                self.n = keep
+                self.trimmed = True
+            else:
+                size = 2 * self.n if self.maxlen is None else min(2 * self.n, self.maxlen)
+                data = np.empty((size, self.data.shape[1]))
+                data[: self.n] = self.data
+                self.data = data
+        self.data[self.n] = row
+        self.n += 1
+
+    @property
+    def rows(self):
+        return self.data[: self.n]
+
+
+class _tier:
+    """aggregates of one channel in buckets of `width` seconds
+
+    columns: t (bucket start), count, min x4, max x4, mean x4
+    """
+
+    def __init__(self, width, maxlen=None):
+        self.width = width
+        self.table = _table(14, maxlen=maxlen)
+        self.k = None
+        self.count = 0
+        self.min = self.max = self.sum = None
+
+    def add(self, t, values):
+        k = math.floor(t / self.width)
+        if k != self.k:
+            if self.k is not None:
+                self.table.append(self.current())
+            self.k = k
+            self.count = 0
+            self.min = values.copy()
+            self.max = values.copy()
+            self.sum = np.zeros(4)
+        self.count += 1
+        np.minimum(self.min, values, out=self.min)
+        np.maximum(self.max, values, out=self.max)
+        self.sum += values
+
+    def current(self):
+        "row of the open bucket"
+        return np.concatenate(
+            ([self.k * self.width, self.count], self.min, self.max, self.sum / self.count)
+        )
+
+    def rows(self, t0, t1):
+        "closed buckets starting in [t0, t1] plus the open one"
+
+        rows = self.table.rows
+        i0 = np.searchsorted(rows[:, 0], t0 - self.width, side="right")
+        i1 = np.searchsorted(rows[:, 0], t1, side="right")
+        rows = rows[i0:i1]
+        if self.k is not None and t0 - self.width < self.k * self.width <= t1:
+            rows = np.vstack((rows, self.current()))
+        return rows
+
+    def covers(self, t0):
+        "True if no bucket after `t0` has been dropped"
+        return not self.table.trimmed or self.table.rows[0, 0] <= t0
+
+    def estimate(self, t0, t1):
+        "upper bound for the number of buckets in [t0, t1]"
+        return (t1 - t0) / self.width + 2
+
+
+class sample_store:
+    """Store samples and maintain min/max/mean tiers as they arrive
+
+    Use as an acquisition sink:
+
+        store = sample_store(tiers=(1, 60, 3600))
+        acq.add_sink(store)
+
+    tiers       bucket widths [s] of the aggregate tiers
+    retention   number of rows kept per channel of the raw samples and of
+                every tier (None: keep everything)
+
+    Aggregates are updated incrementally with every sample, so `query` can
+    serve any time range from the coarsest tier that still gives enough
+    points, without scanning the raw samples. Time ranges are located by
+    binary search.
+
+    The oldest rows are dropped when `retention` is reached, so memory use
+    is bounded on long runs. With the default of 100000 rows, a channel
+    sampled 10 times a second keeps the raw samples of the last 2.5 hours,
+    the 1 s tier covers a day and the coarser tiers months and years.
+    Older time ranges are served from the finest tier that still covers
+    them.
+    """
+
+    def __init__(self, tiers=(1, 60, 3600), retention=100000):
+        self.widths = sorted(tiers)
+        self.retention = retention
+        self.raw = {}
+        self.tiers = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, s):
+        values = np.array((s.V, s.I, s.P, s.R), dtype=float)
+        with self._lock:
+            if s.channel not in self.raw:
+                self.raw[s.channel] = _table(5, maxlen=self.retention)
+                self.tiers[s.channel] = [_tier(w, self.retention) for w in self.widths]
+            self.raw[s.channel].append((s.t, *values))
+            for tier in self.tiers[s.channel]:
+                tier.add(s.t, values)
+
+    @property
+    def channels(self):
+        return list(self.raw)
+
+    def span(self, channel):
+        "time of the oldest data kept and of the last sample of a channel"
+        with self._lock:
+            return self._first(channel), self.raw[channel].rows[-1, 0]
+
+    def _first(self, channel):
+        "time of the oldest data kept (a bucket start if raw samples were dropped)"
+        raw = self.raw[channel]
+        if not raw.trimmed:
+            return raw.rows[0, 0]
+        return min(tier.table.rows[0, 0] for tier in self.tiers[channel] if tier.table.n)
+
+    def query(self, channel, t0=None, t1=None, points=2000):
+        """samples of a channel in [t0, t1], reduced to about `points` rows
+
+        Raw samples are returned if there are few enough and none in the
+        range have been dropped, otherwise the finest tier that fits and
+        still covers `t0`.
+
+        returns a dict with `width` (bucket width [s], 0 for raw samples),
+        `t` and for every quantity Q the arrays `Q` (mean), `Q_min` and
+        `Q_max`.
+        """
+
+        with self._lock:
+            table = self.raw[channel]
+            raw = table.rows
+            t0 = self._first(channel) if t0 is None else t0
+            t1 = raw[-1, 0] if t1 is None else t1
+            i0 = np.searchsorted(raw[:, 0], t0, side="left")
+            i1 = np.searchsorted(raw[:, 0], t1, side="right")
+            if i1 - i0 <= points and (not table.trimmed or raw[0, 0] <= t0):
+                rows = raw[i0:i1].copy()
+                ret = dict(width=0, t=rows[:, 0])
+                for j, q in enumerate(_QUANTITIES):
+                    ret[q] = ret[q + "_min"] = ret[q + "_max"] = rows[:, 1 + j]
+                return ret
+            tiers = self.tiers[channel]
+            tier = tiers[-1]
+            for candidate in tiers:
+                if candidate.estimate(t0, t1) <= points and candidate.covers(t0):
+                    tier = candidate
+                    break
+            rows = tier.rows(t0, t1)
+        ret = dict(width=tier.width, t=rows[:, 0])
+        for j, q in enumerate(_QUANTITIES):
+            ret[q + "_min"] = rows[:, 2 + j]
+            ret[q + "_max"] = rows[:, 6 + j]
+            ret[q] = rows[:, 10 + j]
+        return ret
+
+    def window(self, channel, quantity, t0=None, t1=None, points=2000):
+        """raw samples of one quantity in [t0, t1], reduced with LTTB
+
+        Only the raw samples that are still kept (see `retention`) are used.
+
+        returns (t, values)
+        """
+
+        with self._lock:
+            raw = self.raw[channel].rows
+            t0 = raw[0, 0] if t0 is None else t0
+            t1 = raw[-1, 0] if t1 is None else t1
+            i0 = np.searchsorted(raw[:, 0], t0, side="left")
+            i1 = np.searchsorted(raw[:, 0], t1, side="right")
+            t = raw[i0:i1, 0].copy()
+            y = raw[i0:i1, 1 + _QUANTITIES.index(quantity)].copy()
+        idx = lttb(t, y, points)
+        return t[idx], y[idx]
+
+
+def lttb(x, y, n):
+    """Largest-Triangle-Three-Buckets downsampling
+
+    Selects `n` points of the series (x, y) that preserve its visual shape.
+    The first and the last point are always kept.
+
+    returns the indices of the selected points
+    """
+
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size) if n >= size else np.array([0, size - 1])[:n]
+
+    # bucket boundaries for the n - 2 inner buckets
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    idx = np.empty(n, dtype=int)
+    idx[0] = 0
+    idx[-1] = size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket (or the last point)
+        if i < n - 3:
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
@@ -0,0 +1,184 @@
+"Safety supervisor riding on the acquisition loop"
+
+import sys, time
+
+
+class supervisor:
+    """Turn all inputs off when user defined limits are crossed
+
+    The supervisor does not poll the device on its own. It is attached to an
+    `acquisition` and checks every sample as it passes by. The protection
+    state of the device (`LOAD:ABNO?`) is queried for one channel every
+    `protection_every` cycles, so the extra bus traffic is a fraction of a
+    query per cycle.
+
+    instrument          ET54 instance (used to switch inputs off)
+    acq                 acquisition to attach to
+    max_voltage         voltage limit [V]
+    max_current         runaway current limit [A]
+    max_power           power limit [W]
+    max_energy          energy budget per channel [Wh]
+    max_temperature     limit of the temperature proxy [K above ambient]
+    thermal_resistance  thermal resistance for the temperature proxy [K/W]
+    thermal_tau         thermal time constant for the temperature proxy [s]
+    protection_every    query the protection state every n cycles
+                        (None: never)
+    on_trip             callable, called with (channel, reason) after
+                        switching the inputs off was tried
+
+    The temperature proxy is a first order thermal model driven by the
+    measured power: dT/dt = (P * thermal_resistance - T) / thermal_tau.
+    It stands in for the heat sink temperature which cannot be queried.
+
+    Limits set to None are not checked. After a trip, the supervisor stays
+    tripped until `reset()` is called; `trips` lists all trips as
+    (time, channel, reason) tuples.
+
+    If the acquisition stops (after `retries` failed cycles in a row, see
+    `acquisition`), nothing is supervised any more, so the supervisor trips
+    with channel None.
+
+    If the inputs cannot be switched off, `off_pending` stays set and
+    switching off is tried again after every acquisition cycle. A failed
+    attempt counts as a failed cycle, so if it keeps failing, the
+    acquisition stops and passes the error to its error handlers.
+
+    When the command scheduler is running, switching off jumps ahead of all
+    queued commands. On two-channel models, both inputs are switched in one
+    interleaved transaction.
+    """
+
+    def __init__(
+        self,
+        instrument,
+        acq,
+        max_voltage=None,
+        max_current=None,
+        max_power=None,
+        max_energy=None,
+        max_temperature=None,
+        thermal_resistance=0.5,
+        thermal_tau=60,
+        protection_every=5,
+        on_trip=None,
+    ):
+        self.instrument = instrument
+        self.acq = acq
+        self.max_voltage = max_voltage
+        self.max_current = max_current
+        self.max_power = max_power
+        self.max_energy = max_energy
+        self.max_temperature = max_temperature
+        self.thermal_resistance = thermal_resistance
+        self.thermal_tau = thermal_tau
+        self.protection_every = protection_every
+        self.on_trip = on_trip
+        self.tripped = False
+        self.off_pending = False
+        self.trips = []
+        self.energy = {}
+        self.temperature = {}
+        self._last_t = {}
+        self._next_channel = 0
+
+    def attach(self):
+        "hook into the acquisition"
+
+        self.acq.add_sink(self.check)
+        self.acq.add_error_handler(self.stopped)
+        self.acq.add_task(self.switch_off)
+        if self.protection_every:
+            self.acq.add_task(self.check_protection, self.protection_every)
+
+    def detach(self):
+        self.acq.remove_sink(self.check)
+        self.acq.remove_error_handler(self.stopped)
+        self.acq.remove_task(self.switch_off)
+        self.acq.remove_task(self.check_protection)
+
+    def reset(self):
+        "clear the tripped state and the integrated energy and temperature"
+
+        self.tripped = False
+        self.energy = {}
+        self.temperature = {}
+        self._last_t = {}
+
+    def trip(self, channel, reason):
+        "switch all inputs off and record the reason"
+
+        if not self.tripped:
+            self.tripped = True
+            self.off_pending = True
+        self.trips.append((time.time(), channel, reason))
+        print(f"Supervisor tripped on channel {channel}: {reason}", file=sys.stderr)
+        try:
+            self.switch_off()
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+        if self.on_trip is not None:
+            self.on_trip(channel, reason)
+
+    def switch_off(self):
+        """switch all inputs off if a trip has not managed to yet
+
+        Raises RuntimeError if switching off fails.
+        """
+
+        if not self.off_pending:
+            return
+        try:
+            self.instrument.off()
+        except Exception as e:
+            raise RuntimeError(f"Supervisor cannot switch inputs off: {e}") from e
+        self.off_pending = False
+
+    def stopped(self, error):
+        "the acquisition died: nothing is supervised any more, so trip"
+        self.trip(None, f"acquisition stopped ({error})")
+
+    def check(self, s):
+        "check a single sample against all limits"
+
+        name = s.channel
+        t0 = self._last_t.get(name)
+        self._last_t[name] = s.t
+        if t0 is not None:
+            dt = s.t - t0
+            self.energy[name] = self.energy.get(name, 0.0) + s.P * dt / 3600
+            T = self.temperature.get(name, 0.0)
+            alpha = min(dt / self.thermal_tau, 1.0)
+            self.temperature[name] = T + (s.P * self.thermal_resistance - T) * alpha
+
+        if self.tripped:
+            return
+        if self.max_voltage is not None and s.V > self.max_voltage:
+            self.trip(name, f"voltage {s.V} V > {self.max_voltage} V")
+        elif self.max_current is not None and s.I > self.max_current:
+            self.trip(name, f"current {s.I} A > {self.max_current} A")
+        elif self.max_power is not None and s.P > self.max_power:
+            self.trip(name, f"power {s.P} W > {self.max_power} W")
+        elif (
+            self.max_energy is not None
+            and self.energy.get(name, 0.0) > self.max_energy
+        ):
+            self.trip(name, f"energy budget of {self.max_energy} Wh exhausted")
+        elif (
+            self.max_temperature is not None
+            and self.temperature.get(name, 0.0) > self.max_temperature
+        ):
+            self.trip(
+                name,
+                f"temperature proxy {self.temperature[name]:.1f} K > {self.max_temperature} K",
+            )
+
+    def check_protection(self):
+        "query the protection state of the next channel in turn"
+
+        channels = self.acq.channels
+        ch = channels[self._next_channel % len(channels)]
+        self._next_channel += 1
+        state = ch.protection
+        self.acq.set_state(ch.name, "protection", state)
+        if state != "NONE" and not self.tripped:
+            self.trip(ch.name, f"device protection triggered ({state})")
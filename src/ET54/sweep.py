@@ -0,0 +1,157 @@
+"Host-side adaptive I-V sweep"
+
+import time
+import numpy as np
+
+
+def IV_sweep(
+    ch,
+    start,
+    end,
+    mode="CC",
+    step_min=None,
+    step_max=None,
+    tolerance=0.1,
+    noise=0.005,
+    threshold=None,
+    threshold_value=None,
+    delay=0.0,
+    settle=None,
+    max_points=200,
+):
+    """Sweep the setpoint of a channel and record an I-V curve
+
+    In contrast to the built-in SCAN mode, the sweep runs on the host so the
+    results are actually available. The step size adapts to the curve: flat
+    regions are crossed with large steps while intervals in which the slope
+    dV/dI changes quickly (knees, current limits, foldback) are bisected
+    down to `step_min`.
+
+    ch              channel object
+    start, end      first and last setpoint [A|V] depending on `mode`
+    mode            {CC|CV} – setpoint is `CC_current` or `CV_voltage`
+    step_min        finest step size (default: span / 200)
+    step_max        coarsest step size (default: span / 10)
+    tolerance       relative change of slope between neighbouring intervals
+                    that triggers refinement
+    noise           measurement noise [V]: a point that is within `noise` of
+                    the straight line through its neighbours is no kink,
+                    however much the slope seems to change
+    threshold       stop condition mirroring `SCAN_threshold`:
+                    VTH   voltage crosses `threshold_value`
+                    VMIN  voltage falls below `threshold_value`
+                    DROP  voltage dropped by `threshold_value` from the first point
+                    None  sweep the full range
+    threshold_value threshold voltage [V]
+    delay           settling time after each setpoint change [s]
+    settle          tolerance [V|A] for `wait_settled` of the voltage (CC)
+                    or current (CV) after each setpoint change (after
+                    `delay`). None: do not wait.
+    max_points      hard limit on the number of measured points
+
+    The channel is switched to `mode` after the first setpoint has been
+    set. Mode and setpoint are left at the last point; the input state is
+    not touched.
+
+    Returns a dict of NumPy arrays sorted by setpoint:
+    `set`, `V`, `I`, `P`, `R`
+    """
+
+    mode = mode.upper()
+    if mode == "CC":
+        attr = "CC_current"
+    elif mode == "CV":
+        attr = "CV_voltage"
+    else:
+        raise ValueError(f"Sweep mode must be 'CC' or 'CV', not '{mode}'")
+    if threshold is not None:
+        threshold = threshold.upper()
+        if threshold not in ("VTH", "VMIN", "DROP"):
+            raise ValueError(f"Invalid threshold type '{threshold}'")
+        if threshold_value is None:
+            raise ValueError("threshold requires a threshold_value")
+
+    span = abs(end - start)
+    if span == 0:
+        raise ValueError("start and end must differ")
+    step_min = span / 200 if step_min is None else abs(step_min)
+    step_max = span / 10 if step_max is None else abs(step_max)
+    if step_min > step_max:
+        raise ValueError("step_min must not be larger than step_max")
+    direction = 1 if end > start else -1
+
+    points = []
+
+    def measure(x):
+        setattr(ch, attr, round(x, 4))
+        if not points:
+            ch.mode = mode
+        if delay:
+            time.sleep(delay)
+        if settle is not None:
+            ch.wait_settled("V" if mode == "CC" else "I", settle)
+        V, I, P, R = ch.read_all()
+        point = (x, V, I, P, R)
+        points.append(point)
+        return point
+
+    def slope(a, b):
+        dI = b[2] - a[2]
+        if dI == 0:
+            return float("inf") if b[1] != a[1] else 0.0
+        return (b[1] - a[1]) / dI
+
+    def kinked(a, b, c):
+        if c[2] != a[2]:
+            line = a[1] + (c[1] - a[1]) * (b[2] - a[2]) / (c[2] - a[2])
+            if abs(b[1] - line) <= noise:
+                return False
+        s1, s2 = slope(a, b), slope(b, c)
+        if s1 == s2:
+            return False
+        scale = max(abs(s1), abs(s2))
+        if scale == float("inf"):
+            return True
+        return abs(s2 - s1) / scale > tolerance
+
+    def refine(a, b, before):
+        "bisect interval (a, b) while the slope keeps changing"
+        if abs(b[0] - a[0]) <= 2 * step_min or len(points) >= max_points:
+            return
+        m = measure((a[0] + b[0]) / 2)
+        if kinked(before, a, m):
+            refine(a, m, before)
+        if kinked(a, m, b):
+            refine(m, b, a)
+
+    def stop(point):
+        V = point[1]
+        match threshold:
+            case "VTH":
+                return (V - threshold_value) * (points[0][1] - threshold_value) < 0
+            case "VMIN":
+                return V < threshold_value
+            case "DROP":
+                return points[0][1] - V > threshold_value
+        return False
+
+    step = step_max
+    last = measure(start)
+    before = last
+    while not stop(last) and len(points) < max_points:
+        x = last[0] + direction * step
+        if (x - end) * direction > 0:
+            x = end
+        point = measure(x)
+        if len(points) > 2 and kinked(before, last, point):
+            refine(last, point, before)
+            step = max(step / 2, step_min)
+        else:
+            step = min(step * 2, step_max)
+        before, last = last, point
+        if x == end:
+            break
+
+    points.sort(key=lambda p: p[0] * direction)
+    data = np.array(points, dtype=float).reshape(-1, 5)
+    return dict(zip(("set", "V", "I", "P", "R"), data.T))
@@ -1,5 +1,4 @@
 import pytest
-from time import sleep
 from ET54 import ET54
 from .testconfig import *
 
@@ -14,15 +13,15 @@ parameters = [
 
 el = ET54(RID)
 el.reset()
-sleep(5)
+el.wait_ready()
 
 el.off()
 
 for ch in el.Channels:
     ch.CC_mode(0.1)
-    # most tests assum `high` range, so set it
-    ch.Vrange = "high"
-    ch.Crange = "high"
+
+# most tests assume `high` range (see conftest.py)
+pytestmark = pytest.mark.state(Vrange="HIGH", Crange="HIGH")
 
 print("\nModel: ", el.idn["model"])
 print("Firmware: ", el.idn["firmware"])
@@ -139,7 +138,7 @@ def test_OCP(value):
 
 def test_OCP_invalid():
     for ch in el.Channels:
-        with pytest.raises(RuntimeError):
+        with pytest.raises(ValueError):
             ch.OCP = -10
 
 
@@ -152,7 +151,7 @@ def test_OVP(value):
 
 def test_OVP_invalid():
     for ch in el.Channels:
-        with pytest.raises(RuntimeError):
+        with pytest.raises(ValueError):
             ch.OVP = -10
 
 
@@ -165,10 +164,11 @@ def test_OPP(value):
 
 def test_OPP_invalid():
     for ch in el.Channels:
-        with pytest.raises(RuntimeError):
+        with pytest.raises(ValueError):
             ch.OPP = -10
 
 
+@pytest.mark.state(mode="CC")
 @pytest.mark.parametrize(heading, parameters)
 def test_CCmode(V, I, P, R):
     for ch in el.Channels:
@@ -180,6 +180,7 @@ def test_CCmode(V, I, P, R):
         assert ch.CC_current == I
 
 
+@pytest.mark.state(mode="CV")
 @pytest.mark.parametrize(heading, parameters)
 def test_CVmode(V, I, P, R):
     for ch in el.Channels:
@@ -190,6 +191,7 @@ def test_CVmode(V, I, P, R):
         assert ch.CV_voltage == V
 
 
+@pytest.mark.state(mode="CP")
 @pytest.mark.parametrize(heading, parameters)
 def test_CPmode(V, I, P, R):
     for ch in el.Channels:
@@ -200,6 +202,7 @@ def test_CPmode(V, I, P, R):
         assert ch.CP_power == P
 
 
+@pytest.mark.state(mode="CR")
 @pytest.mark.parametrize(heading, parameters)
 def test_CRmode(V, I, P, R):
     for ch in el.Channels:
@@ -210,6 +213,7 @@ def test_CRmode(V, I, P, R):
         assert ch.CR_resistance == R
 
 
+@pytest.mark.state(mode="CCCV")
 @pytest.mark.parametrize(heading, parameters)
 def test_CCCVmode(V, I, P, R):
     for ch in el.Channels:
@@ -223,6 +227,7 @@ def test_CCCVmode(V, I, P, R):
         assert ch.CCCV_voltage == V
 
 
+@pytest.mark.state(mode="CRCV")
 @pytest.mark.parametrize(heading, parameters)
 def test_CRCVmode(V, I, P, R):
     for ch in el.Channels:
@@ -355,34 +360,34 @@ def testLISTmode_list():
         ch.LIST_mode("AUTO", ())
         ch.LIST_mode("trigger", ())
 
+@pytest.mark.state(mode="LIST")
 def testLISTmode_loop():
     for ch in el.Channels:
-        ch.mode = "LIST"
         ch.LIST_loop = "ON"
         assert ch.LIST_loop == "ON"
         ch.LIST_loop = "Off"
         assert ch.LIST_loop == "OFF"
 
+@pytest.mark.state(mode="LIST")
 def testLISTmode_stepmode():
     for ch in el.Channels:
-        ch.mode = "LIST"
         ch.LIST_stepmode = "auto"
         assert ch.LIST_stepmode == "AUTO"
         ch.LIST_stepmode = "TRIGGER"
         assert ch.LIST_stepmode == "TRIGGER"
         
+@pytest.mark.state(mode="LIST")
 def testLISTmode_steps():
     for ch in el.Channels:
-        ch.mode = "LIST"
         ch.LIST_steps = 7
         assert ch.LIST_steps == 7
         ch.LIST_steps = 9
         assert ch.LIST_steps == 9
 
+@pytest.mark.state(mode="LIST")
 def testLISTmode_result():
     "test the retrieving results does not crash"
     for ch in el.Channels:
-        ch.mode = "LIST"
         ch.LIST_result
 
 @pytest.mark.parametrize(
@@ -413,11 +418,9 @@ def testSCANmode(mode,threshold,threshold_value,compare,limits,start_end,step,de
             #((0,32), (0,5), (0, 200), "PASS"),
         ]
         )
+@pytest.mark.state(mode="CC")
 def testQUALImode(Vrange, Crange, Prange, result):
     for ch in el.Channels:
-        ch.Vrange = "high"
-        ch.Crange = "high"
-        ch.mode = "CC"
         ch.QUALI_mode(Vrange, Crange, Prange)
         assert ch.QUALI_state == "ON"
         assert ch.QUALI_Vrange == Vrange
@@ -0,0 +1,42 @@
+import pytest, itertools
+
+# These tests do not need a device (see `make_channel` in conftest.py).
+
+
+@pytest.fixture
+def answering(make_channel):
+    "channel answering the queries with `responses`, with or without burst support"
+
+    def make(responses, burst=True):
+        responses = iter(responses)
+        ch, io = make_channel(measure=lambda state: next(responses), burst=burst)
+        return ch, io
+
+    return make
+
+
+def test_burst(answering):
+    ch, io = answering(f"R{12 - n / 100} {n / 10} 0 0" for n in itertools.count())
+    r = ch.acquire(10, ("V", "I"))
+    assert io.bursts == [("MEAS1:ALL?", 10)]
+    assert io.queries == []
+    assert list(r["I"]) == pytest.approx([n / 10 for n in range(10)])
+    assert r["V"][-1] == pytest.approx(11.91)
+    assert r["rate"] == pytest.approx(100)
+    assert r["jitter"] == pytest.approx(0, abs=1e-9)
+
+
+def test_single_quantity_without_burst(answering):
+    ch, io = answering(itertools.repeat("R1.5"), burst=False)
+    r = ch.acquire(5, "I")
+    assert io.queries == ["MEAS1:CURRENT?"] * 5
+    assert list(r["I"]) == [1.5] * 5
+    assert set(r) == {"t", "I", "rate", "jitter"}
+
+
+def test_bad_response(answering):
+    ch, io = answering(itertools.chain(["R1.0", "Rcmd err"], itertools.repeat("R1.0")))
+    with pytest.raises(RuntimeError):
+        ch.acquire(5, "V")
+    with pytest.raises(ValueError):
+        ch.acquire(5, "X")
@@ -0,0 +1,83 @@
+import pytest
+
+# These tests do not need a device (see `make_channel` in conftest.py).
+
+
+@pytest.fixture
+def auto_channel(make_channel):
+    "auto-ranging channel, returns (channel, commands sent)"
+
+    def make(model="ET5410A+", measured=(12.0, 1.0, 12.0, 12.0)):
+        ch, io = make_channel(model=model, measure=measured)
+        ch.auto_range = True
+        return ch, io.sent
+
+    return make
+
+
+def test_setpoints_select_range(auto_channel):
+    ch, sent = auto_channel()
+    ch.CC_current = 1.0
+    ch.CC_current = 2.5  # inside the hysteresis band: stays LOW
+    ch.CC_current = 2.0
+    ch.CC_current = 10
+    ch.CC_current = 2.5  # inside the hysteresis band: stays HIGH
+    ch.CC_current = 0.5
+    assert sent == [
+        "LOAD1:CRANGE LOW",
+        "CURR1:CC 1.0",
+        "CURR1:CC 2.5",
+        "CURR1:CC 2.0",
+        "LOAD1:CRANGE HIGH",
+        "CURR1:CC 10.0",
+        "CURR1:CC 2.5",
+        "LOAD1:CRANGE LOW",
+        "CURR1:CC 0.5",
+    ]
+
+
+def test_measurements_select_range(auto_channel):
+    ch, sent = auto_channel(measured=(19.5, 0.5, 9.75, 39.0))
+    ch.read_all()
+    ch.read_all()
+    assert sent == ["LOAD1:VRANGE HIGH", "LOAD1:CRANGE LOW"]
+    # a low measured current does not override a high set value
+    ch.CC_current = 5
+    ch.read_current()
+    assert sent[-2:] == ["LOAD1:CRANGE HIGH", "CURR1:CC 5.0"]
+
+
+def test_mode_methods(auto_channel):
+    ch, sent = auto_channel()
+    ch.Crange = "LOW"
+    ch.BATT_current = 10
+    ch.CCCV_mode(20, 12)
+    assert sent[:2] == ["LOAD1:CRANGE LOW", "LOAD1:CRANGE HIGH"]
+    assert sent.count("LOAD1:CRANGE HIGH") == 1
+    assert "LOAD1:VRANGE LOW" in sent
+
+
+def test_off_and_unknown_model(auto_channel):
+    ch, sent = auto_channel()
+    ch.auto_range = False
+    ch.CC_current = 1.0
+    ch.read_all()
+    ch, sent2 = auto_channel(model=None)
+    ch.CC_current = 1.0
+    assert sent == sent2 == ["CURR1:CC 1.0"]
+    assert ch.autorange(V=5, I=1) == (None, None)
+
+
+def test_invalid_value_does_not_switch_range(auto_channel):
+    ch, sent = auto_channel()
+    ch.CC_current = 1.0
+    sent.clear()
+    for name, value in (
+        ("CC_current", 100),
+        ("BATT_current", 100),
+        ("TRANSIENT_current", (1, 100)),
+        ("CV_voltage", 1000),
+    ):
+        with pytest.raises(ValueError):
+            setattr(ch, name, value)
+    assert sent == []
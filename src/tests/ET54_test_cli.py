@@ -0,0 +1,49 @@
+import io, os, sys, json, subprocess
+import ET54.cli
+from ET54.cli import _remote
+
+# These tests do not need a device.
+
+
+def remote(replies):
+    "a _remote client reading `replies` instead of talking to a daemon"
+
+    r = _remote.__new__(_remote)
+    r.sent = []
+    r.fh = io.StringIO("".join(line + "\n" for line in replies))
+    r.fh.write = r.sent.append
+    return r
+
+
+def stream(times, channels=("1",)):
+    return ["OK"] + [
+        json.dumps(dict(t=t, channel=c, V=12.0, I=1.0, P=12.0, R=12.0))
+        for t in times
+        for c in channels
+    ]
+
+
+def test_log_interval_decimates_stream():
+    # acquisition runs at 0.5 s with some jitter
+    times = [0, 0.5, 1.002, 1.499, 1.998, 2.5, 3.001, 3.5, 4.0]
+    r = remote(stream(times, ("1", "2")))
+    samples = list(r.samples("1", 1.0))
+    assert [s["t"] for s in samples] == [0, 1.002, 1.998, 3.001, 4.0]
+    r = remote(stream(times, ("1", "2")))
+    assert len(list(r.samples(None, 0.5))) == 2 * len(times)
+
+
+def test_measure_uses_cached_sample():
+    r = remote(['OK {"t": 1.0, "channel": "1", "V": 5.0, "I": 2.0, "P": 10.0, "R": 2.5}'])
+    assert r.measure("1") == (5.0, 2.0, 10.0, 2.5)
+    assert r.sent == ["SAMPLE 1\n"]
+
+
+def test_import_is_light():
+    # the proxy server module is imported too, it must not pull in numpy
+    code = "import sys, ET54.cli; print('numpy' in sys.modules, 'ET54.channel' in sys.modules)"
+    src = os.path.dirname(os.path.dirname(ET54.cli.__file__))
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split() == ["False", "False"]
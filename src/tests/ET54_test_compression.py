@@ -0,0 +1,30 @@
+from ET54.acquisition import sample
+from ET54.compression import deadband
+
+# These tests do not need a device
+
+
+def test_deadband():
+    kept = []
+    comp = deadband(kept.append, V=0.05, I=None, P=None, R=None, max_interval=100)
+    voltages = [12.0, 12.01, 11.98, 12.02, 11.5, 11.51, 11.49, 11.5]
+    for k, V in enumerate(voltages):
+        comp(sample(float(k), "1", V, 1.0, V, V))
+    comp.flush()
+
+    # first sample, both sides of the step and the last one
+    assert [s.t for s in kept] == [0.0, 3.0, 4.0, 7.0]
+    assert comp.seen == 8 and comp.kept == 4
+
+    # zero order hold reconstruction stays within the deadband
+    for k, V in enumerate(voltages):
+        held = [s for s in kept if s.t <= k][-1]
+        assert abs(held.V - V) <= 0.05
+
+
+def test_max_interval():
+    kept = []
+    comp = deadband(kept.append, max_interval=10)
+    for k in range(35):
+        comp(sample(float(k), "1", 5.0, 0.5, 2.5, 10.0))
+    assert [s.t for s in kept] == [0.0, 10.0, 20.0, 30.0]
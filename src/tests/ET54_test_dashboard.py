@@ -0,0 +1,78 @@
+import sys, json, threading, urllib.request, urllib.error
+import pytest
+from ET54.acquisition import acquisition, sample
+from ET54.dashboard import dashboard
+
+# These tests do not need a device (see `fake_el` in conftest.py).
+
+
+def test_state_changes_while_streaming(fake_el):
+    acq = acquisition(fake_el.Channels)
+    dash = dashboard(acq)
+    stop = threading.Event()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            acq.set_state("1", f"field{n % 500}", n)
+            n += 1
+
+    t = threading.Thread(target=writer)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    t.start()
+    try:
+        known = {}
+        for i in range(2000):
+            dash._changed(known)
+    finally:
+        stop.set()
+        t.join()
+        sys.setswitchinterval(interval)
+    assert ("1", "field0") in known
+
+
+def test_changed_reports_news_only(fake_el):
+    acq = acquisition(fake_el.Channels)
+    dash = dashboard(acq)
+    acq.set_state("1", "mode", "CC")
+    known = {}
+    assert dash._changed(known) == {"1": {"mode": "CC"}}
+    assert dash._changed(known) == {}
+    acq.set_state("2", "input", "ON")
+    assert dash._changed(known) == {"2": {"input": "ON"}}
+
+
+def get(url):
+    "status and body of a GET request"
+    try:
+        with urllib.request.urlopen(url, timeout=5) as r:
+            return r.status, r.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, ""
+
+
+def strict(text):
+    "parse JSON, rejecting NaN and Infinity"
+    return json.loads(text, parse_constant=lambda c: pytest.fail(f"invalid JSON: {c}"))
+
+
+def test_serving_and_detach(fake_el):
+    acq = acquisition(fake_el.Channels)
+    dash = dashboard(acq, port=0)
+    dash.start()
+    try:
+        assert len(acq.sinks) == 2 and len(acq.tasks) == 1
+        dash.feed(sample(1.0, "1", 12.0, 1.0, 12.0, 12.0))
+        dash.store(sample(1.0, "1", 12.0, 1.0, 12.0, 12.0))
+        dash.store(sample(2.0, "1", float("nan"), 1.0, float("nan"), float("inf")))
+        dash.feed(sample(2.0, "1", float("nan"), 1.0, float("nan"), float("inf")))
+        status, body = get(dash.url + "history?points=10")
+        assert status == 200
+        assert strict(body)["1"]["V"] == [12.0, None]
+        assert [s for n, s in dash.recent][-1][2:] == [None, 1.0, None, None]
+        for points in ("abc", "0", "-5"):
+            assert get(dash.url + "history?points=" + points)[0] == 400
+    finally:
+        dash.stop()
+    assert acq.sinks == [] and acq.tasks == []
@@ -0,0 +1,44 @@
+import pytest
+from ET54.acquisition import sample
+from ET54.events import event_engine, threshold, rate
+
+# These tests do not need a device
+
+
+def run(engine, currents, voltages=None, block=4):
+    "feed samples at 1s intervals and collect events"
+
+    engine.block = block
+    for k, I in enumerate(currents):
+        V = 12.0 if voltages is None else voltages[k]
+        engine.feed(sample(float(k), "1", V, I, V * I, 0.0))
+    engine.flush()
+    while not engine._queue.empty():
+        engine.process(engine._queue.get())
+
+
+@pytest.mark.parametrize("block", [1, 3, 16])
+def test_threshold_hysteresis(block):
+    engine = event_engine()
+    events = []
+    engine.add(threshold("I", below=0.5, hysteresis=0.1), events.append)
+    run(engine, [1, 0.4, 0.55, 0.45, 0.7, 0.4], block=block)
+    assert [e.t for e in events] == [1.0, 5.0]
+
+
+@pytest.mark.parametrize("block", [1, 4])
+def test_dwell(block):
+    engine = event_engine()
+    events = []
+    engine.add(threshold("I", below=0.5, dwell=2), events.append)
+    run(engine, [1, 0.4, 0.4, 1, 0.4, 0.4, 0.4, 0.4], block=block)
+    assert [e.t for e in events] == [6.0]
+
+
+def test_rate_and_once():
+    engine = event_engine()
+    events = []
+    engine.add(rate("V", below=-1), events.append, once=True)
+    run(engine, [1] * 6, voltages=[12, 12, 10, 12, 9, 9])
+    assert [e.t for e in events] == [2.0]
+    assert engine.rules == []
@@ -0,0 +1,37 @@
+import pytest
+from ET54.group import channel_group
+
+# These tests do not need a device (see `fake_el` in conftest.py).
+
+
+def test_on_off_read_all(fake_el):
+    group = channel_group(fake_el)
+    group.on()
+    assert fake_el.connection.log[-2:] == ["Ch1:SW ON", "Ch2:SW ON"]
+    values, skew = group.read_all()
+    assert values == [(12.0, 1.0, 12.0, 12.0)] * 2
+    assert skew >= 0
+    fake_el.off()
+    assert fake_el.connection.log[-2:] == ["Ch1:SW OFF", "Ch2:SW OFF"]
+
+
+def test_rejected_command_leaves_no_stale_acks(fake_el):
+    conn = fake_el.connection
+    respond = conn.respond
+    conn.respond = lambda c: "Rexecu err" if c == "Ch1:SW ON" else respond(c)
+    with pytest.raises(RuntimeError, match="failed"):
+        channel_group(fake_el).on()
+    # the ack for channel 2 has been read, the next query gets its own answer
+    assert conn.out == []
+    assert fake_el.ch1.read_voltage() == 12.0
+    assert fake_el.resyncs == []
+
+
+def test_bad_answer_in_query_many(fake_el):
+    conn = fake_el.connection
+    respond = conn.respond
+    conn.respond = lambda c: "Rcmd err" if c == "MEAS1:ALL?" else respond(c)
+    with pytest.raises(RuntimeError):
+        channel_group(fake_el).read_all()
+    assert conn.out == []
+    assert fake_el.ch2.read_current() == 1.0
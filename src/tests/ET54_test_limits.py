@@ -0,0 +1,74 @@
+import pytest
+
+# These tests do not need a device (see `make_channel` in conftest.py).
+# Nothing may be sent for invalid values.
+
+
+@pytest.fixture
+def model_channel(make_channel):
+    "channel of `model`, returns (channel, commands sent)"
+
+    def make(model):
+        ch, io = make_channel(model=model)
+        return ch, io.sent
+
+    return make
+
+
+def test_model_limits(model_channel):
+    ch, sent = model_channel("ET5410A+")
+    ch.CC_current = 39.5
+    with pytest.raises(ValueError):
+        ch.CC_current = 41
+    with pytest.raises(ValueError):
+        ch.OVP = -10
+    with pytest.raises(ValueError):
+        ch.OPP = 500
+    assert sent == ["CURR1:CC 39.5"]
+
+
+def test_range_limits(model_channel):
+    ch, sent = model_channel("ET5420A+")
+    ch.Crange = "low"
+    with pytest.raises(ValueError):
+        ch.CC_current = 3.5
+    ch.Crange = "high"
+    ch.CC_current = 3.5
+    assert sent == ["LOAD1:CRANGE LOW", "LOAD1:CRANGE HIGH", "CURR1:CC 3.5"]
+
+
+def test_unknown_model(model_channel):
+    ch, sent = model_channel("XXXXXX")
+    ch.CC_current = 100
+    with pytest.raises(ValueError):
+        ch.CR_resistance = 0
+    assert sent == ["CURR1:CC 100.0"]
+
+
+def test_validate(model_channel):
+    ch, sent = model_channel("ET5411")
+    ch.validate({"Vrange": "high", "CV_voltage": 450, "SCAN_submode": "CP", "SCAN_step": 10})
+
+    with pytest.raises(ValueError) as e:
+        ch.validate(
+            {
+                "Vrange": "low",
+                "CV_voltage": 450,
+                "TRANSIENT_width": (10, 100),
+                "LIST_rows": [(1, "CC", 2.0, 10, "OFF", 0, 0), (11, "CC", 20.0, 10, "OFF", 0, 0)],
+                "foo": 1,
+            }
+        )
+    msg = str(e.value)
+    for name in ("CV_voltage", "TRANSIENT_width", "LIST row num", "foo"):
+        assert name in msg
+    assert sent == []
+
+
+def test_configure_sends_nothing_if_invalid(model_channel):
+    ch, sent = model_channel("ET5410")
+    with pytest.raises(ValueError):
+        ch.configure({"CC_current": 1.0, "mode": "CC", "OCP": 50})
+    assert sent == []
+    ch.configure({"CC_current": 1.0, "mode": "CC"})
+    assert sent == ["CURR1:CC 1.0", "Ch1:MODE CC"]
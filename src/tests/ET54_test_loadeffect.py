@@ -0,0 +1,48 @@
+import pytest
+from ET54.loadeffect import load_effect
+
+# These tests do not need a device (see `make_channel` in conftest.py).
+
+
+@pytest.fixture
+def source(make_channel):
+    "channel loading a source with open circuit voltage V0 and resistance R"
+
+    def make(name, V0, R):
+        def measure(state):
+            I = float(state.get(f"CURR{name}:CC", 0))
+            V = V0 - R * I
+            return V, I, V * I, V / I if I else 1e6
+
+        ch, io = make_channel(name, "ET5420A+", measure)
+        return ch, io.sent
+
+    return make
+
+
+def test_single_channel(source):
+    ch, sent = source("1", 12.0, 0.1)
+    r = ch.load_effect([0.5, 1.0, 2.0, 4.0], samples=3)
+    assert list(r["set"]) == [0.5, 1.0, 2.0, 4.0]
+    assert r["V_nl"] == pytest.approx(11.95)
+    assert r["V_fl"] == pytest.approx(11.6)
+    assert r["regulation"] == pytest.approx((11.95 - 11.6) / 11.6 * 100)
+    assert r["R_out"] == pytest.approx(0.1)
+    assert r["dV"][-1] == pytest.approx(-0.35)
+    assert all(r["settled"])
+    assert sent[-1] == "Ch1:SW OFF"
+
+
+def test_two_channels(source):
+    ch1, sent1 = source("1", 12.0, 0.1)
+    ch2, sent2 = source("2", 5.0, 0.5)
+    r = load_effect([ch1, ch2], [0.1, 1.0])
+    assert r["1"]["R_out"] == pytest.approx(0.1)
+    assert r["2"]["R_out"] == pytest.approx(0.5)
+
+
+def test_invalid_current(source):
+    ch, sent = source("1", 12.0, 0.1)
+    with pytest.raises(ValueError):
+        ch.load_effect([1, 30])
+    assert sent == []
@@ -0,0 +1,97 @@
+import math
+import numpy as np
+import pytest
+import ET54.mppt
+from ET54.mppt import mppt
+
+# These tests do not need a device (see `make_channel` in conftest.py).
+
+ISC, VOC, VT = 5.0, 21.0, 1.5
+
+
+def current(V):
+    "I-V curve of a solar panel"
+    return max(ISC * (1 - math.exp((V - VOC) / VT)), 0.0)
+
+
+V_GRID = np.linspace(0, VOC, 21001)
+P_GRID = V_GRID * np.array([current(V) for V in V_GRID])
+V_MPP = V_GRID[P_GRID.argmax()]
+P_MPP = P_GRID.max()
+
+
+def panel(state):
+    "measurement of the panel in CV or CP mode"
+
+    if "POWE1:CP" in state:
+        P = float(state["POWE1:CP"])
+        if P > P_MPP:
+            # past the MPP, the voltage collapses
+            V = 0.0
+        else:
+            lo, hi = V_MPP, VOC
+            for i in range(60):
+                V = (lo + hi) / 2
+                lo, hi = (V, hi) if V * current(V) > P else (lo, V)
+    else:
+        V = float(state.get("VOLT1:CV", 0))
+    I = current(V)
+    return (V, I, V * I, V / I if I else 1e9)
+
+
+@pytest.mark.parametrize("algorithm", ["PO", "INC"])
+def test_CV_converges(make_channel, algorithm):
+    ch, io = make_channel(measure=panel)
+    tracker = mppt(ch, algorithm, "CV", start=12.0, step=0.1, rtt_ref=0.1)
+    # a constant round trip time of `rtt_ref`: fixed steps of 0.1 V
+    tracker._step = lambda rtt: tracker.step_ref
+    s = tracker.run(iterations=300)
+    V = [entry[2] for entry in tracker.log[-50:]]
+    assert abs(np.mean(V) - V_MPP) < 0.3
+    assert s["P_max"] > 0.99 * P_MPP
+    assert "Ch1:MODE CV" in io.sent
+
+
+def test_CP_converges(make_channel):
+    ch, io = make_channel(measure=panel)
+    tracker = mppt(ch, "PO", "CP", start=40.0, step=0.5)
+    tracker._step = lambda rtt: tracker.step_ref
+    tracker.run(iterations=300)
+    P = [entry[4] for entry in tracker.log[-50:]]
+    assert np.median(P) > 0.97 * P_MPP
+
+
+def test_step_scales_with_rtt(make_channel, monkeypatch):
+    ch, io = make_channel(measure=panel)
+    tracker = mppt(ch, "PO", "CV", start=12.0, step=0.1, rtt_ref=0.6)
+    assert tracker._step(0.6) == pytest.approx(0.1)
+    assert tracker._step(1.2) == pytest.approx(0.2)
+    assert tracker._step(0.001) == pytest.approx(0.01)
+    assert tracker._step(100) == pytest.approx(1.0)
+    # every update takes 0.3 s: half the reference step
+    clock = iter(np.arange(100) * 0.3)
+    monkeypatch.setattr(ET54.mppt.time, "monotonic", lambda: next(clock))
+    tracker.update()
+    assert tracker.log[0][5] == pytest.approx(0.3)
+    assert tracker.setpoint == pytest.approx(12.05)
+
+
+def test_interrupt_switches_off(make_channel):
+    ch, io = make_channel(measure=panel)
+    tracker = mppt(ch, "PO", "CV", start=12.0)
+
+    def interrupt(entry):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        tracker.run(callback=interrupt)
+    assert io.sent[-1] == "Ch1:SW OFF"
+    assert tracker.summary()["P_max"] > 0
+
+
+def test_summary_of_short_runs(make_channel):
+    ch, io = make_channel(measure=panel)
+    tracker = mppt(ch, "PO", "CV", start=12.0)
+    assert tracker.summary() is None
+    s = tracker.run(iterations=1)
+    assert s["P_max"] == pytest.approx(12.0 * current(12.0))
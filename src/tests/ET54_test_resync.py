@@ -0,0 +1,68 @@
+import pytest
+from ET54.instrument import desync_error
+
+# These tests do not need a device (see `fake_el` in conftest.py).
+
+
+def test_check(fake_el):
+    assert fake_el._check("CH1:SW ON", "Rexecu success") == 0
+    with pytest.raises(RuntimeError, match="Unknown SCPI command"):
+        fake_el._check("FOO", "Rcmd err")
+    with pytest.raises(RuntimeError, match="failed"):
+        fake_el._check("CURR1:CC 99", "Rexecu err")
+    with pytest.raises(desync_error):
+        fake_el._check("CURR1:CC 1", "R1.5")
+    with pytest.raises(desync_error):
+        fake_el._check("CURR1:CC 1", "")
+
+
+def test_write_and_query(fake_el):
+    ch = fake_el.ch1
+    ch.CC_current = 1.5
+    assert fake_el.connection.log[-1] == "CURR1:CC 1.5"
+    assert ch.CC_current == 1.5
+    # set commands of hand-written settings are acknowledged as well
+    ch.QUALI_state = "ON"
+    assert ch.QUALI_state == "ON"
+    assert fake_el.resyncs == []
+
+
+def test_realign(fake_el):
+    conn = fake_el.connection
+    conn.out += ["R1.0", "Rexecu success", "garbage"]
+    fake_el._realign()
+    assert conn.out == []
+    assert conn.log[-1] == "*IDN?"
+
+
+def test_late_ack_is_resynced(fake_el):
+    conn = fake_el.connection
+    # the ack of an earlier write arrives in place of the answer
+    conn.out.append("Rexecu success")
+    assert fake_el.ch1.read_voltage() == 12.0
+    assert len(fake_el.resyncs) == 1
+    assert fake_el.retried == 1
+
+
+def test_timeout_is_resynced(fake_el):
+    conn = fake_el.connection
+    respond = conn.respond
+    lost = []
+
+    def lose_first(command):
+        if not lost:
+            lost.append(command)
+            return None
+        return respond(command)
+
+    conn.respond = lose_first
+    conn.write = lambda command: (r := conn.respond(command)) is not None and conn.out.append(r)
+    assert fake_el.ch1.read_current() == 1.0
+    assert len(fake_el.resyncs) == 1
+
+
+def test_resync_gives_up(fake_el):
+    conn = fake_el.connection
+    conn.write = lambda command: None  # device does not answer at all
+    with pytest.raises(RuntimeError, match="Unable to resynchronize"):
+        fake_el.resync()
@@ -0,0 +1,70 @@
+import threading
+import pytest
+from ET54.scheduler import scheduler, _priority, _channel, CRITICAL, HIGH, NORMAL, LOW
+
+# These tests do not need a device (see `fake_el` in conftest.py).
+
+
+def test_command_classification():
+    assert _priority("Ch1:SW OFF") == CRITICAL
+    assert _priority("MEAS2:ALL?") == LOW
+    assert _priority("CURR1:CC 1.0") == NORMAL
+    assert _channel("CURR2:CC 1.0") == "2"
+    assert _channel("*IDN?") is None
+
+
+def test_priority_and_round_robin():
+    s = scheduler()
+    s.start()
+    order = []
+    gate = threading.Event()
+    try:
+        # block the worker until everything is queued
+        s.submit(gate.wait)
+        futures = [
+            s.submit(order.append, "low1", priority=LOW, channel="1"),
+            s.submit(order.append, "low1b", priority=LOW, channel="1"),
+            s.submit(order.append, "low2", priority=LOW, channel="2"),
+            s.submit(order.append, "normal", priority=NORMAL),
+            s.submit(order.append, "high", priority=HIGH),
+            s.submit(order.append, "off", priority=CRITICAL),
+        ]
+        gate.set()
+        for f in futures:
+            f.result(1)
+    finally:
+        s.stop()
+    assert order == ["off", "high", "normal", "low1", "low2", "low1b"]
+
+
+def test_errors_and_stop():
+    s = scheduler()
+    s.start()
+    with pytest.raises(ZeroDivisionError):
+        s.submit(lambda: 1 / 0).result(1)
+    assert s.submit(lambda: 42).result(1) == 42
+    s.stop()
+    with pytest.raises(RuntimeError):
+        s.submit(lambda: None)
+
+
+def test_instrument_from_several_threads(fake_el):
+    fake_el.start_scheduler()
+    errors = []
+
+    def worker(ch):
+        try:
+            for i in range(50):
+                ch.CC_current = 1.0
+                assert ch.read_all()[0] == 12.0
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(ch,)) for ch in fake_el.Channels]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    fake_el.stop_scheduler()
+    assert errors == []
+    assert fake_el.resyncs == []
@@ -0,0 +1,52 @@
+import json, socket, threading
+import pytest
+from ET54.acquisition import acquisition
+from ET54.server import proxy_server
+
+# These tests do not need a device (see `fake_el` in conftest.py).
+
+
+@pytest.fixture
+def client(fake_el):
+    "send a request line to a proxy server of `fake_el`, return the reply"
+
+    acq = acquisition(fake_el.Channels)
+    server = proxy_server(fake_el, acq, ("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    sock = socket.create_connection(server.server_address)
+    fh = sock.makefile("rw")
+
+    def request(line):
+        fh.write(line + "\n")
+        fh.flush()
+        return fh.readline().strip()
+
+    yield request
+    sock.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_set(client, fake_el):
+    assert client("SET 1 CC_current 1.5") == "OK"
+    assert fake_el.connection.log[-1] == "CURR1:CC 1.5"
+    assert client("GET 1 CC_current") == "OK 1.5"
+    assert json.loads(client("GET 1 read_all")[3:]) == [12.0, 1.0, 12.0, 12.0]
+    assert client("SET 1 QUALI_state ON") == "OK"
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "SET 1 query 1",  # instance attributes
+        "SET 1 limits null",
+        "SET 1 on 1",  # methods
+        "SET 1 _written {}",
+        "SET 1 BATT_capacity 1",  # read-only setting
+        "SET 1 nonsense 1",
+    ],
+)
+def test_set_rejects_non_settings(client, line):
+    assert client(line).startswith("ERR")
+    # the channel still works for everybody
+    assert client("GET 1 read_voltage") == "OK 12.0"
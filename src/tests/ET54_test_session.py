@@ -0,0 +1,61 @@
+import pytest, json
+from ET54.session import session
+
+# These tests do not need a device.
+
+
+class fake_channel:
+    "stands in for a channel in BATT mode"
+
+    def __init__(self):
+        self.mode = "BATT"
+        self.input = "ON"
+        self.BATT_capacity = 0.5
+        self.BATT_energy = 6.0
+        self.set = []
+
+    def validate(self, config):
+        pass
+
+    def __setattr__(self, name, value):
+        if name != "set" and hasattr(self, "set"):
+            self.set.append(name)
+        super().__setattr__(name, value)
+
+
+def test_checkpoint_and_resume(tmp_path):
+    path = str(tmp_path / "journal")
+    ch = fake_channel()
+    s = session(path, ch, every=3600)
+    s.apply({"BATT_current": 1.0, "mode": "BATT"})
+    assert s.checkpoint(stage=1, Ah=0.5)
+    assert not s.checkpoint(Ah=0.6)  # too early
+    assert json.load(open(path))["state"] == {"stage": 1, "Ah": 0.5}
+
+    # the host crashed, the device went on discharging
+    ch.BATT_capacity = 0.75
+    ch.BATT_energy = 9.0
+    ch.set.clear()
+    r = session(path, ch)
+    assert r.resume()
+    assert r.state == {"stage": 1, "Ah": 0.5}
+    assert r.gap["BATT_capacity"] == pytest.approx(0.25)
+    assert r.gap["BATT_energy"] == pytest.approx(3.0)
+    # nothing is reprogrammed
+    r.apply({"BATT_current": 1.0, "mode": "BATT"})
+    assert ch.set == []
+    r.finish()
+    assert not r.resume()
+
+
+def test_device_mismatch(tmp_path):
+    path = str(tmp_path / "journal")
+    ch = fake_channel()
+    session(path, ch).checkpoint(stage=0)
+    ch.BATT_capacity = 0.0  # counters reset, e.g. the load was power cycled
+    with pytest.raises(RuntimeError):
+        session(path, ch).resume()
+    ch.BATT_capacity = 1.0
+    ch.mode = "CC"
+    with pytest.raises(RuntimeError):
+        session(path, ch).resume()
@@ -0,0 +1,41 @@
+import pytest, itertools
+
+# These tests do not need a device (see `make_channel` in conftest.py).
+
+
+def currents_channel(make_channel, currents):
+    "channel whose measured current is taken from the iterable `currents`"
+
+    currents = iter(currents)
+
+    def measure(state):
+        I = next(currents)
+        return 12.0, I, 12 * I, 12 / I
+
+    ch, io = make_channel(measure=measure)
+    return ch, io.queries
+
+
+def test_settles(make_channel):
+    ch, reads = currents_channel(
+        make_channel,
+        itertools.chain([0.2, 0.8, 1.3, 1.45, 1.49, 1.5, 1.5, 1.501, 1.5, 1.499], itertools.repeat(1.5)),
+    )
+    t, I = ch.wait_settled("I", 0.01, window=5)
+    assert abs(I - 1.5) < 0.005
+    # returns on the first stable window
+    assert len(reads) == 10
+    assert t >= 0
+
+
+def test_trend_is_not_stable(make_channel):
+    # the spread of every window is within the tolerance, but drifting
+    ch, reads = currents_channel(make_channel, (1.0 + 0.002 * n for n in itertools.count()))
+    with pytest.raises(RuntimeError):
+        ch.wait_settled("I", 0.01, window=5, timeout=0.05)
+
+
+def test_timeout(make_channel):
+    ch, reads = currents_channel(make_channel, itertools.cycle([1.0, 2.0]))
+    with pytest.raises(RuntimeError):
+        ch.wait_settled("I", 0.01, timeout=0.05)
@@ -0,0 +1,67 @@
+import time
+from ET54.station import station
+
+# These tests do not need a device (see `fake_el` in conftest.py).
+
+CONFIG = {
+    "mode": "CC",
+    "CC_current": 1.0,
+    "QUALI_Vrange": (4.75, 5.25),
+    "QUALI_Crange": (0.9, 1.1),
+    "QUALI_Prange": (4, 6),
+}
+
+
+def make_channel(fake_el):
+    "channel of a fake load that answers with the real acks"
+
+    conn = fake_el.connection
+    conn.measure.update(V=5.0, I=1.0, P=5.0, R=5.0)
+    conn.state["QUAL1:OUT"] = "PASS"
+    return fake_el.ch1, conn.log
+
+
+def test_run(tmp_path, fake_el):
+    ch, sent = make_channel(fake_el)
+    duts = iter(["A1", "A2", "A3"])
+    st = station(ch, CONFIG, identify=lambda: next(duts, None), settle=0, logfile=tmp_path / "log.csv")
+    results = st.run()
+    assert [r["dut"] for r in results] == ["A1", "A2", "A3"]
+    assert all(r["result"] == "PASS" and r["V"] == 5.0 for r in results)
+    # settings are only sent for the first DUT
+    assert sent.count("CURR1:CC 1.0") == 1
+    assert sent.count("Ch1:SW ON") == 3 and sent.count("Ch1:SW OFF") == 3
+    assert sent.count("QUAL1:TEST ON") == 1
+    assert fake_el.resyncs == []
+    assert len((tmp_path / "log.csv").read_text().splitlines()) == 4
+    s = st.stats()
+    assert s["units"] == 3 and s["passed"] == 3 and s["uph"] > 0
+    assert "units/h" in st.report()
+
+
+def test_host_work_overlaps_device(fake_el):
+    ch, sent = make_channel(fake_el)
+    duts = iter(range(1, 6))
+
+    def identify():
+        time.sleep(0.05)
+        return str(next(duts, ""))
+
+    st = station(ch, CONFIG, identify=identify, settle=0.05)
+    st.add_sink(lambda result: time.sleep(0.05))
+    t0 = time.perf_counter()
+    st.run()
+    # sequential: 5 * 0.15 s
+    assert time.perf_counter() - t0 < 0.5
+    assert len(st.results) == 5
+
+
+def test_device_error_is_logged(fake_el):
+    ch, sent = make_channel(fake_el)
+    # the device stops answering queries
+    write = fake_el.connection.write
+    fake_el.connection.write = lambda cmd: None if cmd.endswith("?") else write(cmd)
+    st = station(ch, CONFIG, identify=iter(["X", None]).__next__, settle=0)
+    results = st.run()
+    assert results[0]["result"].startswith("ERROR:")
+    assert sent[-1] == "Ch1:SW OFF"
@@ -0,0 +1,73 @@
+import numpy as np
+from ET54.acquisition import sample
+from ET54.store import sample_store, lttb
+
+# These tests do not need a device
+
+
+def fill(store, n, dt=0.5):
+    for k in range(n):
+        V = 12.0 + np.sin(k / 50)
+        store(sample(k * dt, "1", V, 1.0, V, V))
+
+
+def test_raw_query():
+    store = sample_store()
+    fill(store, 100)
+    ret = store.query("1", 10, 20)
+    assert ret["width"] == 0
+    assert ret["t"][0] == 10 and ret["t"][-1] == 20
+    assert len(ret["V"]) == 21
+
+
+def test_tiers():
+    store = sample_store(tiers=(1, 60))
+    fill(store, 10000)
+    ret = store.query("1", points=500)
+    assert ret["width"] == 60
+    assert len(ret["t"]) <= 500
+    # aggregates match the raw data
+    raw = store.raw["1"].rows
+    first = raw[raw[:, 0] < 60, 1]
+    assert ret["V_min"][0] == first.min()
+    assert ret["V_max"][0] == first.max()
+    assert abs(ret["V"][0] - first.mean()) < 1e-9
+
+    ret = store.query("1", 100, 400, points=500)
+    assert ret["width"] == 1
+    assert ret["t"][0] == 100 and ret["t"][-1] == 400
+
+
+def test_lttb():
+    x = np.arange(1000.0)
+    y = np.zeros(1000)
+    y[500] = 10
+    idx = lttb(x, y, 20)
+    assert len(idx) == 20
+    assert idx[0] == 0 and idx[-1] == 999
+    # the spike survives
+    assert 500 in idx
+
+
+def test_retention():
+    store = sample_store(tiers=(1, 60), retention=1000)
+    fill(store, 10000)
+    raw, fine, coarse = store.raw["1"], *(tier.table for tier in store.tiers["1"])
+    assert raw.n <= 1000 and len(raw.data) <= 1000
+    assert fine.n <= 1000 and len(fine.data) <= 1000
+    assert not coarse.trimmed
+    # the newest samples are kept, in order
+    assert raw.rows[-1, 0] == 4999.5
+    assert (np.diff(raw.rows[:, 0]) == 0.5).all()
+
+    assert store.span("1") == (0, 4999.5)
+    # the full range only survives in the coarse tier
+    ret = store.query("1", points=5000)
+    assert ret["width"] == 60
+    assert ret["t"][0] == 0
+    # recent data still comes from the raw samples
+    ret = store.query("1", 4900, 4990)
+    assert ret["width"] == 0
+    assert len(ret["t"]) == 181
+    ret = store.query("1", 100, 400, points=500)
+    assert ret["width"] == 60
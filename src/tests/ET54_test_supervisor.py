@@ -0,0 +1,129 @@
+import time
+from ET54.acquisition import acquisition
+from ET54.supervisor import supervisor
+
+# These tests do not need a device (see `fake_el` in conftest.py).
+
+
+def run(acq, timeout=2):
+    "run the acquisition until it stops on its own"
+    acq.start()
+    acq._thread.join(timeout)
+    acq.stop()
+
+
+def dead_after(conn, n):
+    "let the fake device stop answering after `n` commands"
+
+    write = conn.write
+
+    def maybe(command):
+        if len(conn.log) < n:
+            write(command)
+        else:
+            conn.log.append(command)
+
+    conn.write = maybe
+
+
+def test_trip_when_acquisition_dies(fake_el):
+    conn = fake_el.connection
+    acq = acquisition(fake_el.Channels, interval=0, retries=1)
+    sv = supervisor(fake_el, acq)
+    sv.attach()
+    fake_el.on()
+    dead_after(conn, len(conn.log) + 10)
+    run(acq)
+    assert acq.error is not None
+    assert sv.tripped
+    assert sv.trips[0][1] is None
+    assert "acquisition stopped" in sv.trips[0][2]
+
+
+def test_transient_errors_are_retried(fake_el):
+    conn = fake_el.connection
+    acq = acquisition(fake_el.Channels, interval=0, retries=2)
+    sv = supervisor(fake_el, acq, protection_every=1)
+    sv.attach()
+    # the protection query is not answered, even when repeated
+    respond = conn.respond
+    write = conn.write
+    failed = []
+
+    def flaky(command):
+        if "ABNO" in command and len(failed) < 2:
+            failed.append(command)
+            conn.log.append(command)
+            return
+        write(command)
+
+    conn.respond = lambda c: "NONE" if "ABNO" in c else respond(c)
+    conn.write = flaky
+    acq.start()
+    time.sleep(0.1)
+    acq.stop()
+    assert failed
+    assert acq.failures >= 1
+    assert acq.error is None
+    assert not sv.tripped
+
+
+def refuse_off(conn, n):
+    "let the fake device fail the first `n` attempts to switch off"
+
+    respond = conn.respond
+    refused = []
+
+    def maybe(command):
+        if "SW OFF" in command and len(refused) < n:
+            refused.append(command)
+            conn.log.append(command)
+            return "Rexecu err"
+        return respond(command)
+
+    conn.respond = maybe
+    return refused
+
+
+def test_failed_off_is_retried(fake_el):
+    conn = fake_el.connection
+    acq = acquisition(fake_el.Channels, interval=0, retries=5)
+    sv = supervisor(fake_el, acq, max_voltage=10, protection_every=None)
+    sv.attach()
+    fake_el.on()
+    refused = refuse_off(conn, 2)
+    acq.start()
+    deadline = time.monotonic() + 2
+    while (sv.off_pending or not sv.tripped) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    acq.stop()
+    assert refused
+    assert sv.tripped
+    assert not sv.off_pending
+    assert len(sv.trips) == 1
+    assert [ch.input for ch in fake_el.Channels] == ["OFF", "OFF"]
+    assert acq.error is None
+
+
+def test_persistent_off_failure_stops_acquisition(fake_el):
+    conn = fake_el.connection
+    acq = acquisition(fake_el.Channels, interval=0, retries=1)
+    sv = supervisor(fake_el, acq, max_voltage=10, protection_every=None)
+    errors = []
+    sv.attach()
+    acq.add_error_handler(errors.append)
+    fake_el.on()
+    refuse_off(conn, 1000)
+    run(acq)
+    assert sv.tripped
+    assert sv.off_pending
+    assert "cannot switch inputs off" in str(acq.error)
+    assert errors == [acq.error]
+
+
+def test_detach(fake_el):
+    acq = acquisition(fake_el.Channels)
+    sv = supervisor(fake_el, acq)
+    sv.attach()
+    sv.detach()
+    assert acq.sinks == acq.tasks == acq.error_handlers == []
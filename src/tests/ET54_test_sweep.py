@@ -0,0 +1,47 @@
+import random
+from ET54.sweep import IV_sweep
+
+# These tests do not need a device (see `make_channel` in conftest.py).
+
+
+class fake_source:
+    "channel in CC mode loading a source with the I-V curve `V(I)`"
+
+    def __init__(self, V, noise=0.0):
+        self.V = V
+        self.noise = noise
+        self.CC_current = 0
+        self.rng = random.Random(1)
+
+    def read_all(self):
+        I = self.CC_current
+        V = self.V(I) + self.rng.uniform(-self.noise, self.noise)
+        return V, I, V * I, V / I
+
+
+def test_flat_source():
+    ch = fake_source(lambda I: 12.0)
+    clean = IV_sweep(ch, 0.1, 1.5)
+    ch = fake_source(lambda I: 12.0, noise=0.002)
+    noisy = IV_sweep(ch, 0.1, 1.5)
+    # measurement noise must not be mistaken for kinks
+    assert len(noisy["set"]) < 2 * len(clean["set"])
+    assert len(noisy["set"]) < 50
+
+
+def test_knee_is_refined():
+    # current limit at 1 A: voltage collapses above it
+    ch = fake_source(lambda I: 12.0 if I < 1 else max(0.5, 12 - 50 * (I - 1)), noise=0.002)
+    curve = IV_sweep(ch, 0.1, 1.5)
+    near = abs(curve["set"] - 1) < 0.05
+    assert near.sum() >= 3
+
+
+def test_mode_is_set(make_channel):
+    ch, io = make_channel(measure=lambda state: (12.0, float(state.get("VOLT1:CV", 0)) / 10, 0, 0))
+    curve = IV_sweep(ch, 1, 10, mode="CV")
+    # first setpoint, then the mode
+    assert io.sent[0].startswith("VOLT1:CV ")
+    assert io.sent[1] == "Ch1:MODE CV"
+    assert io.sent.count("Ch1:MODE CV") == 1
+    assert curve["set"][-1] == 10
@@ -1,9 +1,12 @@
-import pytest, time
+import pytest
 from ET54 import ET54
 from .testconfig import *
 
 el = ET54(RID)
 
+pytestmark = pytest.mark.state(Vrange="LOW", Crange="LOW")
+
+
 def test_measure():
     """measuring voltage, current, power and resistance
     This test requires that the load is connected to a
@@ -11,11 +14,9 @@ def test_measure():
     """
 
     for ch in el.Channels:
-        ch.Vrange = "low"
-        ch.Crange = "low"   
         ch.CC_mode(1.5)
         ch.on()
-        time.sleep(0.5) # wait a moment for the current to stabilize
+        ch.wait_settled("I", 0.05)
 
         assert abs(ch.read_voltage() - 12.0) < 0.2
         assert abs(ch.read_current() - 1.5) < 0.2
@@ -29,3 +30,18 @@ def test_measure():
         assert abs(R - 8.0) < 0.2
         
         ch.off()
+
+def test_IV_sweep():
+    """adaptive I-V sweep against a 12V supply
+    The flat part of the curve must not be sampled at full resolution
+    """
+
+    for ch in el.Channels:
+        ch.CC_mode(0.1)
+        ch.on()
+        curve = ch.IV_sweep(0.1, 1.5, mode="CC", delay=0.2)
+        ch.off()
+
+        assert len(curve["set"]) < 50
+        assert all(abs(curve["V"] - 12.0) < 0.2)
+        assert all(abs(curve["I"] - curve["set"]) < 0.2)
@@ -0,0 +1,259 @@
+"""pytest plugin for the hardware tests
+
+Tests declare the device state they need with a marker instead of
+configuring it themselves:
+
+    @pytest.mark.state(mode="LIST")
+    def test_LIST_loop():
+        ...
+
+    # default for all tests of a module
+    pytestmark = pytest.mark.state(Vrange="HIGH", Crange="HIGH")
+
+Before each test, the state is applied to all channels of the module's
+instrument (`el`). Settings that already have the requested value are not
+sent again. Tests of a module are reordered so that tests needing the same
+state run back to back (use `--keep-order` to turn this off).
+
+At the end, the time spent talking to the device is reported per test.
+"""
+
+import pytest, pyvisa
+
+# settings that must be applied before the others
+_FIRST = ("Vrange", "Crange")
+
+_bus_times = []
+_transitions = [0]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--keep-order", action="store_true", help="run hardware tests in file order"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "state(**settings): channel settings the test needs, e.g. mode='CC'"
+    )
+
+
+def _state(item):
+    "merged state markers of an item (closest marker wins)"
+
+    state = {}
+    for marker in reversed(list(item.iter_markers("state"))):
+        state.update({k: str(v).upper() for k, v in marker.kwargs.items()})
+    return state
+
+
+def _order(items):
+    """group items by state, starting with the group that needs the fewest
+    changes and continuing with the closest one"""
+
+    groups = {}
+    for item in items:
+        groups.setdefault(tuple(sorted(_state(item).items())), []).append(item)
+    current = {}
+    ret = []
+    while groups:
+        key = min(groups, key=lambda k: sum(current.get(n) != v for n, v in k))
+        ret += groups.pop(key)
+        current.update(key)
+    return ret
+
+
+def pytest_collection_modifyitems(session, config, items):
+    if config.getoption("--keep-order"):
+        return
+    modules = {}
+    for item in items:
+        modules.setdefault(item.module, []).append(item)
+    items[:] = [item for module in modules.values() for item in _order(module)]
+
+
+def _apply(ch, state):
+    "set all settings of `state` that differ from what was last set"
+
+    for name in sorted(state, key=lambda n: n not in _FIRST):
+        value = state[name]
+        setting = getattr(type(ch), name)
+        if hasattr(setting, "format") and ch._written.get(name) == setting.format(ch, value):
+            continue
+        setattr(ch, name, value)
+        _transitions[0] += 1
+
+
+@pytest.fixture(autouse=True)
+def device_state(request):
+    "apply the state marker and measure the bus time of the test"
+
+    el = getattr(request.module, "el", None)
+    if el is None:
+        yield
+        return
+    bus_time = el.bus_time
+    state = _state(request.node)
+    for ch in el.Channels:
+        _apply(ch, state)
+    yield
+    dt = el.bus_time - bus_time
+    request.node.user_properties.append(("bus_time", dt))
+    _bus_times.append((request.node.nodeid, dt))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _bus_times:
+        return
+    tr = terminalreporter
+    tr.section("device bus time")
+    for nodeid, dt in sorted(_bus_times, key=lambda x: -x[1])[:20]:
+        tr.write_line(f"{dt:8.2f} s  {nodeid}")
+    total = sum(dt for nodeid, dt in _bus_times)
+    tr.write_line(f"{total:8.2f} s  total, {_transitions[0]} state changes")
+
+
+############################################################
+# fake device for the tests without a device
+
+
+class fake_connection:
+    """stands in for the pyvisa resource of a load
+
+    Answers like the firmware does: set commands are acknowledged with
+    `Rexecu success`, queries return the last value set (or `default`),
+    measurements return the values in `measure`. Answers are queued in
+    `out` until they are read, so late answers and lost lines can be
+    provoked by manipulating `out`. Every command is recorded in `log`.
+    """
+
+    def __init__(self, model="ET5420A+"):
+        self.model = model
+        self.baud_rate = 9600
+        self.query_delay = 0
+        self.timeout = 2000
+        self.read_termination = "\r\n"
+        self.write_termination = "\n"
+        self.state = {}
+        self.measure = {"V": 12.0, "I": 1.0, "P": 12.0, "R": 12.0}
+        self.default = "R0"
+        self.out = []
+        self.log = []
+
+    def respond(self, command):
+        self.log.append(command)
+        if command == "*IDN?":
+            return f"{self.model} 1234 1.00 1.00"
+        stem, _, value = command.partition(" ")
+        stem = stem.upper()
+        if stem.startswith("MEAS"):
+            m = self.measure
+            if stem.endswith("ALL?"):
+                return f"R{m['V']} {m['I']} {m['P']} {m['R']}"
+            return "R{}".format(m[{"VOL": "V", "CUR": "I", "POW": "P", "RES": "R"}[stem[6:9]]])
+        if stem.endswith("?"):
+            return self.state.get(stem[:-1], self.default)
+        self.state[stem] = value
+        return "Rexecu success"
+
+    def write(self, command):
+        self.out.append(self.respond(command))
+
+    def read(self):
+        if not self.out:
+            raise pyvisa.errors.VisaIOError(pyvisa.constants.StatusCode.error_timeout)
+        return self.out.pop(0)
+
+    def query(self, command):
+        self.write(command)
+        return self.read()
+
+    def write_raw(self, data):
+        self.write(data.decode().removesuffix(self.write_termination))
+
+    def read_raw(self):
+        return (self.read() + self.read_termination).encode()
+
+    def close(self):
+        pass
+
+
+class fake_channel_io:
+    """write and query functions for a channel without an instrument
+
+    sent        commands written
+    queries     queries sent
+    bursts      (query, n) of the bursts run
+    state       last value written per command, e.g. {"CURR1:CC": "1.0"}
+    measure     (V, I, P, R), a callable returning them for `state` or a
+                raw answer string
+    """
+
+    def __init__(self, measure, default="R0"):
+        self.measure = measure
+        self.default = default
+        self.sent = []
+        self.queries = []
+        self.bursts = []
+        self.state = {}
+
+    def write(self, command):
+        self.sent.append(command)
+        stem, _, value = command.partition(" ")
+        self.state[stem] = value
+
+    def query(self, command, *args, **kwargs):
+        self.queries.append(command)
+        return self._answer(command)
+
+    def _answer(self, command):
+        if not command.startswith("MEAS"):
+            return self.state.get(command[:-1], self.default)
+        m = self.measure(self.state) if callable(self.measure) else self.measure
+        if isinstance(m, str):
+            return m
+        if command.endswith("ALL?"):
+            return "R" + " ".join(str(x) for x in m)
+        return "R{}".format(m["VCPR".index(command.split(":")[1][0])])
+
+    def burst(self, command, n, gap):
+        import numpy as np
+
+        self.bursts.append((command, n))
+        return [self._answer(command).encode() for i in range(n)], np.arange(n) * 0.01
+
+
+@pytest.fixture
+def make_channel():
+    """factory for channels without an instrument
+
+        ch, io = make_channel(name="1", model="ET5410A+", measure=..., burst=False)
+
+    `io` is the `fake_channel_io` of the channel. With `burst`, the channel
+    supports `acquire` bursts (at 100 samples/s).
+    """
+
+    from ET54.channel import channel
+
+    def make(name="1", model="ET5410A+", measure=(12.0, 1.0, 12.0, 12.0), burst=False):
+        io = fake_channel_io(measure)
+        return channel(name, io.write, io.query, model, io.burst if burst else None), io
+
+    return make
+
+
+@pytest.fixture
+def fake_el(monkeypatch):
+    "ET54 instance talking to a `fake_connection` (as `fake_el.connection`)"
+
+    from ET54.instrument import ET54
+
+    conn = fake_connection()
+
+    class resource_manager:
+        def open_resource(self, RID):
+            return conn
+
+    monkeypatch.setattr(pyvisa, "ResourceManager", resource_manager)
+    return ET54("fake", delay=0)
@@ -0,0 +1,114 @@
+"""Simulated ET54xx bootloader for testing the firmware updater
+
+`device` has the parts of the `serial.Serial` interface used by
+`fwupdater.py`. It behaves like the bootloader seen through a serial port:
+
+* it ignores everything until it is "switched on" (`boot_delay`)
+* it answers the magic number with the menu
+* option 1 erases the flash and waits for the file
+* the file is received at the speed of the line (`baudrate`)
+* after the EOF record, it reports success
+
+Use it with `./fwupdater.py --fake image.hex`.
+"""
+
+import time
+
+MAGIC = bytes.fromhex("1b42543936057a")
+
+MENU = """
+杭州中创
+Bootloader Ver:3.00
+
+----------------------
+[1]下载程序
+
+[2]运行程序
+
+[?]帮助
+----------------------
+"""
+
+
+class device:
+    """fake serial device with a bootloader behind it
+
+    baudrate    simulated line speed (10 bits per byte)
+    boot_delay  seconds until the bootloader listens (user turning on the load)
+    erase_time  seconds the flash erase takes
+    """
+
+    def __init__(self, baudrate=14400, boot_delay=0.5, erase_time=0.2):
+        self.baudrate = baudrate
+        self.boot_delay = boot_delay
+        self.erase_time = erase_time
+        self.timeout = 0
+        self.port = "fake"
+        self.received = bytearray()  # file data that arrived at the device
+        self._t0 = time.monotonic()
+        self._state = "off"
+        self._out = bytearray()  # device -> host
+        self._tx = bytearray()  # host -> device, not transmitted yet
+        self._tx_time = self._t0
+        self._ready_at = None
+
+    def _emit(self, text):
+        self._out += text.replace("\n", "\r\n").encode("gb2312")
+
+    def _update(self):
+        "advance the simulation to the current time"
+
+        now = time.monotonic()
+        if self._state == "erasing" and now >= self._ready_at:
+            self._emit(">" * 64 + "\n删除完成!\n\n准备接收文件...")
+            self._state = "receiving"
+        n = int((now - self._tx_time) * self.baudrate / 10)
+        if n <= 0:
+            return
+        self._tx_time = now if n >= len(self._tx) else self._tx_time + n * 10 / self.baudrate
+        data, self._tx = bytes(self._tx[:n]), self._tx[n:]
+        if not data:
+            return
+        if self._state == "off":
+            if now - self._t0 >= self.boot_delay and MAGIC in data:
+                self._emit(MENU)
+                self._state = "menu"
+        elif self._state == "menu":
+            if b"1" in data:
+                self._emit("\n删除Flash...\n")
+                self._state = "erasing"
+                self._ready_at = now + self.erase_time
+        elif self._state == "receiving":
+            self.received += data
+            if b":00000001FF" in self.received[-64:]:
+                self._emit("\n下载成功!\n")
+                self._state = "done"
+
+    @property
+    def in_waiting(self):
+        self._update()
+        return len(self._out)
+
+    @property
+    def out_waiting(self):
+        self._update()
+        return len(self._tx)
+
+    def read(self, size=1):
+        self._update()
+        data, self._out = bytes(self._out[:size]), self._out[size:]
+        return data
+
+    def write(self, data):
+        self._update()
+        if not self._tx:
+            self._tx_time = time.monotonic()
+        self._tx += data
+        return len(data)
+
+    def flush(self):
+        while self.out_waiting:
+            time.sleep(0.001)
+
+    def close(self):
+        pass
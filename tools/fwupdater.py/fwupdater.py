@@ -1,40 +1,75 @@
 #!/usr/bin/env python3
 "Firmware updater for ET5xx series electronic loads"
 
-import time, serial, sys, os.path, argparse
+import time, serial, sys, os.path, argparse, threading, multiprocessing
+import ihex
+
+MAGIC = bytes.fromhex("1b42543936057a")
+
 
 def main():
     parser = argparse.ArgumentParser(
         description="Perform firmware update on an ET54xx electronic load.",
-        epilog="""Instructions: 1. Turn off the load and connect usb lead. 
+        epilog="""Instructions: 1. Turn off the load and connect usb lead.
         2. Start this programm. 3. Turn on the load and wait for program to finish.
         4. When display shows 'Please reset!', power cycle load.""",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
-    parser.add_argument("-s", "--serialdev", default="/dev/ttyUSB1", help="Serial device")
+    parser.add_argument(
+        "-s", "--serialdev", action="append", default=argparse.SUPPRESS,
+        help="Serial device (default: /dev/ttyUSB1). Repeat to flash several units in parallel",
+    )
     parser.add_argument("-i", "--info", action="store_true", help="Show info only - do not upload anything")
     parser.add_argument( "-q", "--quiet", action="store_true", help="Run quietly without any output")
+    parser.add_argument(
+        "-t", "--timeout", type=float, default=120,
+        help="Give up on a unit that has not answered for TIMEOUT seconds",
+    )
+    parser.add_argument(
+        "--fake", type=int, metavar="BAUD",
+        help="Upload to a simulated bootloader running at BAUD (for testing)",
+    )
     parser.add_argument("hexfile", help="path to hexfile, e.g. image.hex")
     global args
     args = parser.parse_args()
+    args.serialdev = getattr(args, "serialdev", ["/dev/ttyUSB1"])
+
+    # check the image before touching the device
+    data = None
+    if not (args.info and not os.path.exists(args.hexfile)):
+        verify(args.hexfile)
+        with open(args.hexfile, "rb") as infile:
+            data = infile.read()
+
+    if len(args.serialdev) > 1:
+        sys.exit(batch(args.serialdev, data))
 
-    # connect to serial device
+    dev = connect(args.serialdev[0])
+    reader = lines(dev)
+    trigger(dev, reader)
+    upload(dev, reader, data)
+
+
+def connect(port):
+    "open the serial device (or the simulated bootloader)"
+
+    if args.fake:
+        import fakeboot
+
+        return fakeboot.device(baudrate=args.fake)
     try:
-        dev = serial.Serial(
-            args.serialdev,
+        return serial.Serial(
+            port,
             baudrate=14400,
             bytesize=8,
             parity="N",
             stopbits=1,
-            timeout=0.1,
+            timeout=0,
             xonxoff=0,
             rtscts=0,
         )
     except serial.serialutil.SerialException:
-        sys.exit(f"Error: Cannot open serial device {args.serialdev}")
-
-    trigger(dev)
-    upload(dev, args.hexfile)
+        sys.exit(f"Error: Cannot open serial device {port}")
 
 
 def logger(*dat, end="\n", flush=True):
@@ -43,65 +78,247 @@ def logger(*dat, end="\n", flush=True):
         print(" ".join(dat), end=end, flush=flush)
 
 
-def trigger(dev):
-    "trigger bootloader"
+def verify(hexfile):
+    "parse and check the hexfile, exit if it must not be uploaded"
+
+    img, problems, warnings = ihex.verify(hexfile)
+    for w in warnings:
+        logger(f"Warning: {w}")
+    if problems:
+        sys.exit(f"Error: '{hexfile}' failed verification: " + "; ".join(problems))
+    start, end = img.extent
+    logger(
+        f"Image OK: {img.size} bytes at 0x{start:08X}-0x{end - 1:08X},",
+        f"versions: {', '.join(img.versions()) or '-'}",
+    )
+    return img
+
+
+class lines:
+    """non-blocking line reader for the bootloader output
+
+    Incomplete lines are returned once nothing has arrived for `idle` seconds
+    (the bootloader does not terminate its prompts).
+    """
+
+    def __init__(self, dev, idle=0.1):
+        self.dev = dev
+        self.idle = idle
+        self.buf = b""
+        self.last = time.monotonic()
+
+    def poll(self):
+        "return the lines received so far"
+
+        n = self.dev.in_waiting
+        now = time.monotonic()
+        if n:
+            self.buf += self.dev.read(n)
+            self.last = now
+        *ret, self.buf = self.buf.split(b"\n")
+        if self.buf and now - self.last >= self.idle:
+            ret.append(self.buf)
+            self.buf = b""
+        return [line.decode("gb2312", errors="replace").rstrip() for line in ret]
+
+    def wait(self, timeout=0.2, interval=0.005):
+        "poll until data arrives or `timeout` expires"
 
-    logger("Sending magic number. Please turn on the device now.") 
+        end = time.monotonic() + timeout
+        while not self.dev.in_waiting and time.monotonic() < end:
+            time.sleep(interval)
 
-    # send magic nubmer until we get into bootloader menu
-    magic = bytes.fromhex("1b42543936057a")
+
+def trigger(dev, reader, interval=0.2):
+    "trigger bootloader, exit if the load does not answer within `args.timeout`"
+
+    logger("Sending magic number. Please turn on the device now.")
+
+    # send magic number until the load answers. The answer is picked up as
+    # soon as it arrives, not at the end of the interval.
+    deadline = time.monotonic() + args.timeout
     while True:
-        logger(".", end="") 
-        dev.write(magic)
-        dev.flush()
-        time.sleep(0.2)
-        dev.in_waiting
+        if time.monotonic() > deadline:
+            logger()
+            sys.exit(f"Error: No answer from the bootloader within {args.timeout:g} s")
+        logger(".", end="")
+        dev.write(MAGIC)
+        reader.wait(interval)
         if dev.in_waiting > 0:  # load is responding
             break
     logger()
 
 
-def upload(dev, hexfile):
-    "upload the hexfile"
+def upload(dev, reader, data):
+    """upload the image data
+
+    Exits if the device does not send anything for `args.timeout` seconds
+    (not counting the upload itself).
+
+    returns (bytes sent, seconds) or None in info mode
+    """
     # Upload hexfile when device is ready
     menucomplete = 0
+    received = []
+    deadline = time.monotonic() + args.timeout
     while True:
-        line = dev.readline().decode("gb2312").rstrip()
-        logger(">",line) 
+        if not received:
+            if time.monotonic() > deadline:
+                sys.exit(f"Error: Device silent for {args.timeout:g} s")
+            reader.wait()
+            received = reader.poll()
+            continue
+        deadline = time.monotonic() + args.timeout
+        line = received.pop(0)
+        logger(">",line)
         if "帮助" in line:  # "Help"
             menucomplete = 1
         if "----------------------" in line and menucomplete:
             if args.info:
-                break
+                return
             else:
                 dev.write("1".encode("gb2312")) # select option 1: file upload
                 logger("Selecting: [1] File Upload.")
         if "准备接收文件" in line:  # "Prepare to receive file"
-            try:
-                filesize = os.path.getsize(hexfile)
-            except:
-                sys.exit(f"Error: cannot open hexfile '{hexfile}'")
-            logger(f"Uploading '{hexfile}': {filesize} bytes")
-            
-            try:
-                with open(hexfile, "rb") as infile:
-                    sent = 0
-                    while chunk := infile.read(1024):
-                        dev.write(chunk)
-                        dev.flush()
-                        sent += len(chunk)
-                        percent = (sent / filesize) * 100
-                        logger(f"\rProgress: {percent:0.0f}%", end="")
-                dev.readline()  # skip the progress dots
-                logger()
-            except:
-                sys.exit(f"Error: cannot open hexfile '{hexfile}'")
+            logger(f"Uploading '{args.hexfile}': {len(data)} bytes")
+            sent, elapsed, output = send(dev, data, reader)
+            received += output
+            deadline = time.monotonic() + args.timeout
+            logger(f"Sent {sent} bytes in {elapsed:.1f} s ({sent / elapsed:.0f} bytes/s)")
 
         if "下载成功!" in line:     # "Download successful!"
             logger("Upload successful.")
             logger("Wait for load to display 'Please Reset!' before cycling power.")
+            return sent, elapsed
+
+
+class progress(threading.Thread):
+    "print upload progress from a separate thread"
+
+    def __init__(self, total, interval=0.5):
+        super().__init__(daemon=True)
+        self.total = total
+        self.interval = interval
+        self.sent = 0
+        self.rate = 0
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            self.show()
+        self.show()
+        logger()
+
+    def show(self):
+        logger(
+            f"\rProgress: {self.sent / self.total * 100:0.0f}% ({self.rate:.0f} bytes/s)",
+            end="",
+        )
+
+
+def send(dev, data, reader, chunk=1024, latency=0.25, min_chunk=64, max_chunk=16384):
+    """send data as fast as the line takes it
+
+    Instead of flushing after every chunk, up to `latency` seconds worth of
+    data is kept queued in the driver, so the line never runs dry. Chunk size
+    and queue depth follow the throughput measured while sending. Progress is
+    printed by a separate thread. Output of the device is collected without
+    blocking.
+
+    returns (bytes sent, seconds, lines received meanwhile)
+    """
+
+    status = progress(len(data))
+    status.start()
+    t0 = time.perf_counter()
+    sent = 0
+    window = chunk
+    output = []
+    try:
+        while sent < len(data):
+            sent += dev.write(data[sent : sent + chunk])
+            # flow control: wait while more than `window` bytes are queued
+            while (queued := dev.out_waiting) > window:
+                time.sleep(min(0.05, (queued - window) / max(status.rate, 1)))
+            elapsed = time.perf_counter() - t0
+            if elapsed > 0:
+                status.rate = (sent - queued) / elapsed
+                window = max(min_chunk, int(status.rate * latency))
+                chunk = min(max_chunk, window)
+            status.sent = sent - queued
+            output += reader.poll()
+        dev.flush()
+        status.sent = sent
+    finally:
+        status.done.set()
+        status.join()
+    return sent, time.perf_counter() - t0, output
+
+
+def batch(ports, data):
+    """flash several units in parallel, one worker process per port
+
+    The image is read and verified once and handed to the workers. Prints a
+    report when all units are done.
+
+    returns the exit status (0 if all units were flashed)
+    """
+
+    logger(f"Flashing {len(ports)} units. Please turn on the devices now.")
+    t0 = time.perf_counter()
+    results = []
+    with multiprocessing.Pool(len(ports), initializer=_init, initargs=(args, data)) as pool:
+        for result in pool.imap_unordered(flash, ports):
+            logger(f"{result['port']}: {result['status']} after {result['total']:.1f} s")
+            results.append(result)
+    logger(report(results, time.perf_counter() - t0))
+    return 0 if all(r["status"] == "OK" for r in results) else 1
+
+
+def _init(a, data):
+    "set up a batch worker process"
+    global args, _image
+    args = argparse.Namespace(**vars(a))
+    args.quiet = True
+    _image = data
+
+
+def flash(port):
+    "flash one unit in a batch worker, returns a status dict"
+
+    result = {"port": port, "status": "OK", "sent": 0, "upload": 0.0}
+    t0 = time.perf_counter()
+    try:
+        dev = connect(port)
+        reader = lines(dev)
+        trigger(dev, reader)
+        done = upload(dev, reader, _image)
+        if done:
+            result["sent"], result["upload"] = done
+        dev.close()
+    except SystemExit as e:
+        result["status"] = f"FAILED: {str(e).removeprefix('Error: ')}"
+    except Exception as e:
+        result["status"] = f"FAILED: {type(e).__name__}: {e}"
+    result["total"] = time.perf_counter() - t0
+    return result
+
+
+def report(results, elapsed):
+    "consolidated batch report"
+
+    width = max(len("Unit"), *(len(r["port"]) for r in results))
+    ret = [f"\n{'Unit':{width}}  {'Bytes':>8}  {'Upload':>9}  {'Total':>9}  {'Rate':>10}  Status"]
+    for r in sorted(results, key=lambda r: r["port"]):
+        rate = r["sent"] / r["upload"] if r["upload"] else 0
+        ret.append(
+            f"{r['port']:{width}}  {r['sent']:8d}  {r['upload']:7.1f} s  {r['total']:7.1f} s"
+            f"  {rate:6.0f} B/s  {r['status']}"
+        )
+    ok = sum(r["status"] == "OK" for r in results)
+    ret.append(f"{ok} of {len(results)} units flashed in {elapsed:.1f} s")
+    return "\n".join(ret)
 
-            break
 
 if __name__ == "__main__":
     try:
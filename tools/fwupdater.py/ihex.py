@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Intel HEX image analysis and verification
+
+Check firmware images before uploading them:
+
+    ./ihex.py ../fwupdater/images/*.hex
+    ./ihex.py --diff old.hex new.hex
+
+Every record is checked (syntax, length, checksum, type). The report shows
+the address map, gaps and overlaps, version strings found in the image and
+whether the file matches its entry in `sha256sum.txt` next to it.
+"""
+
+import re, sys, time, os.path, hashlib, argparse, binascii
+
+DATA, EOF, EXT_SEGMENT, START_SEGMENT, EXT_LINEAR, START_LINEAR = range(6)
+
+# version strings as found in the ET54A+ images, e.g. V1.03.2222.015
+_VERSION = re.compile(rb"V\d+\.\d+\.\d{4}\.[0-9A-Z]{3}")
+
+
+class image:
+    """Firmware image parsed from an Intel HEX file
+
+    name        file name (for messages)
+    records     number of records
+    segments    list of (address, bytes) of contiguous data, sorted by address
+    overlaps    list of (address, length, line) of data records that write
+                to addresses already written by an earlier record
+    start       start address from a type 3 or 5 record or None
+    sha256      SHA-256 of the file as a hex string
+    """
+
+    def __init__(self, name, records, segments, overlaps, start, sha256):
+        self.name = name
+        self.records = records
+        self.segments = segments
+        self.overlaps = overlaps
+        self.start = start
+        self.sha256 = sha256
+
+    @property
+    def size(self):
+        "number of data bytes"
+        return sum(len(data) for address, data in self.segments)
+
+    @property
+    def extent(self):
+        "(first address, last address + 1)"
+        if not self.segments:
+            return (0, 0)
+        address, data = self.segments[-1]
+        return (self.segments[0][0], address + len(data))
+
+    @property
+    def gaps(self):
+        "list of (address, length) of holes between segments"
+        ret = []
+        for (a, da), (b, db) in zip(self.segments, self.segments[1:]):
+            ret.append((a + len(da), b - a - len(da)))
+        return ret
+
+    def tobytes(self, fill=0xFF):
+        "contiguous image from the first to the last address, gaps filled"
+
+        start, end = self.extent
+        ret = bytearray([fill]) * (end - start)
+        for address, data in self.segments:
+            ret[address - start : address - start + len(data)] = data
+        return ret
+
+    def versions(self):
+        "version strings contained in the image"
+        ret = []
+        for address, data in self.segments:
+            for m in _VERSION.finditer(data):
+                if m.group().decode() not in ret:
+                    ret.append(m.group().decode())
+        return ret
+
+
+def parse(text, name="<string>"):
+    """parse Intel HEX text
+
+    Raises ValueError with the line number for malformed records, bad
+    checksums, unknown record types and missing or misplaced EOF records.
+    """
+
+    if isinstance(text, str):
+        text = text.encode("ascii", errors="replace")
+    sha256 = hashlib.sha256(text).hexdigest()
+    chunks = []
+    overlaps = []
+    base = 0
+    start = None
+    eof = False
+    unhexlify = binascii.unhexlify
+    for n, line in enumerate(text.splitlines(), 1):
+        if eof:
+            if not line.strip():
+                continue
+            raise ValueError(f"{name}:{n}: data after EOF record")
+        if line[:1] != b":":
+            if not line.strip():
+                continue
+            raise ValueError(f"{name}:{n}: record does not start with ':'")
+        try:
+            rec = unhexlify(line[1:].rstrip())
+        except binascii.Error:
+            raise ValueError(f"{name}:{n}: invalid hex digits")
+        if len(rec) < 5 or len(rec) != rec[0] + 5:
+            raise ValueError(f"{name}:{n}: record length does not match byte count")
+        if sum(rec) & 0xFF:
+            raise ValueError(f"{name}:{n}: checksum error")
+        rtype = rec[3]
+        payload = rec[4:-1]
+        if rtype == DATA:
+            chunks.append((base + (rec[1] << 8 | rec[2]), payload, n))
+        elif rtype == EOF:
+            eof = True
+        elif rtype == EXT_SEGMENT:
+            base = int.from_bytes(payload, "big") << 4
+        elif rtype == EXT_LINEAR:
+            base = int.from_bytes(payload, "big") << 16
+        elif rtype in (START_SEGMENT, START_LINEAR):
+            start = int.from_bytes(payload, "big")
+        else:
+            raise ValueError(f"{name}:{n}: unknown record type {rtype:02X}")
+    if not eof:
+        raise ValueError(f"{name}: missing EOF record")
+
+    # merge records into contiguous segments (the sort is cheap for the
+    # usual, already ordered files)
+    chunks.sort(key=lambda c: c[0])
+    segments = []
+    end = None
+    for address, payload, n in chunks:
+        if end is not None and address < end:
+            overlaps.append((address, min(len(payload), end - address), n))
+            data = segments[-1][1]
+            offset = address - segments[-1][0]
+            data[offset : offset + len(payload)] = payload
+            end = max(end, address + len(payload))
+        elif end is not None and address == end:
+            segments[-1][1].extend(payload)
+            end += len(payload)
+        else:
+            segments.append((address, bytearray(payload)))
+            end = address + len(payload)
+    return image(name, len(chunks), segments, overlaps, start, sha256)
+
+
+def load(path):
+    "parse an Intel HEX file"
+
+    with open(path, "rb") as fh:
+        return parse(fh.read(), os.path.basename(path))
+
+
+def expected_sha256(path, sumfile=None):
+    """SHA-256 listed for `path` in a `sha256sum` style file
+
+    sumfile defaults to `sha256sum.txt` in the directory of `path`.
+
+    returns the hex digest or None if the file is not listed
+    """
+
+    if sumfile is None:
+        sumfile = os.path.join(os.path.dirname(path), "sha256sum.txt")
+    try:
+        with open(sumfile) as fh:
+            for line in fh:
+                digest, _, fname = line.strip().partition(" ")
+                if fname.strip().lstrip("*") == os.path.basename(path):
+                    return digest.lower()
+    except OSError:
+        pass
+    return None
+
+
+def verify(path, sumfile=None):
+    """parse and check an image file
+
+    returns (image, problems, warnings). `image` is None if the file could
+    not be parsed. `problems` are reasons not to upload the image.
+    """
+
+    problems = []
+    warnings = []
+    try:
+        img = load(path)
+    except (OSError, ValueError) as e:
+        return None, [str(e)], warnings
+    expected = expected_sha256(path, sumfile)
+    if expected is None:
+        warnings.append("no SHA-256 listed, cannot check file integrity")
+    elif expected != img.sha256:
+        problems.append(f"SHA-256 mismatch (expected {expected}, got {img.sha256})")
+    if img.overlaps:
+        problems.append(f"{len(img.overlaps)} records overlap earlier records")
+    if not img.segments:
+        problems.append("image contains no data")
+    return img, problems, warnings
+
+
+def diff(a, b, fill=0xFF, block=256):
+    """address ranges in which two images differ
+
+    Addresses missing in one image are compared as `fill` (erased flash).
+
+    returns a list of (address, length)
+    """
+
+    start = min(a.extent[0], b.extent[0])
+    end = max(a.extent[1], b.extent[1])
+    da = bytearray([fill]) * (end - start)
+    db = bytearray([fill]) * (end - start)
+    for img, buf in ((a, da), (b, db)):
+        for address, data in img.segments:
+            buf[address - start : address - start + len(data)] = data
+
+    ret = []
+    run = None
+    for offset in range(0, end - start, block):
+        if da[offset : offset + block] == db[offset : offset + block]:
+            continue
+        for i in range(offset, min(offset + block, end - start)):
+            if da[i] != db[i]:
+                if run is not None and run[0] + run[1] == start + i:
+                    run[1] += 1
+                else:
+                    run = [start + i, 1]
+                    ret.append(run)
+    return [tuple(r) for r in ret]
+
+
+def report(path, img, problems, warnings, elapsed):
+    "human readable summary of `verify` results"
+
+    lines = [f"{path}:"]
+    if img is not None:
+        start, end = img.extent
+        lines.append(f"  records:   {img.records}")
+        lines.append(f"  data:      {img.size} bytes in {len(img.segments)} segment(s)")
+        lines.append(f"  extent:    0x{start:08X} - 0x{end - 1:08X}")
+        for address, data in img.segments:
+            lines.append(f"  segment:   0x{address:08X} - 0x{address + len(data) - 1:08X}")
+        for address, length in img.gaps:
+            lines.append(f"  gap:       0x{address:08X} ({length} bytes)")
+        for address, length, n in img.overlaps:
+            lines.append(f"  overlap:   0x{address:08X} ({length} bytes, line {n})")
+        if img.start is not None:
+            lines.append(f"  start:     0x{img.start:08X}")
+        lines.append(f"  versions:  {', '.join(img.versions()) or '-'}")
+        lines.append(f"  sha256:    {img.sha256}")
+    for w in warnings:
+        lines.append(f"  warning:   {w}")
+    for p in problems:
+        lines.append(f"  ERROR:     {p}")
+    lines.append(f"  result:    {'FAILED' if problems else 'OK'} ({elapsed * 1000:.0f} ms)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check Intel HEX firmware images for ET54xx electronic loads."
+    )
+    parser.add_argument("hexfile", nargs="+", help="hex file(s) to check")
+    parser.add_argument(
+        "--sums", default=None, help="sha256sum file (default: sha256sum.txt next to the image)"
+    )
+    parser.add_argument(
+        "--diff", action="store_true", help="show address ranges in which two images differ"
+    )
+    args = parser.parse_args()
+
+    if args.diff:
+        if len(args.hexfile) != 2:
+            sys.exit("Error: --diff needs exactly two files")
+        try:
+            a, b = (load(path) for path in args.hexfile)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Error: {e}")
+        ranges = diff(a, b)
+        for address, length in ranges:
+            print(f"0x{address:08X}  {length} bytes")
+        print(f"{len(ranges)} range(s), {sum(n for a, n in ranges)} bytes differ")
+        return
+
+    failed = False
+    for path in args.hexfile:
+        t0 = time.perf_counter()
+        img, problems, warnings = verify(path, args.sums)
+        print(report(path, img, problems, warnings, time.perf_counter() - t0))
+        failed |= bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
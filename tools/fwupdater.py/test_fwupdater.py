@@ -0,0 +1,37 @@
+"Tests of the firmware updater against the simulated bootloader (pytest)"
+
+import argparse
+import pytest
+import fwupdater, fakeboot
+
+
+@pytest.fixture(autouse=True)
+def args():
+    fwupdater.args = argparse.Namespace(quiet=True, info=False, hexfile="test.hex", timeout=0.3, fake=None)
+    return fwupdater.args
+
+
+def test_upload():
+    data = b":0400000001020304F2\r\n:00000001FF\r\n"
+    dev = fakeboot.device(baudrate=115200, boot_delay=0, erase_time=0)
+    reader = fwupdater.lines(dev)
+    fwupdater.trigger(dev, reader)
+    sent, elapsed = fwupdater.upload(dev, reader, data)
+    assert sent == len(data)
+    assert bytes(dev.received) == data
+
+
+def test_unit_that_never_answers(monkeypatch):
+    monkeypatch.setattr(fwupdater, "connect", lambda port: fakeboot.device(boot_delay=float("inf")))
+    fwupdater._image = b""
+    result = fwupdater.flash("/dev/ttyUSB9")
+    assert result["status"].startswith("FAILED: No answer")
+
+
+def test_device_goes_silent():
+    dev = fakeboot.device(boot_delay=0)
+    reader = fwupdater.lines(dev)
+    fwupdater.trigger(dev, reader)
+    dev._emit = lambda text: None  # bootloader hangs after the menu
+    with pytest.raises(SystemExit, match="silent"):
+        fwupdater.upload(dev, reader, b"")
@@ -0,0 +1,73 @@
+"Tests of the Intel HEX checks (pytest)"
+
+import hashlib
+import pytest
+import ihex
+
+
+def record(rtype, address, payload):
+    "one Intel HEX record"
+    rec = bytes([len(payload), address >> 8, address & 0xFF, rtype]) + bytes(payload)
+    return ":" + (rec + bytes([-sum(rec) & 0xFF])).hex().upper()
+
+
+def hexfile(*records):
+    return "\n".join(records + (record(ihex.EOF, 0, b""),)) + "\n"
+
+
+def test_segments_gaps_and_start():
+    text = hexfile(
+        record(ihex.EXT_LINEAR, 0, b"\x08\x00"),
+        record(ihex.DATA, 0x0000, b"V1.03.2222.015"),
+        record(ihex.DATA, 0x000E, b"\x01\x02"),
+        record(ihex.DATA, 0x0100, b"\xAA\xBB"),
+        record(ihex.START_LINEAR, 0, b"\x08\x00\x01\x00"),
+    )
+    img = ihex.parse(text)
+    assert img.records == 3
+    assert img.size == 18
+    assert img.extent == (0x08000000, 0x08000102)
+    assert img.gaps == [(0x08000010, 0xF0)]
+    assert img.start == 0x08000100
+    assert img.versions() == ["V1.03.2222.015"]
+    assert img.overlaps == []
+    assert img.sha256 == hashlib.sha256(text.encode()).hexdigest()
+    assert img.tobytes()[0x10] == 0xFF
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        (":0100000001FF\n" + record(ihex.EOF, 0, b""), "checksum"),
+        (":01000000\n", "byte count"),
+        ("0100000001FE\n", "':'"),
+        (record(ihex.DATA, 0, b"\x01"), "missing EOF"),
+        (hexfile() + record(ihex.DATA, 0, b"\x01"), "after EOF"),
+        (hexfile(record(7, 0, b"")), "record type"),
+    ],
+)
+def test_broken_files(text, message):
+    with pytest.raises(ValueError, match=message):
+        ihex.parse(text, "x.hex")
+
+
+def test_verify(tmp_path):
+    good = hexfile(record(ihex.DATA, 0, b"\x01\x02\x03\x04"))
+    path = tmp_path / "fw.hex"
+    path.write_text(good)
+    img, problems, warnings = ihex.verify(str(path))
+    assert problems == [] and warnings
+    digest = hashlib.sha256(good.encode()).hexdigest()
+    (tmp_path / "sha256sum.txt").write_text(f"{digest}  fw.hex\n")
+    assert ihex.verify(str(path))[1:] == ([], [])
+    # overlapping records and a wrong checksum are reasons not to upload
+    path.write_text(hexfile(record(ihex.DATA, 0, b"\x01\x02"), record(ihex.DATA, 1, b"\x03")))
+    img, problems, warnings = ihex.verify(str(path))
+    assert any("SHA-256" in p for p in problems)
+    assert any("overlap" in p for p in problems)
+
+
+def test_diff():
+    a = ihex.parse(hexfile(record(ihex.DATA, 0, b"\x00\x01\x02\x03")))
+    b = ihex.parse(hexfile(record(ihex.DATA, 0, b"\x00\x09\x09\x03\x04")))
+    assert ihex.diff(a, b) == [(1, 2), (4, 1)]